@@ -0,0 +1,80 @@
+import argparse
+import random
+import time
+
+from core.webhook_parser import parse_alert
+from hedge_strategy_v1.app.schema import parse_webhook_payload
+
+
+TICKERS = {
+    "BTCUSDT.P": 67250.0,
+    "ETHUSDT.P": 3120.0,
+    "SOLUSDT.P": 152.35,
+    "XRPUSDT.P": 0.5231,
+    "DOGEUSDT.P": 0.15873,
+}
+
+# hedge_strategy_v1/examples/alerts.md 의 alert 형식
+TEMPLATES = [
+    "{action},{ticker},{size},{close}",
+    "{action},{ticker},{size},{close},regime={regime},role=main,hedge=0,tf=15",
+    "{action},{ticker},{hedge},{close},regime={regime},role=hedge,hedge={hedge},tf=15",
+    "close,{ticker},{hedge},{close},role=hedge_close",
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark webhook alert parsing (payloads per second)")
+    parser.add_argument("--count", type=int, default=200000, help="Number of alerts in the corpus")
+    parser.add_argument("--repeat", type=int, default=3, help="Best of N runs")
+    parser.add_argument("--seed", type=int, default=7)
+    return parser.parse_args()
+
+
+def build_corpus(count, seed):
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(count):
+        ticker, price = rng.choice(list(TICKERS.items()))
+        # 기본 형식이 대부분, 확장 / 헤지 형식이 섞인 분포
+        template = rng.choices(TEMPLATES, weights=(6, 2, 1, 1))[0]
+        corpus.append(template.format(
+            action=rng.choice(("buy", "sell")),
+            ticker=ticker,
+            size=rng.choice((1, 2, 0.5)),
+            hedge=rng.choice((0.25, 0.5)),
+            close=round(price * rng.uniform(0.98, 1.02), 5),
+            regime=rng.choice(("bull", "bear", "neutral")),
+        ))
+    return corpus
+
+
+def run(name, fn, corpus, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for text in corpus:
+            fn(text)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{name:<28} {len(corpus) / best:>12,.0f} payloads/s")
+
+
+def hedge_with_key(text):
+    # webhook_app 처럼 dedupe_key 까지 사용
+    return parse_webhook_payload(text).dedupe_key
+
+
+def main():
+    args = parse_args()
+    corpus = build_corpus(args.count, args.seed)
+    hedge_corpus = corpus
+    main_corpus = [text for text in corpus if not text.startswith("close")]
+
+    run("parse_alert", parse_alert, main_corpus, args.repeat)
+    run("parse_webhook_payload", parse_webhook_payload, hedge_corpus, args.repeat)
+    run("parse_webhook_payload+key", hedge_with_key, hedge_corpus, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -15,8 +15,8 @@ def parse_args():
     return parser.parse_args()
 
 
-def find_contracts(bot, symbol, side):
-    positions = bot.api.fetch_positions()
+async def find_contracts(bot, symbol, side):
+    positions, _ = await bot.fetch_positions()
     for pos in positions:
         if pos.get("symbol") != symbol:
             continue
@@ -28,8 +28,8 @@ def find_contracts(bot, symbol, side):
     return 0
 
 
-def print_snapshot(bot, symbol):
-    positions = bot.api.fetch_positions()
+async def print_snapshot(bot, symbol):
+    positions, _ = await bot.fetch_positions()
     print(f"[snapshot] {symbol}")
     for side in ("long", "short"):
         found = False
@@ -50,12 +50,7 @@ def print_snapshot(bot, symbol):
             print(f"  {side}: empty")
 
 
-async def main():
-    args = parse_args()
-    bot = Bot()
-    bot.trader.config["OKX"]["POSITION_MODE"] = "hedge"
-    bot.trader.config["OKX"]["ENVIRONMENT"] = args.env
-    bot.setup_api()
+async def run(bot, args):
     try:
         await bot.ensure_exchange_mode()
     except (ccxt.AuthenticationError, RuntimeError) as exc:
@@ -70,23 +65,35 @@ async def main():
     symbol = args.symbol or bot.trader.get_target_symbols()[0]
     print(f"[close] symbol={symbol} env={args.env}")
 
-    long_contracts = find_contracts(bot, symbol, "long")
+    long_contracts = await find_contracts(bot, symbol, "long")
     if long_contracts > 0:
         long_order = await bot.market_order_hedge(symbol, "long", "close", vol=long_contracts)
         print(f"long close order id={long_order['id']}")
     else:
         print("long position empty")
     await asyncio.sleep(args.wait_seconds)
-    print_snapshot(bot, symbol)
+    await print_snapshot(bot, symbol)
 
-    short_contracts = find_contracts(bot, symbol, "short")
+    short_contracts = await find_contracts(bot, symbol, "short")
     if short_contracts > 0:
         short_order = await bot.market_order_hedge(symbol, "short", "close", vol=short_contracts)
         print(f"short close order id={short_order['id']}")
     else:
         print("short position empty")
     await asyncio.sleep(args.wait_seconds)
-    print_snapshot(bot, symbol)
+    await print_snapshot(bot, symbol)
+
+
+async def main():
+    args = parse_args()
+    bot = Bot()
+    bot.trader.config["OKX"]["POSITION_MODE"] = "hedge"
+    bot.trader.config["OKX"]["ENVIRONMENT"] = args.env
+    await bot.reset_api()
+    try:
+        await run(bot, args)
+    finally:
+        await bot.close_api()
 
 
 if __name__ == "__main__":
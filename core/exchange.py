@@ -0,0 +1,210 @@
+import os
+import time
+import json
+import asyncio
+import logging
+import aiohttp
+import ccxt
+from contextvars import ContextVar
+
+from core.persistence import write_atomic
+from core.ratelimit import PRIORITY_READ
+
+
+logger = logging.getLogger(__name__)
+
+# 캐시 파일 형식이 바뀌면 올림 (ccxt 버전 / 거래소 / 환경이 달라도 캐시 무시)
+MARKETS_CACHE_VERSION = 1
+
+# 설정된 task (와 그 하위 task) 안에서 나간 거래소 호출 수를 endpoint 별로 셈 (Counter)
+call_counter = ContextVar('call_counter', default=None)
+
+
+class ExchangeSession():
+    """
+        ccxt 클라이언트 하나를 계속 재사용하는 거래소 세션
+        - start(): keep-alive 연결 pool 을 붙이고 market 정보를 미리 로드
+            - markets_cache 파일이 있고 version / ccxt 버전 / cache_key / markets_ttl 이 맞으면 거래소 조회 없이 사용
+        - market 정보는 markets_ttl 초마다 refresh_markets_if_due() 로 갱신 (새로 받을 때마다 캐시 파일도 갱신)
+        - call(): RequestScheduler 로 호출 간격 조절 + 에러 종류별 처리
+            - NetworkError (timeout, 점검, 429 등) 는 조회성 요청만 retry_delays 간격으로 재시도
+            - 주문처럼 재전송하면 안 되는 요청(idempotent=False) 은 바로 호출자에게 전달
+            - BadSymbol 은 market 정보를 한 번 새로 받은 뒤 재시도
+            - 그 외 ExchangeError (InvalidOrder, InsufficientFunds ...) 는 그대로 전달
+        - 에러가 나도 클라이언트를 새로 만들지 않음 (restart() 는 환경을 바꿀 때만 사용)
+    """
+    def __init__(self, factory=None, client=None, scheduler=None, markets_ttl=3600,
+                 retry_delays=(0.5, 1.0, 2.0), pool_size=20, keepalive=60, markets_cache=None, cache_key=''):
+        self.factory = factory
+        self.client = client if client is not None else factory()
+        self.scheduler = scheduler
+        self.markets_ttl = markets_ttl
+        self.retry_delays = tuple(retry_delays)
+        self.pool_size = pool_size
+        self.keepalive = keepalive
+        self.markets_cache = markets_cache
+        self.cache_key = cache_key
+
+        self.markets_loaded_at = 0.0
+        self.markets_source = None
+        self._markets_lock = asyncio.Lock()
+        self._session = None
+
+        self.calls = 0
+        self.retries = 0
+        self.escalated = 0
+        self.market_loads = 0
+        self.restarts = 0
+
+    async def start(self):
+        self.open_pool()
+        if not await self.restore_markets():
+            await self.load_markets()
+
+    def open_pool(self):
+        # ccxt 가 매번 만드는 기본 세션 대신 keep-alive / DNS 캐시를 둔 세션을 직접 소유
+        client = self.client
+        if self._session is not None or not hasattr(client, 'own_session') or client.session is not None:
+            return
+        # own_session 을 먼저 끄면 open() 은 ssl context / event loop 만 준비
+        client.own_session = False
+        client.open()
+        connector = aiohttp.TCPConnector(
+            ssl=client.ssl_context,
+            limit=self.pool_size,
+            keepalive_timeout=self.keepalive,
+            ttl_dns_cache=300,
+            enable_cleanup_closed=True,
+        )
+        self._session = aiohttp.ClientSession(connector=connector, trust_env=client.aiohttp_trust_env)
+        client.session = self._session
+
+    async def load_markets(self, reload=False):
+        async with self._markets_lock:
+            if self.markets_loaded_at and not reload:
+                return self.client.markets
+            markets = await self.call('public', 'load_markets', reload)
+            self.markets_loaded_at = time.monotonic()
+            self.markets_source = 'network'
+            self.market_loads += 1
+            await self.save_markets()
+            return markets
+
+    def cache_header(self):
+        return {
+            'version': MARKETS_CACHE_VERSION,
+            'ccxt': ccxt.__version__,
+            'exchange': getattr(self.client, 'id', None),
+            'key': self.cache_key,
+        }
+
+    def _read_cache(self):
+        if not os.path.exists(self.markets_cache):
+            return None
+        with open(self.markets_cache, 'r') as f:
+            return json.load(f)
+
+    async def restore_markets(self):
+        if not self.markets_cache:
+            return False
+        try:
+            payload = await asyncio.to_thread(self._read_cache)
+        except (OSError, ValueError):
+            logger.exception('Markets cache read failed | %s', self.markets_cache)
+            return False
+        if not payload or payload.get('header') != self.cache_header():
+            return False
+        age = time.time() - float(payload.get('saved_at', 0))
+        if not 0 <= age < self.markets_ttl:
+            return False
+
+        self.client.set_markets(payload['markets'], payload.get('currencies'))
+        # 캐시 파일 나이만큼 이미 지난 것으로 보고 refresh 주기 계산
+        self.markets_loaded_at = time.monotonic() - age
+        self.markets_source = 'cache'
+        if getattr(self.client, 'options', {}).get('adjustForTimeDifference') and hasattr(self.client, 'load_time_difference'):
+            # 서명 timestamp 보정은 원래 fetch_markets 안에서 하므로 캐시 사용 시 따로 조회
+            await self.call('public', 'load_time_difference')
+        return True
+
+    async def save_markets(self):
+        if not self.markets_cache or not self.client.markets:
+            return
+        payload = {
+            'header': self.cache_header(),
+            'saved_at': time.time(),
+            'markets': list(self.client.markets.values()),
+            'currencies': getattr(self.client, 'currencies', None) or None,
+        }
+        try:
+            text = json.dumps(payload)
+            await asyncio.to_thread(write_atomic, self.markets_cache, text)
+        except (OSError, TypeError, ValueError):
+            logger.exception('Markets cache write failed | %s', self.markets_cache)
+
+    def markets_due(self):
+        return not self.markets_loaded_at or time.monotonic() - self.markets_loaded_at >= self.markets_ttl
+
+    async def refresh_markets_if_due(self):
+        if self.markets_due():
+            await self.load_markets(reload=bool(self.markets_loaded_at))
+
+    async def call(self, endpoint, method, *args, priority=PRIORITY_READ, idempotent=True, **kwargs):
+        attempt = 0
+        markets_refreshed = False
+        while True:
+            if self.scheduler is not None:
+                await self.scheduler.acquire(endpoint, priority)
+            self.calls += 1
+            counter = call_counter.get()
+            if counter is not None:
+                counter[endpoint] += 1
+            try:
+                return await getattr(self.client, method)(*args, **kwargs)
+            except ccxt.BadSymbol:
+                if markets_refreshed or method == 'load_markets':
+                    self.escalated += 1
+                    raise
+                markets_refreshed = True
+                self.retries += 1
+                await self.load_markets(reload=True)
+            except ccxt.NetworkError as exc:
+                if isinstance(exc, ccxt.RateLimitExceeded) and self.scheduler is not None:
+                    self.scheduler.penalize(endpoint)
+                if not idempotent or attempt >= len(self.retry_delays):
+                    self.escalated += 1
+                    raise
+                self.retries += 1
+                await asyncio.sleep(self.retry_delays[attempt])
+                attempt += 1
+
+    async def restart(self, markets_cache=None, cache_key=None):
+        # 환경(live / demo) 이나 API key 를 바꿀 때만 사용
+        # 환경이 바뀌면 market 캐시 파일 / cache_key 도 새 환경 값으로 바꿔서 넘김
+        await self.close()
+        if markets_cache is not None:
+            self.markets_cache = markets_cache
+        if cache_key is not None:
+            self.cache_key = cache_key
+        self.client = self.factory()
+        self.markets_loaded_at = 0.0
+        self.restarts += 1
+        await self.start()
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.close()
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def stats(self):
+        return {
+            'calls': self.calls,
+            'retries': self.retries,
+            'escalated': self.escalated,
+            'market_loads': self.market_loads,
+            'markets_age_sec': round(time.monotonic() - self.markets_loaded_at, 1) if self.markets_loaded_at else None,
+            'markets_source': self.markets_source,
+            'restarts': self.restarts,
+        }
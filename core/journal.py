@@ -0,0 +1,124 @@
+import os
+import glob
+import json
+import asyncio
+import threading
+from core.persistence import NpEncoder
+
+
+class StateJournal():
+    """
+        UserData 변경 내역 append-only journal (JSON lines)
+        - 한 줄 = [seq, op, args...] 하나의 변경
+        - segment 파일 단위로 기록: {path}.000001, {path}.000002 ...
+        - snapshot 을 뜰 때 rotate() 로 새 segment 로 넘기고,
+          snapshot 저장이 끝나면 prune() 으로 이전 segment 삭제
+        - 시작 시 snapshot 의 journal_seq 이후 기록만 replay
+        - append() 는 줄을 메모리에 쌓기만 하고 파일 쓰기 / fsync 는 thread 에서 수행 (event loop 를 막지 않음)
+            - loop 안에서는 바로 background flush 를 예약, sync() 는 쌓인 줄을 쓰고 fsync 까지 기다림
+            - loop 밖 (replay, 스크립트) 에서는 바로 기록
+    """
+    def __init__(self, path, start_seq=0):
+        self.path = path
+        # segment 가 모두 정리된 뒤에도 seq 는 snapshot 기준점 이후로 이어져야 함
+        self.seq = start_seq
+        # 이전 실행의 마지막 segment 는 잘린 줄로 끝날 수 있으므로 새 segment 에서 시작
+        segments = self.segments()
+        self.segment = segments[-1][0] + 1 if segments else 1
+        for record in self.records():
+            self.seq = max(self.seq, record[0])
+        self._file = None
+        self._file_segment = None
+        self._pending = []
+        self._pruned = 0
+        self._lock = threading.Lock()
+        self._flusher = None
+
+    def segment_path(self, segment):
+        return f'{self.path}.{segment:06d}'
+
+    def segments(self):
+        result = []
+        for name in glob.glob(f'{glob.escape(self.path)}.*'):
+            suffix = name.rsplit('.', 1)[-1]
+            if suffix.isdigit():
+                result.append((int(suffix), name))
+        return sorted(result)
+
+    def records(self, after_seq=0):
+        for _, name in self.segments():
+            with open(name, 'r') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # 종료 직전 잘린 마지막 줄은 버림
+                        break
+                    if record[0] > after_seq:
+                        yield record
+
+    def append(self, op, *args):
+        self.seq += 1
+        line = json.dumps([self.seq, op, *args], cls=NpEncoder, separators=(',', ':')) + '\n'
+        self._pending.append((self.segment, line))
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._write()
+            return
+        if self._flusher is None or self._flusher.done():
+            self._flusher = loop.create_task(self._flush_pending())
+
+    async def _flush_pending(self):
+        while self._pending:
+            await asyncio.to_thread(self._write)
+
+    async def sync(self):
+        # 지금까지 append 한 변경이 디스크에 남을 때까지 대기 (거래 단위)
+        await asyncio.to_thread(self._write, True)
+
+    def _write(self, fsync=False):
+        with self._lock:
+            entries, self._pending = self._pending, []
+            for segment, line in entries:
+                if segment < self._pruned:
+                    # 이미 snapshot 에 포함되어 segment 가 정리됨
+                    continue
+                if self._file_segment != segment:
+                    self._close_file(sync=True)
+                    self._file = open(self.segment_path(segment), 'a')
+                    self._file_segment = segment
+                self._file.write(line)
+            if self._file is not None:
+                self._file.flush()
+                if fsync:
+                    os.fsync(self._file.fileno())
+
+    def _close_file(self, sync=False):
+        if self._file is not None:
+            if sync:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+            self._file_segment = None
+
+    def rotate(self):
+        """현재 seq 를 snapshot 기준점으로 반환하고 다음 기록은 새 segment 에 씀"""
+        # 파일 교체는 다음 _write 에서 (아직 안 쓴 줄은 append 당시 segment 에 기록)
+        self.segment += 1
+        return self.seq, self.segment
+
+    def prune(self, segment):
+        with self._lock:
+            self._pruned = max(self._pruned, segment)
+            if self._file_segment is not None and self._file_segment < segment:
+                self._close_file()
+            for index, name in self.segments():
+                if index < segment:
+                    os.remove(name)
+
+    def close(self):
+        self._write(fsync=True)
+        with self._lock:
+            self._close_file()
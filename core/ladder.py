@@ -0,0 +1,72 @@
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import accumulate
+
+
+def split_by_4(cnt):
+    # 4 단위 분할: 10 -> [4, 4, 2]
+    if cnt <= 0:
+        return []
+    chunks, rest = divmod(cnt, 4)
+    return [4] * chunks + ([rest] if rest else [])
+
+
+@lru_cache(maxsize=1024)
+def rebuild_ladder(belong_vol, buy_vol, max_cnt, prev_positions):
+    """
+        보유 수량 기준 분할 매수 ladder 재계산 (one-way / hedge 공용)
+        - prev_positions 를 단위별로 순회하는 대신 누적합 + bisect 로 잘라낼 위치 계산
+        - 입력이 같으면 결과를 캐시에서 재사용 (prev_positions 는 tuple)
+        - return: (position_list tuple, cnt)
+    """
+    if buy_vol <= 0:
+        return (), 0
+
+    # 실제 보유 수량으로 매수 횟수 재계산
+    real_cnt = int(round(belong_vol / buy_vol))
+    if belong_vol > 0 and real_cnt == 0:
+        real_cnt = 1
+
+    buy_ratio = real_cnt / max_cnt
+
+    if buy_ratio > 0.5:
+        last_qty = real_cnt // 2
+    elif buy_ratio > 0.25:
+        last_qty = real_cnt // 3
+    else:
+        last_qty = 0
+
+    base_cnt = real_cnt - last_qty if last_qty > 0 else real_cnt
+
+    if prev_positions:
+        # prefix[i] = prev_positions[:i + 1] 까지 소진했을 때의 누적 횟수
+        prefix = list(accumulate(max(int(qty), 0) for qty in prev_positions))
+        idx = bisect_right(prefix, base_cnt)
+
+        if base_cnt >= 0 and idx < len(prefix):
+            # idx 번째 묶음 중간에서 base_cnt 도달 -> 앞부분만 사용
+            used = base_cnt - (prefix[idx - 1] if idx > 0 else 0)
+            position_list = list(prev_positions[:idx]) + [used]
+            cum_cnt = base_cnt
+        else:
+            position_list = list(prev_positions)
+            cum_cnt = prefix[-1]
+
+            # 남은 수량 분배
+            remain = base_cnt - cum_cnt
+            if last_qty == 0 and remain > 0:
+                position_list.extend(split_by_4(remain))
+                cum_cnt += remain
+    else:
+        position_list = split_by_4(base_cnt)
+        cum_cnt = base_cnt
+
+    if last_qty > 0:
+        position_list.append(last_qty)
+        cum_cnt += last_qty
+
+    # 반환 cnt 보정
+    if cum_cnt > 0 and cum_cnt * buy_vol < belong_vol:
+        return tuple(position_list), max(real_cnt, int(cum_cnt))
+
+    return tuple(position_list), int(cum_cnt)
@@ -0,0 +1,179 @@
+import time
+import hmac
+import json
+import base64
+import asyncio
+import hashlib
+import logging
+import aiohttp
+
+
+logger = logging.getLogger(__name__)
+
+OKX_PRIVATE_WS = {
+    'live': 'wss://ws.okx.com:8443/ws/v5/private',
+    'demo': 'wss://wspap.okx.com:8443/ws/v5/private?brokerId=9999',
+}
+OKX_PUBLIC_WS = {
+    'live': 'wss://ws.okx.com:8443/ws/v5/public',
+    'demo': 'wss://wspap.okx.com:8443/ws/v5/public?brokerId=9999',
+}
+
+
+class StreamError(Exception):
+    pass
+
+
+def login_args(api_key, secret, passphrase, timestamp=None):
+    # OKX WS 로그인 서명: base64(hmac_sha256(secret, timestamp + 'GET' + '/users/self/verify'))
+    timestamp = str(int(time.time())) if timestamp is None else str(timestamp)
+    digest = hmac.new(
+        secret.encode(),
+        f'{timestamp}GET/users/self/verify'.encode(),
+        hashlib.sha256,
+    ).digest()
+    return {
+        'apiKey': api_key,
+        'passphrase': passphrase,
+        'timestamp': timestamp,
+        'sign': base64.b64encode(digest).decode(),
+    }
+
+
+class OkxStream():
+    """
+        OKX WebSocket 구독
+        - (credentials 가 있으면 login ->) subscribe 후 push 되는 data 를 on_data(channel, data) 로 전달
+        - 연결될 때마다 on_resync() 호출 (끊긴 동안 놓친 변경은 REST 로 복구)
+        - 끊기면 on_disconnect() 호출 후 reconnect_delays 간격으로 재연결
+        - ping_interval 초 동안 수신이 없으면 'ping' 전송, 다음 주기에도 응답 없으면 재연결
+    """
+    def __init__(self, url, subscriptions, on_data, on_resync=None, on_disconnect=None,
+                 ping_interval=25, reconnect_delays=(1, 2, 5, 10, 30), credentials=None):
+        self.url = url
+        self.credentials = credentials
+        self.subscriptions = subscriptions
+        self.on_data = on_data
+        self.on_resync = on_resync
+        self.on_disconnect = on_disconnect
+        self.ping_interval = ping_interval
+        self.reconnect_delays = reconnect_delays
+
+        self.connected = False
+        self.connects = 0
+        self.messages = 0
+        self.last_message_at = 0.0
+        self._closing = False
+        self._task = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._closing = False
+            self._task = asyncio.create_task(self._run())
+        return self._task
+
+    async def close(self):
+        self._closing = True
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        attempt = 0
+        async with aiohttp.ClientSession() as session:
+            while not self._closing:
+                try:
+                    async with session.ws_connect(self.url) as ws:
+                        if self.credentials is not None:
+                            await self._login(ws)
+                        await self._subscribe(ws)
+                        self.connected = True
+                        self.connects += 1
+                        attempt = 0
+                        if self.on_resync is not None:
+                            await self.on_resync()
+                        await self._read(ws)
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    logger.exception('OKX stream error | %s', self.url)
+                finally:
+                    was_connected, self.connected = self.connected, False
+                    if was_connected and self.on_disconnect is not None:
+                        self.on_disconnect()
+
+                if self._closing:
+                    break
+                delay = self.reconnect_delays[min(attempt, len(self.reconnect_delays) - 1)]
+                attempt += 1
+                await asyncio.sleep(delay)
+
+    async def _request(self, ws, op, args, event):
+        await ws.send_json({'op': op, 'args': args})
+        while True:
+            msg = await ws.receive(timeout=self.ping_interval)
+            if msg.type != aiohttp.WSMsgType.TEXT:
+                raise StreamError(f'{op} failed: connection closed')
+            payload = json.loads(msg.data)
+            if payload.get('event') == 'error':
+                raise StreamError(f"{op} failed: {payload.get('code')} {payload.get('msg')}")
+            if payload.get('event') == event:
+                return payload
+
+    async def _login(self, ws):
+        await self._request(ws, 'login', [login_args(*self.credentials)], 'login')
+
+    async def _subscribe(self, ws):
+        await ws.send_json({'op': 'subscribe', 'args': self.subscriptions})
+
+    async def _read(self, ws):
+        waiting_pong = False
+        while True:
+            try:
+                msg = await ws.receive(timeout=self.ping_interval)
+            except asyncio.TimeoutError:
+                if waiting_pong:
+                    raise StreamError('no pong from OKX')
+                waiting_pong = True
+                await ws.send_str('ping')
+                continue
+
+            if msg.type in (aiohttp.WSMsgType.CLOSE, aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                return
+            if msg.type != aiohttp.WSMsgType.TEXT:
+                continue
+
+            waiting_pong = False
+            self.last_message_at = time.monotonic()
+            if msg.data == 'pong':
+                continue
+
+            payload = json.loads(msg.data)
+            if payload.get('event') == 'error':
+                logger.error('OKX stream event error | %s', payload)
+                continue
+            if 'data' not in payload:
+                continue
+
+            self.messages += 1
+            try:
+                await self.on_data(payload['arg']['channel'], payload['data'])
+            except Exception:
+                logger.exception('OKX stream handler failed | %s', payload['arg'])
+
+    def stats(self):
+        return {
+            'connected': self.connected,
+            'connects': self.connects,
+            'messages': self.messages,
+            'idle_sec': round(time.monotonic() - self.last_message_at, 3) if self.last_message_at else None,
+        }
+
+
+class OkxPrivateStream(OkxStream):
+    """
+        OKX private WebSocket (positions / account / orders) - api key 로 login 후 구독
+    """
+    def __init__(self, url, api_key, secret, passphrase, subscriptions, on_data, **kwargs):
+        super().__init__(url, subscriptions, on_data, credentials=(api_key, secret, passphrase), **kwargs)
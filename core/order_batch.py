@@ -0,0 +1,61 @@
+import asyncio
+from contextvars import ContextVar
+
+
+# OKX batch-orders 한 번에 보낼 수 있는 최대 주문 수
+BATCH_ORDER_LIMIT = 20
+
+# batch webhook 처리 중인 task 에서만 설정됨 -> 주문 함수가 바로 보내지 않고 batcher 에 모음
+current_batcher = ContextVar('current_batcher', default=None)
+
+
+class OrderBatcher():
+    """
+        여러 심볼의 주문 계획을 모아 한 번에 전송
+        - participants 개의 planner 가 각자 place() (주문) 또는 leave() (주문 없음 / 실패) 로 도착
+        - 모두 도착하면 모인 주문을 submit(requests) 한 번으로 보내고, 각 planner 에 자기 몫의 결과를 돌려줌
+        - planner 하나는 place() 를 최대 한 번만 호출 (hedge plan 은 한 번에 최대 한 묶음 주문)
+    """
+    def __init__(self, participants, submit):
+        self.participants = participants
+        self.submit = submit
+        self.arrived = set()
+        self.queued = []
+        self.flushed = False
+        self.submitted = 0
+
+    async def place(self, requests):
+        future = asyncio.get_running_loop().create_future()
+        self.queued.append((requests, future))
+        self._arrive()
+        return await future
+
+    def leave(self):
+        self._arrive()
+
+    def _arrive(self):
+        task = asyncio.current_task()
+        if task in self.arrived:
+            return
+        self.arrived.add(task)
+        if len(self.arrived) >= self.participants and not self.flushed:
+            self.flushed = True
+            if self.queued:
+                asyncio.create_task(self._flush())
+
+    async def _flush(self):
+        requests = [request for group, _ in self.queued for request in group]
+        self.submitted = len(requests)
+        try:
+            orders = await self.submit(requests)
+        except Exception as exc:
+            for _, future in self.queued:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        offset = 0
+        for group, future in self.queued:
+            if not future.done():
+                future.set_result(orders[offset:offset + len(group)])
+            offset += len(group)
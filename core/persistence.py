@@ -0,0 +1,114 @@
+import os
+import json
+import asyncio
+import threading
+import numpy as np
+
+
+# 같은 프로세스 안의 모든 StateWriter 가 공유하는 파일 쓰기 lock
+_WRITE_LOCK = threading.Lock()
+
+
+class NpEncoder(json.JSONEncoder):
+    def default(self, obj):
+        if isinstance(obj, np.integer):
+            return int(obj)
+        if isinstance(obj, np.floating):
+            return float(obj)
+        if isinstance(obj, np.ndarray):
+            return obj.tolist()
+        return super(NpEncoder, self).default(obj)
+
+
+def encode_state(data, compact=False):
+    if compact:
+        return json.dumps(data, cls=NpEncoder, separators=(',', ':'))
+    return json.dumps(data, cls=NpEncoder, indent=4)
+
+
+def write_atomic(path, text):
+    """
+        temp 파일에 쓰고 fsync 후 os.replace 로 교체
+        - 쓰는 도중 종료되어도 기존 파일은 깨지지 않음
+    """
+    tmp_path = f'{path}.tmp'
+    with _WRITE_LOCK:
+        with open(tmp_path, 'w') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+
+class StateWriter():
+    """
+        Write-behind 상태 저장
+        - mark_dirty() 는 dirty flag 만 세우고 바로 반환
+        - interval 초가 지나거나 max_mutations 번 변경되면 한 번에 flush
+        - 직렬화는 event loop 에서, 파일 쓰기는 thread 에서 수행
+        - 종료 시 close() 로 남은 변경 flush
+        - after_write 가 있으면 파일 교체가 끝난 뒤 thread 에서 호출
+        - 쓰기에 실패하면 dirty 를 유지해 다음 flush 에서 재시도
+    """
+    def __init__(self, path, dump, interval=5.0, max_mutations=20, compact=False, after_write=None):
+        self.path = path
+        self.dump = dump
+        self.after_write = after_write
+        self.interval = interval
+        self.max_mutations = max_mutations
+        self.compact = compact
+        self.dirty = False
+        self.mutations = 0
+        self.flush_count = 0
+        self._timer = None
+        self._flush_lock = asyncio.Lock()
+
+    def mark_dirty(self):
+        self.dirty = True
+        self.mutations += 1
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # loop 밖에서는 예약하지 않고 다음 flush / close 에 맡김
+            return
+
+        if self.mutations >= self.max_mutations:
+            self._cancel_timer()
+            self._timer = loop.create_task(self.flush())
+        elif self._timer is None or self._timer.done():
+            self._timer = loop.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.interval)
+        await self.flush()
+
+    def _cancel_timer(self):
+        if self._timer is not None and not self._timer.done() and self._timer is not asyncio.current_task():
+            self._timer.cancel()
+        self._timer = None
+
+    async def flush(self):
+        async with self._flush_lock:
+            if not self.dirty:
+                return False
+            text = encode_state(self.dump(), self.compact)
+            mutations = self.mutations
+            # 쓰는 동안 들어온 변경은 다시 dirty 로 남도록 먼저 내림
+            self.dirty = False
+            self.mutations = 0
+            try:
+                await asyncio.to_thread(write_atomic, self.path, text)
+            except BaseException:
+                # 실패한 상태는 버리지 않고 다음 flush / close 에서 다시 씀
+                self.dirty = True
+                self.mutations += mutations
+                raise
+            self.flush_count += 1
+            if self.after_write is not None:
+                await asyncio.to_thread(self.after_write)
+            return True
+
+    async def close(self):
+        self._cancel_timer()
+        return await self.flush()
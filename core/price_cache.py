@@ -0,0 +1,56 @@
+import time
+import asyncio
+
+
+class PriceCache():
+    """
+        심볼별 최신 가격 캐시
+        - public ticker WebSocket push 로 update()
+        - max_age 보다 오래됐거나 값이 없으면 loader(REST) 로 한 번만 조회 (심볼별 single-flight)
+        - get() 은 (price, age, source) 반환 -> 주문 판단 시 가격 나이 기록용
+    """
+    def __init__(self, max_age=5.0):
+        self.max_age = max_age
+        self._prices = {}
+        self._locks = {}
+        self.ws_updates = 0
+        self.rest_loads = 0
+
+    def update(self, symbol, price, source='ws'):
+        self._prices[symbol] = (float(price), time.monotonic(), source)
+        if source == 'ws':
+            self.ws_updates += 1
+
+    def peek(self, symbol):
+        entry = self._prices.get(symbol)
+        if entry is None:
+            return None
+        price, updated_at, source = entry
+        return price, time.monotonic() - updated_at, source
+
+    async def get(self, symbol, loader):
+        entry = self.peek(symbol)
+        if entry is not None and entry[1] < self.max_age:
+            return entry
+
+        lock = self._locks.setdefault(symbol, asyncio.Lock())
+        async with lock:
+            entry = self.peek(symbol)
+            if entry is not None and entry[1] < self.max_age:
+                return entry
+
+            price = await loader()
+            self.rest_loads += 1
+            self.update(symbol, price, source='rest')
+            return self.peek(symbol)
+
+    def stats(self):
+        prices = {}
+        for symbol in self._prices:
+            price, age, source = self.peek(symbol)
+            prices[symbol] = {'price': price, 'age_ms': round(age * 1000, 1), 'source': source}
+        return {
+            'prices': prices,
+            'ws_updates': self.ws_updates,
+            'rest_loads': self.rest_loads,
+        }
@@ -0,0 +1,140 @@
+import time
+import heapq
+import asyncio
+import itertools
+
+
+# 같은 endpoint 분류 안에서 숫자가 작을수록 먼저 토큰을 받음
+PRIORITY_ORDER = 0
+PRIORITY_POLL = 1
+PRIORITY_READ = 2
+
+# OKX REST 제한 (요청 수 / 2초) 보다 조금 낮게 잡은 기본값: (초당 토큰, 최대 burst)
+DEFAULT_LIMITS = {
+    'trade': (20.0, 40),    # 주문 / 주문 조회 (place order 60/2s, order details 60/2s)
+    'account': (4.0, 8),    # 포지션 / 잔고 / 레버리지 (positions 10/2s, balance 10/2s)
+    'public': (8.0, 16),    # ticker / 캔들 / 마켓 정보 (tickers 20/2s)
+}
+
+
+class TokenBucket():
+    """
+        endpoint 분류 하나의 token bucket
+        - 토큰이 있고 대기열이 비어 있으면 바로 통과
+        - 아니면 (priority, 도착 순서) heap 에 넣고 토큰이 찰 때마다 우선순위 순으로 깨움
+        - 429 를 받으면 penalize() 로 토큰을 비워 잠시 쉬어감
+    """
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+        self._waiters = []
+        self._seq = itertools.count()
+        self._drainer = None
+
+        self.requests = 0
+        self.delayed = 0
+        self.throttled = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def configure(self, rate, burst):
+        self._refill()
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.tokens = min(self.tokens, self.burst)
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def _record(self, wait):
+        self.requests += 1
+        if wait > 0:
+            self.delayed += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    async def acquire(self, priority=PRIORITY_READ):
+        self._refill()
+        if not self._waiters and self.tokens >= 1:
+            self.tokens -= 1
+            self._record(0.0)
+            return 0.0
+
+        started_at = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        if self._drainer is None or self._drainer.done():
+            self._drainer = asyncio.create_task(self._drain())
+        await future
+
+        wait = time.monotonic() - started_at
+        self._record(wait)
+        return wait
+
+    async def _drain(self):
+        while self._waiters:
+            self._refill()
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                continue
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                # 대기 중 취소된 요청은 토큰을 쓰지 않음
+                continue
+            self.tokens -= 1
+            future.set_result(None)
+
+    def penalize(self):
+        self._refill()
+        self.throttled += 1
+        self.tokens = 0.0
+
+    def stats(self):
+        self._refill()
+        return {
+            'rate': self.rate,
+            'burst': self.burst,
+            'tokens': round(self.tokens, 2),
+            'queued': len(self._waiters),
+            'requests': self.requests,
+            'delayed': self.delayed,
+            'throttled': self.throttled,
+            'avg_wait_ms': round(self.total_wait / self.delayed * 1000, 1) if self.delayed else 0.0,
+            'max_wait_ms': round(self.max_wait * 1000, 1),
+        }
+
+
+class RequestScheduler():
+    """
+        거래소 REST 호출용 endpoint 분류(trade / account / public) 별 token bucket 묶음
+        - ccxt 클라이언트 밖에 있으므로 reset_api 로 클라이언트를 새로 만들어도 상태 유지
+        - 같은 분류 안에서는 주문 > 체결 조회 > 조회성 요청 순으로 토큰 배분
+    """
+    def __init__(self, limits=None):
+        self.buckets = {}
+        self.configure(limits or DEFAULT_LIMITS)
+
+    def configure(self, limits):
+        for endpoint, (rate, burst) in limits.items():
+            if endpoint in self.buckets:
+                self.buckets[endpoint].configure(rate, burst)
+            else:
+                self.buckets[endpoint] = TokenBucket(rate, burst)
+
+    async def acquire(self, endpoint, priority=PRIORITY_READ):
+        return await self.buckets[endpoint].acquire(priority)
+
+    def penalize(self, endpoint):
+        self.buckets[endpoint].penalize()
+
+    def stats(self):
+        return {endpoint: bucket.stats() for endpoint, bucket in self.buckets.items()}
+
+
+# 같은 프로세스 안의 Bot 인스턴스끼리만 공유
+# main.py / open_pos.py / close_pos.py 는 각자 별도 프로세스라 bucket 도 따로 가짐 (OKX 한도는 API key 단위로 합산됨)
+SCHEDULER = RequestScheduler()
@@ -0,0 +1,60 @@
+class PositionReconciler():
+    """
+        포지션 변경 감지 (update_positions 용)
+        - 거래소 payload 의 side / contracts / entryPrice / 갱신 시각 + 수량 계산에 쓰는 설정값으로 fingerprint 생성
+        - 직전 cycle 과 fingerprint 가 같으면 해당 심볼 재계산 생략
+        - 주문이 나간 심볼은 invalidate() 로 다음 cycle 에 강제 재계산
+        - cycle 마다 실제로 갱신한 심볼 수 기록
+    """
+    def __init__(self):
+        self.fingerprints = {}
+        self.cycles = 0
+        self.last_symbols = 0
+        self.last_touched = 0
+        self.total_touched = 0
+
+    @staticmethod
+    def group(positions):
+        groups = {}
+        for pos in positions:
+            groups.setdefault(pos.get('symbol'), []).append(pos)
+        return groups
+
+    @staticmethod
+    def fingerprint(positions, params=()):
+        rows = []
+        for pos in positions:
+            info = pos.get('info') or {}
+            rows.append((
+                str(pos.get('side') or info.get('posSide')),
+                str(pos.get('contracts')),
+                str(pos.get('entryPrice')),
+                str(pos.get('timestamp') or info.get('uTime')),
+            ))
+        return tuple(sorted(rows)), tuple(params)
+
+    def changed(self, key, fingerprint):
+        return self.fingerprints.get(key) != fingerprint
+
+    def commit(self, key, fingerprint):
+        self.fingerprints[key] = fingerprint
+
+    def invalidate(self, key=None):
+        if key is None:
+            self.fingerprints.clear()
+        else:
+            self.fingerprints.pop(key, None)
+
+    def finish_cycle(self, n_symbols, touched):
+        self.cycles += 1
+        self.last_symbols = n_symbols
+        self.last_touched = touched
+        self.total_touched += touched
+
+    def stats(self):
+        return {
+            'cycles': self.cycles,
+            'symbols': self.last_symbols,
+            'touched': self.last_touched,
+            'total_touched': self.total_touched,
+        }
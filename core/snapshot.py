@@ -0,0 +1,90 @@
+import time
+import asyncio
+
+
+class ExchangeSnapshot():
+    """
+        거래소 조회 결과 캐시
+        - fetch_positions / fetch_balance 결과를 짧은 TTL 동안 공유
+        - 같은 key 를 동시에 요청하면 REST 호출은 한 번만 수행
+        - 주문 후 invalidate() 로 즉시 무효화
+        - put() 으로 WebSocket push 값을 직접 넣을 수 있음 (ttl 별도 지정)
+        - get() 도 ttl 을 지정하면 조회 결과를 그 ttl 로 보관 (stream 연결 중 REST 재조회)
+        - 조회 중에 invalidate() / put() 이 들어오면 그 조회 결과는 캐시하지 않음 (key 별 generation 비교)
+    """
+    def __init__(self, ttl=2.0):
+        self.ttl = ttl
+        self._entries = {}
+        self._locks = {}
+        self._generations = {}
+        self._epoch = 0
+        self.request_count = {}
+        self.hit_count = {}
+
+    def _generation(self, key):
+        return self._epoch, self._generations.get(key, 0)
+
+    def _bump(self, key):
+        self._generations[key] = self._generations.get(key, 0) + 1
+
+    def _fresh(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        fetched_at, value, ttl = entry
+        if time.monotonic() - fetched_at >= ttl:
+            return None
+        return entry
+
+    async def get(self, key, loader, ttl=None):
+        entry = self._fresh(key)
+        if entry is not None:
+            self.hit_count[key] = self.hit_count.get(key, 0) + 1
+            return entry[1]
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            # 대기 중 다른 코루틴이 이미 갱신했을 수 있음
+            entry = self._fresh(key)
+            if entry is not None:
+                self.hit_count[key] = self.hit_count.get(key, 0) + 1
+                return entry[1]
+
+            generation = self._generation(key)
+            value = await loader()
+            # 조회 중 주문(invalidate) / WS push(put) 가 있었으면 조회 결과는 이미 오래된 값
+            if self._generation(key) == generation:
+                self._entries[key] = (time.monotonic(), value, self.ttl if ttl is None else ttl)
+            self.request_count[key] = self.request_count.get(key, 0) + 1
+            return value
+
+    def put(self, key, value, ttl=None):
+        self._bump(key)
+        self._entries[key] = (time.monotonic(), value, self.ttl if ttl is None else ttl)
+
+    def age(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        return time.monotonic() - entry[0]
+
+    def invalidate(self, *keys):
+        if not keys:
+            self._epoch += 1
+            self._entries.clear()
+            return
+        for key in keys:
+            self._bump(key)
+            self._entries.pop(key, None)
+
+    def total_requests(self):
+        return sum(self.request_count.values())
+
+    def stats(self):
+        return {
+            key: {
+                'requests': self.request_count.get(key, 0),
+                'hits': self.hit_count.get(key, 0),
+            }
+            for key in set(self.request_count) | set(self.hit_count)
+        }
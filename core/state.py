@@ -0,0 +1,95 @@
+from dataclasses import dataclass, field, fields
+
+
+@dataclass(slots=True)
+class SideState():
+    """
+        hedge 모드 방향(long / short) 별 포지션 상태
+    """
+    amt: float = 0
+    buy_cnt: int = 0
+    avg_buy_price: float = 0
+    position_list: list = field(default_factory=list)
+    buy_time: int = 0
+    sell_time: int = 0
+
+    def __getitem__(self, key):
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        setattr(self, key, value)
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in SIDE_FIELDS}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{k: v for k, v in data.items() if k in SIDE_FIELDS})
+
+
+@dataclass(slots=True)
+class SymbolState():
+    """
+        코인 별 설정(TRADE_OPTION) + 포지션 상태
+        - 자주 쓰는 값은 typed field 로 바로 접근 (state.round_num)
+        - state['key'] 로 기존 dict 방식 접근도 지원
+        - field 에 없는 설정 값은 extra 에 보관
+    """
+    leverage: float = 1
+    min_vol: float = 0
+    vol_mul: float = 1
+    precision: int = 2
+    map_vol: float = 1
+    round_num: int = 4
+    new_buy_roe: float = 0
+    use_short: bool = False
+    go_trade: bool = True
+
+    position: str = None
+    amt: float = 0
+    buy_cnt: int = 0
+    max_buy_cnt: int = 500
+    avg_buy_price: float = 0
+    position_list: list = field(default_factory=list)
+    buy_time: int = 0
+    sell_time: int = 0
+    short_signal_count: int = 0
+    positions: dict = field(default_factory=lambda: {'long': SideState(), 'short': SideState()})
+    extra: dict = field(default_factory=dict)
+
+    def __contains__(self, key):
+        return key in _SYMBOL_FIELD_SET or key in self.extra
+
+    def __getitem__(self, key):
+        if key in _SYMBOL_FIELD_SET:
+            return getattr(self, key)
+        return self.extra[key]
+
+    def __setitem__(self, key, value):
+        if key == 'positions':
+            value = {
+                side: side_state if isinstance(side_state, SideState) else SideState.from_dict(side_state)
+                for side, side_state in value.items()
+            }
+        if key in _SYMBOL_FIELD_SET:
+            setattr(self, key, value)
+        else:
+            self.extra[key] = value
+
+    def to_dict(self):
+        data = {name: getattr(self, name) for name in SYMBOL_FIELDS}
+        data['positions'] = {side: side_state.to_dict() for side, side_state in self.positions.items()}
+        data.update(self.extra)
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls()
+        for key, value in data.items():
+            state[key] = value
+        return state
+
+
+SIDE_FIELDS = tuple(f.name for f in fields(SideState))
+SYMBOL_FIELDS = tuple(f.name for f in fields(SymbolState) if f.name != 'extra')
+_SYMBOL_FIELD_SET = frozenset(SYMBOL_FIELDS)
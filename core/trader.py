@@ -1,11 +1,13 @@
 import os
 import json
+import uuid
 import aiofiles
 import time
 import random
 import copy
 import asyncio
 import ccxt
+import ccxt.async_support as ccxt_async
 import numpy as np
 from pytz import timezone
 from datetime import datetime
@@ -13,7 +15,15 @@ import pandas as pd
 import traceback
 import telegram
 import asyncio
+from collections import OrderedDict
 from core.user import UserData
+from core.snapshot import ExchangeSnapshot
+from core.reconcile import PositionReconciler
+from core.okx_stream import OKX_PRIVATE_WS, OKX_PUBLIC_WS, OkxStream, OkxPrivateStream
+from core.price_cache import PriceCache
+from core.exchange import ExchangeSession
+from core.ratelimit import SCHEDULER, PRIORITY_ORDER, PRIORITY_POLL, PRIORITY_READ
+from core.order_batch import BATCH_ORDER_LIMIT, OrderBatcher, current_batcher
 
 
 
@@ -23,31 +33,93 @@ class Bot():
         - ccxt 기반 주문, 계좌 정보 조회
         - Telegram을 통한 주문 기록 및 현재 상태 조회
     """
+    # 거래소 REST 호출 제한은 클라이언트가 아니라 프로세스 단위로 공유 (다른 프로세스와는 공유하지 않음)
+    scheduler = SCHEDULER
+
     def __init__(self):
         self.telegram_chk = False
         self.msgbot = None
         self.setup()
 
-    def setup_api(self):
-        self.api = ccxt.okx({
+    def build_api(self):
+        api = ccxt_async.okx({
                     'apiKey': self.trader.config['OKX']['API'],
                     'secret': self.trader.config['OKX']['SECRET_KEY'],
                     'password': self.trader.config['OKX']['PASSWD'],
-                    'enableRateLimit': True, # required https://github.com/ccxt/ccxt/wiki/Manual#rate-limit
+                    # 호출 간격은 RequestScheduler 가 endpoint 분류별로 조절 (ccxt 의 클라이언트 단위 throttle 대신)
+                    'enableRateLimit': False,
                     'timeout': 30000,
                     'options': {
                         'defaultType': 'swap',
                         "adjustForTimeDifference": True
                     },})
-        if self.trader.get_environment() == 'demo' and hasattr(self.api, 'set_sandbox_mode'):
-            self.api.set_sandbox_mode(True)
+        if self.trader.get_environment() == 'demo' and hasattr(api, 'set_sandbox_mode'):
+            api.set_sandbox_mode(True)
+        return api
+
+    def setup_api(self):
+        self.exchange = ExchangeSession(
+            self.build_api,
+            scheduler=self.scheduler,
+            **self.trader.get_exchange_config(),
+        )
+
+    @property
+    def api(self):
+        return self.exchange.client
+
+    @api.setter
+    def api(self, client):
+        exchange = self.__dict__.get('exchange')
+        if exchange is None:
+            self.exchange = ExchangeSession(client=client, scheduler=self.scheduler)
+        else:
+            exchange.client = client
+
+    async def close_api(self):
+        # async ccxt 클라이언트는 내부 aiohttp 세션을 직접 닫아야 함
+        exchange = self.__dict__.get('exchange')
+        if exchange is not None:
+            await exchange.close()
+
+    async def reset_api(self):
+        # 환경(live / demo) 설정을 바꾼 뒤에만 사용 - 에러 처리에서는 클라이언트를 그대로 재사용
+        config = self.trader.get_exchange_config()
+        await self.exchange.restart(markets_cache=config['markets_cache'], cache_key=config['cache_key'])
+
+    async def request(self, endpoint, method, *args, priority=PRIORITY_READ, idempotent=True, **kwargs):
+        """
+            모든 거래소 REST 호출은 여기를 거침 (ExchangeSession.call)
+            - endpoint: 'trade' / 'account' / 'public' (token bucket 분류)
+            - idempotent=False (주문) 는 네트워크 에러가 나도 재전송하지 않음
+        """
+        return await self.exchange.call(endpoint, method, *args, priority=priority, idempotent=idempotent, **kwargs)
 
     def setup(self):
         self.trader = UserData()
+        self.scheduler.configure(self.trader.get_rate_limit_config())
+        self.snapshot = ExchangeSnapshot(ttl=self.trader.get_snapshot_ttl())
+        self.reconciler = PositionReconciler()
         self.setup_api()
         self.go_trade = True
         self.timeframe = '15m'
         self.req_data_cnt = 300
+        # 체결 확인 재조회 간격 (초)
+        self.fill_poll_delays = (0.2, 0.4, 0.8, 1.6, 3.2)
+        self.symbol_locks = {}
+        # private WebSocket 으로 받은 포지션 / 주문 상태
+        self.stream = None
+        self.stream_config = self.trader.get_stream_config()
+        self.stream_positions = {}
+        self.stream_orders = OrderedDict()
+        # orders push 가 올 때마다 set 후 새 Event 로 교체 -> 체결 대기 중인 코루틴을 깨움
+        self.order_event = asyncio.Event()
+        self.last_resync = 0.0
+        self._stream_reconcile_task = None
+        # public ticker WebSocket 으로 받은 최신 가격 (없거나 오래되면 REST)
+        self.price_stream = None
+        self.prices = PriceCache(max_age=self.stream_config['price_max_age'])
+        self.price_decisions = {}
 
     def set_msgbot(self, msg_bot):
         # pip install "python-telegram-bot==20.3"
@@ -59,32 +131,32 @@ class Bot():
         if desired_mode != 'hedge':
             return
 
-        current_mode = self.get_exchange_position_mode()
+        current_mode = await self.get_exchange_position_mode()
         if current_mode == 'long_short_mode':
             return
 
         try:
             if hasattr(self.api, 'set_position_mode'):
-                self.api.set_position_mode(True)
+                await self.request('account', 'set_position_mode', True)
             elif hasattr(self.api, 'setPositionMode'):
-                self.api.setPositionMode(True)
+                await self.request('account', 'setPositionMode', True)
             elif hasattr(self.api, 'private_post_account_set_position_mode'):
-                self.api.private_post_account_set_position_mode({'posMode': 'long_short_mode'})
+                await self.request('account', 'private_post_account_set_position_mode', {'posMode': 'long_short_mode'})
             elif hasattr(self.api, 'privatePostAccountSetPositionMode'):
-                self.api.privatePostAccountSetPositionMode({'posMode': 'long_short_mode'})
+                await self.request('account', 'privatePostAccountSetPositionMode', {'posMode': 'long_short_mode'})
             else:
                 raise RuntimeError('OKX position mode API is not available in ccxt client')
         except Exception as exc:
             raise RuntimeError(f'Failed to enable hedge mode on OKX: {exc}') from exc
 
-        current_mode = self.get_exchange_position_mode()
+        current_mode = await self.get_exchange_position_mode()
         if current_mode != 'long_short_mode':
             raise RuntimeError(f'OKX hedge mode verification failed: {current_mode}')
 
-    def get_exchange_position_mode(self):
+    async def get_exchange_position_mode(self):
         try:
             if hasattr(self.api, 'fetch_position_mode'):
-                mode = self.api.fetch_position_mode()
+                mode = await self.request('account', 'fetch_position_mode')
                 if isinstance(mode, dict):
                     hedged = mode.get('hedged')
                     if hedged is True:
@@ -92,7 +164,7 @@ class Bot():
                     if hedged is False:
                         return 'net_mode'
             if hasattr(self.api, 'fetchPositionMode'):
-                mode = self.api.fetchPositionMode()
+                mode = await self.request('account', 'fetchPositionMode')
                 if isinstance(mode, dict):
                     hedged = mode.get('hedged')
                     if hedged is True:
@@ -100,9 +172,9 @@ class Bot():
                     if hedged is False:
                         return 'net_mode'
             if hasattr(self.api, 'private_get_account_config'):
-                resp = self.api.private_get_account_config()
+                resp = await self.request('account', 'private_get_account_config')
             elif hasattr(self.api, 'privateGetAccountConfig'):
-                resp = self.api.privateGetAccountConfig()
+                resp = await self.request('account', 'privateGetAccountConfig')
             else:
                 return None
             data = resp.get('data', [])
@@ -279,7 +351,7 @@ class Bot():
         ]
         return '\n'.join(lines)
 
-    async def market_order_hedge(self, target_symbol, position_side, action, vol=0, margin_mode='cross'):
+    def hedge_order_request(self, target_symbol, position_side, action, vol=0, margin_mode='cross'):
         if margin_mode == 'cross':
             params = {"tdMode": "cross", "mgnMode": "cross", "posSide": position_side}
         else:
@@ -292,16 +364,96 @@ class Bot():
         else:
             raise ValueError(f'Unknown hedge action: {action}')
 
+        return {
+            'symbol': target_symbol,
+            'amount': vol,
+            'type': 'market',
+            'side': side,
+            'params': params,
+        }
+
+    async def market_order_hedge(self, target_symbol, position_side, action, vol=0, margin_mode='cross'):
+        request = self.hedge_order_request(target_symbol, position_side, action, vol=vol, margin_mode=margin_mode)
+
         print(f'HEDGE {action.upper()} {position_side.upper()}', target_symbol)
         print()
 
-        return self.api.create_order(
-            symbol=target_symbol,
-            amount=vol,
-            type='market',
-            side=side,
-            params=params,
-        )
+        batcher = current_batcher.get()
+        if batcher is None:
+            return await self.create_order(**request)
+
+        # batch webhook 처리 중이면 다른 심볼 주문과 함께 전송
+        order = (await batcher.place([request]))[0]
+        if order is None or order.get('status') == 'rejected' or not order.get('id'):
+            raise self.rejected_order_error(order)
+        return order
+
+    def rejected_order_error(self, order):
+        # batch 로 보낸 단일 주문이 거부되면 create_order 와 같은 ccxt 예외로 변환
+        info = (order or {}).get('info', {})
+        exact = getattr(self.api, 'exceptions', {}).get('exact', {})
+        error = exact.get(info.get('sCode'))
+        if not (isinstance(error, type) and issubclass(error, (ccxt.InvalidOrder, ccxt.InsufficientFunds))):
+            error = ccxt.InvalidOrder
+        return error(f"{info.get('sCode')} {info.get('sMsg')}")
+
+    async def create_orders(self, requests):
+        """
+            여러 주문을 OKX batch-orders 로 한 번에 전송
+            - 각 leg 에 clOrdId 를 붙여 응답을 요청 순서대로 다시 매핑
+            - 거부된 leg 는 status 'rejected' 로 돌아옴
+        """
+        if not self.api.has.get('createOrders'):
+            return [await self.create_order(**request) for request in requests]
+
+        results = []
+        # OKX batch-orders 는 한 번에 최대 BATCH_ORDER_LIMIT 개
+        for start in range(0, len(requests), BATCH_ORDER_LIMIT):
+            results.extend(await self.create_order_chunk(requests[start:start + BATCH_ORDER_LIMIT]))
+        return results
+
+    async def create_order_chunk(self, requests):
+        requests = [
+            {**request, 'params': {**request.get('params', {}), 'clOrdId': uuid.uuid4().hex}}
+            for request in requests
+        ]
+        try:
+            orders = await self.request('trade', 'create_orders', requests, priority=PRIORITY_ORDER, idempotent=False)
+        finally:
+            self.snapshot.invalidate()
+            for request in requests:
+                self.reconciler.invalidate(request['symbol'])
+
+        by_client_id = {order.get('clientOrderId'): order for order in orders}
+        return [
+            by_client_id.get(request['params']['clOrdId'], orders[i] if i < len(orders) else None)
+            for i, request in enumerate(requests)
+        ]
+
+    async def market_order_hedge_batch(self, legs):
+        # legs: [(target_symbol, position_side, action, vol), ...] -> 주문 결과 (거부된 leg 는 None)
+        for target_symbol, position_side, action, _ in legs:
+            print(f'HEDGE BATCH {action.upper()} {position_side.upper()}', target_symbol)
+        print()
+
+        requests = [
+            self.hedge_order_request(target_symbol, position_side, action, vol=vol)
+            for target_symbol, position_side, action, vol in legs
+        ]
+        batcher = current_batcher.get()
+        if batcher is None:
+            orders = await self.create_orders(requests)
+        else:
+            orders = await batcher.place(requests)
+
+        results = []
+        for leg, order in zip(legs, orders):
+            if order is None or order.get('status') == 'rejected' or not order.get('id'):
+                info = (order or {}).get('info', {})
+                print('Batch leg rejected', leg, info.get('sCode'), info.get('sMsg'))
+                order = None
+            results.append(order)
+        return results
 
     def get_side_metrics(self, positions, target_symbol):
         result = {
@@ -327,19 +479,23 @@ class Bot():
 
     # ========== OKX API ===================
     async def fetch_market_info(self):
-        return self.api.fetch_markets()
+        return await self.request('public', 'fetch_markets')
 
     async def get_data(self, target_symbol):
-        data = self.api.fetch_ohlcv(symbol=target_symbol,
-                                    timeframe=self.timeframe,
-                                    limit=self.req_data_cnt)
+        data = await self.request('public', 'fetch_ohlcv',
+                                  symbol=target_symbol,
+                                  timeframe=self.timeframe,
+                                  limit=self.req_data_cnt)
 
         data = pd.DataFrame(data, columns=['ts', 'open', 'high', 'low', 'close', 'volume'])
         
         return data
 
+    async def fetch_balance(self):
+        return await self.snapshot.get('balance', lambda: self.request('account', 'fetch_balance'), ttl=self.snapshot_ttl())
+
     async def get_balance(self):
-        d = self.api.fetch_balance()
+        d = await self.fetch_balance()
         total_balance = float(d['USDT']['free'])
 
         return total_balance
@@ -348,7 +504,7 @@ class Bot():
         return self.balance
 
     async def get_balance_info(self):
-        d = self.api.fetch_balance()
+        d = await self.fetch_balance()
         d2 = d['info']['data'][0]['details'][0]
 
         total_sum = float(d2['cashBal'])
@@ -357,8 +513,124 @@ class Bot():
 
         return total_sum, cur_balance, unpnl
 
+    async def create_order(self, **kwargs):
+        try:
+            return await self.request('trade', 'create_order', priority=PRIORITY_ORDER, idempotent=False, **kwargs)
+        finally:
+            # 주문 이후 포지션/잔고 캐시는 더 이상 유효하지 않음
+            self.snapshot.invalidate()
+            self.reconciler.invalidate(kwargs.get('symbol'))
+
     async def fetch_order(self, target_symbol, order_id):
-        return self.api.fetch_order(order_id, target_symbol)
+        return await self.request('trade', 'fetch_order', order_id, target_symbol, priority=PRIORITY_POLL)
+
+    def get_order_fill(self, order):
+        # create_order / fetch_order 응답에서 체결 가격과 수량을 추출, 미체결이면 None
+        if not order or order.get('status') != 'closed':
+            return None
+
+        price = float(order.get('average') or order.get('price') or 0)
+        amount = float(order.get('filled') or order.get('amount') or 0)
+        if price <= 0 or amount <= 0:
+            return None
+
+        fill = dict(order)
+        fill['price'] = price
+        fill['amount'] = amount
+        return fill
+
+    async def confirm_fill(self, target_symbol, order):
+        return (await self.confirm_fills([(target_symbol, order)]))[0]
+
+    def get_stream_fill(self, order_id):
+        # orders 채널로 push 된 주문 상태에서 체결 정보 추출
+        row = self.stream_orders.get(order_id)
+        if row is None or row.get('state') != 'filled':
+            return None
+        return self.get_order_fill(self.api.parse_order(row))
+
+    async def confirm_fills(self, orders):
+        """
+            주문 목록의 체결 정보 확인 - [(target_symbol, order), ...] 와 같은 순서로 반환
+            1) create_order 응답에 체결 정보가 있으면 그대로 사용
+            2) orders 채널 push 를 backoff 간격만큼 기다려 확인
+            3) 그래도 남은 주문만 심볼별로 묶어서 REST 조회
+            - 끝까지 체결을 확인하지 못한 주문은 None (호출자가 거래소 포지션으로 재계산)
+        """
+        results = [
+            self.get_order_fill(order) or self.get_stream_fill(order['id'])
+            for _, order in orders
+        ]
+        last_seen = {i: order for i, (_, order) in enumerate(orders)}
+        pending = [i for i, fill in enumerate(results) if fill is None]
+
+        for delay in self.fill_poll_delays:
+            if not pending:
+                break
+
+            event = self.order_event
+            try:
+                await asyncio.wait_for(event.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+            for i in pending:
+                results[i] = self.get_stream_fill(orders[i][1]['id'])
+            pending = [i for i in pending if results[i] is None]
+            if not pending:
+                break
+
+            by_symbol = {}
+            for i in pending:
+                by_symbol.setdefault(orders[i][0], []).append(i)
+            fetched = await asyncio.gather(*(
+                self.fetch_orders_by_id(target_symbol, [orders[i][1]['id'] for i in indexes])
+                for target_symbol, indexes in by_symbol.items()
+            ))
+            for indexes, order_map in zip(by_symbol.values(), fetched):
+                for i in indexes:
+                    order_info = order_map.get(orders[i][1]['id'])
+                    if order_info is not None:
+                        last_seen[i] = order_info
+                        results[i] = self.get_order_fill(order_info)
+            pending = [i for i in pending if results[i] is None]
+
+        for i in pending:
+            target_symbol, order = orders[i]
+            print('Fill confirmation timeout', target_symbol, order['id'], last_seen[i].get('status'))
+            results[i] = None
+
+        return results
+
+    def unconfirmed_fill_msg(self, target_symbol, order):
+        # 체결 확인 실패: 로컬 상태는 건드리지 않고 거래소 포지션 기준으로 다시 계산하도록 캐시 무효화
+        self.snapshot.invalidate('positions', 'balance')
+        self.reconciler.invalidate(target_symbol)
+        now_str = datetime.now(timezone('Asia/Seoul')).strftime("%m/%d/%Y, %H:%M:%S")
+        return (
+            f"현재 시간 : {now_str}\n"
+            f"[체결 미확인 - {target_symbol.split('/')[0].upper()}] 주문 ID : {order.get('id')}\n"
+            f"거래소 포지션 기준으로 상태를 다시 계산합니다.\n"
+        )
+
+    async def fetch_orders_by_id(self, target_symbol, order_ids):
+        # 한 심볼의 미확인 주문이 여러 개면 체결 내역을 한 번에 조회하고, 빠진 주문만 개별 조회
+        order_map = {}
+        if len(order_ids) > 1:
+            closed_orders = await self.request(
+                'trade', 'fetch_closed_orders', target_symbol,
+                limit=max(len(order_ids), 20), priority=PRIORITY_POLL,
+            )
+            for order_info in closed_orders:
+                if order_info.get('id') in order_ids:
+                    order_map[order_info['id']] = order_info
+
+        missing = [order_id for order_id in order_ids if order_id not in order_map]
+        for order_id, order_info in zip(missing, await asyncio.gather(*(
+            self.fetch_order(target_symbol, order_id) for order_id in missing
+        ))):
+            order_map[order_id] = order_info
+        return order_map
 
     async def market_order(self, target_symbol, position='long', vol=0, trade_type='buy', margin_mode='cross'):
         if margin_mode == 'cross':
@@ -371,51 +643,200 @@ class Bot():
                 print('BUY LONG OPEN', target_symbol)
                 print()
 
-                return self.api.create_order(symbol=target_symbol,
-                                            amount=vol,
-                                            type='market',
-                                            side='buy',
-                                            params=params
-                                            )
+                return await self.create_order(symbol=target_symbol,
+                                               amount=vol,
+                                               type='market',
+                                               side='buy',
+                                               params=params
+                                               )
             elif position == 'short':
                 print('BUY SHORT OPEN', target_symbol)
                 print()
 
-                return self.api.create_order(symbol=target_symbol,
-                                            amount=vol,
-                                            type='market',
-                                            side='sell',
-                                            params=params
-                                            )
+                return await self.create_order(symbol=target_symbol,
+                                               amount=vol,
+                                               type='market',
+                                               side='sell',
+                                               params=params
+                                               )
 
         elif trade_type == 'sell':
             if position == 'short':
                 print('SELL SHORT CLOSE', target_symbol)
                 print()
                 
-                return self.api.create_order(symbol=target_symbol,
-                                            amount=vol,
-                                            type='market',
-                                            side='buy',
-                                            params=params
-                                            )
+                return await self.create_order(symbol=target_symbol,
+                                               amount=vol,
+                                               type='market',
+                                               side='buy',
+                                               params=params
+                                               )
             elif position == 'long':
                 print('SELL LONG CLOSE', target_symbol)
                 print()
 
-                return self.api.create_order(symbol=target_symbol,
-                                            amount=vol,
-                                            type='market',
-                                            side='sell',
-                                            params=params
-                                            )
+                return await self.create_order(symbol=target_symbol,
+                                               amount=vol,
+                                               type='market',
+                                               side='sell',
+                                               params=params
+                                               )
                 
     async def fetch_positions(self):
-        positions = self.api.fetch_positions()
+        positions = await self.snapshot.get('positions', self.load_positions, ttl=self.snapshot_ttl())
         indexed = self.api.index_by(positions, 'contracts')
 
         return positions, indexed
 
+    async def load_positions(self):
+        # REST 조회 결과로 stream 포지션 상태도 함께 맞춤
+        positions = await self.request('account', 'fetch_positions')
+        self.stream_positions = {self.position_key(pos['info']): pos for pos in positions}
+        return positions
+
+    def position_key(self, raw):
+        return raw.get('instId'), raw.get('posSide')
+
+    # ==============================
+    # OKX private WebSocket
+    # ==============================
+    async def start_stream(self):
+        if not self.stream_config['enabled'] or self.stream is not None:
+            return
+        await self.exchange.load_markets()
+        self.stream = OkxPrivateStream(
+            OKX_PRIVATE_WS[self.trader.get_environment()],
+            self.trader.config['OKX']['API'],
+            self.trader.config['OKX']['SECRET_KEY'],
+            self.trader.config['OKX']['PASSWD'],
+            subscriptions=[
+                {'channel': 'positions', 'instType': 'SWAP'},
+                {'channel': 'account', 'ccy': 'USDT'},
+                {'channel': 'orders', 'instType': 'SWAP'},
+            ],
+            on_data=self.on_stream_data,
+            on_resync=self.resync_stream,
+            on_disconnect=self.on_stream_disconnect,
+        )
+        self.stream.start()
+
+        self.price_stream = OkxStream(
+            OKX_PUBLIC_WS[self.trader.get_environment()],
+            subscriptions=[
+                {'channel': 'tickers', 'instId': self.api.market(target_symbol)['id']}
+                for target_symbol in self.trader.get_target_symbols()
+            ],
+            on_data=self.on_price_data,
+        )
+        self.price_stream.start()
+
+    async def stop_stream(self):
+        if self.stream is not None:
+            await self.stream.close()
+            self.stream = None
+        if self.price_stream is not None:
+            await self.price_stream.close()
+            self.price_stream = None
+
+    def stream_connected(self):
+        return self.stream is not None and self.stream.connected
+
+    def snapshot_ttl(self):
+        # stream 연결 중에는 주문 후 REST 재조회 값도 push 로 갱신되므로 resync 주기까지 보관
+        # (None 이면 snapshot 기본 TTL)
+        if self.stream_connected():
+            return self.stream_config['resync_interval']
+        return None
+
+    def stream_resync_due(self):
+        return self.stream_connected() and time.monotonic() - self.last_resync >= self.stream_config['resync_interval']
+
+    async def resync_stream(self):
+        # (재)연결 직후 / 주기적으로 REST 로 전체 상태를 다시 받아 누락된 push 복구
+        self.snapshot.invalidate('positions', 'balance')
+        self.reconciler.invalidate()
+        positions, _ = await self.fetch_positions()
+        balance = await self.fetch_balance()
+        ttl = self.stream_config['resync_interval']
+        self.snapshot.put('positions', positions, ttl=ttl)
+        self.snapshot.put('balance', balance, ttl=ttl)
+        self.last_resync = time.monotonic()
+        self.schedule_stream_reconcile()
+
+    def on_stream_disconnect(self):
+        # push 가 끊긴 동안에는 기존 TTL 기반 REST 조회로 복귀
+        self.snapshot.invalidate('positions', 'balance')
+
+    async def on_stream_data(self, channel, data):
+        ttl = self.stream_config['resync_interval']
+
+        if channel == 'positions':
+            for row in data:
+                key = self.position_key(row)
+                if float(row.get('pos') or 0) == 0:
+                    self.stream_positions.pop(key, None)
+                else:
+                    self.stream_positions[key] = self.api.parse_position(row)
+            self.snapshot.put('positions', list(self.stream_positions.values()), ttl=ttl)
+
+        elif channel == 'account':
+            balance = self.api.parse_trading_balance({'code': '0', 'msg': '', 'data': data})
+            self.snapshot.put('balance', balance, ttl=ttl)
+
+        elif channel == 'orders':
+            for row in data:
+                self.stream_orders[row.get('ordId')] = row
+                self.stream_orders.move_to_end(row.get('ordId'))
+            while len(self.stream_orders) > 500:
+                self.stream_orders.popitem(last=False)
+            event, self.order_event = self.order_event, asyncio.Event()
+            event.set()
+            return
+
+        self.schedule_stream_reconcile()
+
+    async def on_price_data(self, channel, data):
+        for row in data:
+            if row.get('last'):
+                self.prices.update(self.api.safe_symbol(row.get('instId')), row['last'])
+
+    async def fetch_last_price(self, target_symbol):
+        ticker = await self.request('public', 'fetch_ticker', target_symbol)
+        return float(ticker['last'])
+
+    async def get_decision_price(self, target_symbol, webhook_close):
+        # webhook 의 cur_close 대신 ticker 캐시 가격 사용 (없거나 오래되면 REST, 그것도 실패하면 webhook 가격)
+        try:
+            price, age, source = await self.prices.get(
+                target_symbol, lambda: self.fetch_last_price(target_symbol)
+            )
+        except Exception:
+            print(traceback.format_exc())
+            price, age, source = float(webhook_close or 0), None, 'webhook'
+
+        self.price_decisions[target_symbol] = {
+            'price': price,
+            'age_ms': round(age * 1000, 1) if age is not None else None,
+            'source': source,
+            'webhook_close': webhook_close,
+            'time': time.time(),
+        }
+        print(f'Decision price | {target_symbol} {self.price_decisions[target_symbol]}', flush=True)
+        return price
+
+    def schedule_stream_reconcile(self):
+        # 짧은 시간에 몰린 push 는 한 번의 재계산으로 합침
+        if self._stream_reconcile_task is None or self._stream_reconcile_task.done():
+            self._stream_reconcile_task = asyncio.create_task(self._stream_reconcile())
+
+    async def _stream_reconcile(self):
+        await asyncio.sleep(self.stream_config['coalesce'])
+        try:
+            msg = await self.update_positions()
+            await self.post_message(msg)
+        except Exception:
+            print(traceback.format_exc())
+
     async def check_positions(self, t_symbol=None):
         positions, indexed = await self.fetch_positions()
 
@@ -456,15 +877,17 @@ class Bot():
 
         return metrics
 
-    async def set_leverage(self, target_symbol, leverage=0, margin_mode='cross'):
+    def leverage_pos_sides(self):
+        return ['long', 'short'] if self.trader.is_hedge_mode() else ['net']
+
+    async def set_leverage(self, target_symbol, leverage=0, margin_mode='cross', pos_sides=None):
         """
             ref: https://github.com/ccxt/ccxt/issues/11975
         """
         applied = False
         if leverage >= 1 and leverage <= 50:
-            pos_sides = ['net']
-            if self.trader.is_hedge_mode():
-                pos_sides = ['long', 'short']
+            if pos_sides is None:
+                pos_sides = self.leverage_pos_sides()
 
             for pos_side in pos_sides:
                 if margin_mode == 'cross':
@@ -473,7 +896,9 @@ class Bot():
                     params = {"tdMode" : "isolated", "mgnMode" : "isolated", "posSide" : pos_side}
 
                 try:
-                    self.api.set_leverage(
+                    await self.request(
+                        'account',
+                        'set_leverage',
                         leverage,
                         target_symbol,
                         params=params
@@ -492,23 +917,117 @@ class Bot():
                     )
         return applied
 
-    async def sync_configured_leverage(self):
-        for target_symbol in self.trader.get_target_symbols():
-            leverage = self.trader.get_info(target_symbol, key='leverage')
-            cross_applied = await self.set_leverage(target_symbol, leverage, 'cross')
-            isolated_applied = await self.set_leverage(target_symbol, leverage, 'isolated')
-            print(
-                f"Configured leverage sync | symbol={target_symbol} leverage={leverage} "
-                f"cross={cross_applied} isolated={isolated_applied}",
-                flush=True,
+    async def fetch_leverage_map(self, symbols, margin_mode):
+        """
+            현재 거래소 레버리지 조회 -> {(symbol, posSide): lever}
+            - OKX leverage-info 는 instId 를 쉼표로 묶어 20개씩 한 번에 조회
+        """
+        ids = {self.api.market(symbol)['id']: symbol for symbol in symbols}
+        id_list = list(ids)
+        result = {}
+        for i in range(0, len(id_list), 20):
+            resp = await self.request(
+                'account',
+                'private_get_account_leverage_info',
+                {'instId': ','.join(id_list[i:i + 20]), 'mgnMode': margin_mode},
             )
+            for row in resp.get('data', []):
+                result[(ids.get(row.get('instId')), row.get('posSide'))] = float(row.get('lever') or 0)
+        return result
+
+    async def sync_symbol_leverage(self, target_symbol, current):
+        leverage = self.trader.get_info(target_symbol, key='leverage')
+        result = {}
+        for margin_mode in ('cross', 'isolated'):
+            levers = current.get(margin_mode)
+            pos_sides = self.leverage_pos_sides()
+            if levers is not None:
+                # posSide 별 값이 없으면 (cross 는 'net' 한 줄로 올 수 있음) net 값과 비교
+                pos_sides = [
+                    pos_side for pos_side in pos_sides
+                    if levers.get((target_symbol, pos_side), levers.get((target_symbol, 'net'))) != leverage
+                ]
+            if not pos_sides:
+                result[margin_mode] = 'skip'
+                continue
+            result[margin_mode] = await self.set_leverage(target_symbol, leverage, margin_mode, pos_sides=pos_sides)
+
+        print(
+            f"Configured leverage sync | symbol={target_symbol} leverage={leverage} "
+            f"cross={result['cross']} isolated={result['isolated']}",
+            flush=True,
+        )
+        return result
+
+    async def sync_configured_leverage(self):
+        """
+            설정 레버리지 반영
+            - margin mode 별로 현재 레버리지를 한 번에 조회해 이미 같은 값인 posSide 는 건너뜀
+            - 심볼끼리는 병렬, 한 심볼 안의 cross / isolated 는 순서대로
+            - 조회에 실패하면 해당 margin mode 는 전부 설정
+        """
+        symbols = self.trader.get_target_symbols()
+        current = {}
+        for margin_mode in ('cross', 'isolated'):
+            try:
+                current[margin_mode] = await self.fetch_leverage_map(symbols, margin_mode)
+            except Exception as exc:
+                print(f"Leverage info fetch failed | mode={margin_mode} error={exc}", flush=True)
+                current[margin_mode] = None
+
+        results = await asyncio.gather(*(
+            self.sync_symbol_leverage(target_symbol, current)
+            for target_symbol in symbols
+        ))
+        return dict(zip(symbols, results))
+
+    async def boot(self):
+        """
+            시작 준비 (webhook 수신 전)
+            - 연결 pool / market 정보(캐시 파일 우선) 준비와 position mode 확인을 동시에 진행
+            - 레버리지 동기화 후 WebSocket 시작
+            - 단계별 소요 시간은 self.boot_timings 에 남기고 시작 메시지에 표시
+        """
+        started_at = time.monotonic()
+        await asyncio.gather(self.exchange.start(), self.ensure_exchange_mode())
+        markets_at = time.monotonic()
+        leverage = await self.sync_configured_leverage()
+        leverage_at = time.monotonic()
+        await self.start_stream()
+        ready_at = time.monotonic()
+
+        skipped = sum(1 for result in leverage.values() for value in result.values() if value == 'skip')
+        self.boot_timings = {
+            'markets_source': self.exchange.markets_source,
+            'markets_sec': round(markets_at - started_at, 3),
+            'leverage_sec': round(leverage_at - markets_at, 3),
+            'leverage_skipped': skipped,
+            'leverage_total': len(leverage) * 2,
+            'stream_sec': round(ready_at - leverage_at, 3),
+            'ready_sec': round(ready_at - started_at, 3),
+        }
+        print(f"Boot ready | {self.boot_timings}", flush=True)
+        return self.boot_timings
+
+    def boot_text(self):
+        timings = getattr(self, 'boot_timings', None)
+        if not timings:
+            return ''
+        return "시작 준비 시간: {:.2f}s (market: {} {:.2f}s, 레버리지: {:.2f}s [{}/{} 생략])\n".format(
+            timings['ready_sec'],
+            timings['markets_source'],
+            timings['markets_sec'],
+            timings['leverage_sec'],
+            timings['leverage_skipped'],
+            timings['leverage_total'],
+        )
 
     # ========== OKX API ===================
     """
         트레이딩 관련 함수들
     """
-    def sleep(self, sleep_time):
-        time.sleep(sleep_time)
+    async def sleep(self, sleep_time):
+        await asyncio.sleep(sleep_time)
 
     def reset_short_signal_count(self, target_symbol):
         if self.trader.get_info(target_symbol, key='short_signal_count') != 0:
@@ -521,11 +1040,26 @@ class Bot():
         return cur_count
 
     async def trade(self, symbol, check_pos, trade_vol, cur_close):
-        if self.trader.is_hedge_mode():
-            return await self.trade_hedge(symbol, check_pos, trade_vol, cur_close)
+        # 한 번의 거래 사이클에서 발생한 포지션/잔고 REST 조회 횟수 기록
+        requests_before = self.snapshot.total_requests()
+        try:
+            if self.trader.is_hedge_mode():
+                return await self.trade_hedge(symbol, check_pos, trade_vol, cur_close)
+            # webhook queue lane 과 /webhook/batch 가 같은 심볼을 동시에 처리하지 않도록 심볼 lock 사용
+            async with self.get_symbol_lock(self.normalize_target_symbol(symbol)):
+                return await self.trade_oneway(symbol, check_pos, trade_vol, cur_close)
+        finally:
+            print(
+                f'Trade cycle | symbol={symbol} '
+                f'snapshot_requests={self.snapshot.total_requests() - requests_before}',
+                flush=True,
+            )
 
+    async def trade_oneway(self, symbol, check_pos, trade_vol, cur_close):
+        # 성공하면 order_list, 주문 / 후처리 중 에러가 나면 None
         # if not self.go_trade:
         #     return
+        failed = False
             
         try:
             roe, pnl = await self.check_positions()
@@ -620,10 +1154,11 @@ class Bot():
                 ):
 
                     avg_price = self.trader.get_info(target_coin, key='avg_buy_price')
+                    cur_price = await self.get_decision_price(target_coin, cur_close)
 
                     price_ok = (
-                        (cur_pos == 'long'  and avg_price > cur_close) or
-                        (cur_pos == 'short' and avg_price < cur_close)
+                        (cur_pos == 'long'  and avg_price > cur_price) or
+                        (cur_pos == 'short' and avg_price < cur_price)
                     )
 
                     if not price_ok:
@@ -701,22 +1236,14 @@ class Bot():
             print('InvalidOrder Error Raised!')
             print(traceback.format_exc())
             print('target_symbol : ', target_symbol, cur_pos, check_pos)
-            del self.api
-            print('deleted api')
-            
-            self.setup_api()
-            print('New API generated')
+            failed = True
 
         except ccxt.InsufficientFunds as e:
             print(datetime.now(timezone('Asia/Seoul')).strftime("%m/%d/%Y, %H:%M:%S"))
             print('Insufficient Fund Error Raised!')
             print(traceback.format_exc())
             print('target_symbol : ', target_symbol, cur_pos, check_pos)
-            del self.api
-            print('deleted api')
-            
-            self.setup_api()
-            print('New API generated')
+            failed = True
             
 
         print('Order List')
@@ -730,12 +1257,10 @@ class Bot():
 
             for idx, msg in enumerate(msg_list):
                 await self.post_message(msg)
-                self.sleep(0.1)
 
-            msg = await self.update_positions()
+            msg = await self.update_positions(owned=(target_coin,))
             # msg = asyncio.run(self.update_positions())
             await self.post_message(msg)
-            self.sleep(1)
 
         except (telegram.error.NetworkError, telegram.error.BadRequest, telegram.error.TimedOut):            
             print()
@@ -748,31 +1273,42 @@ class Bot():
             print(datetime.now(timezone('Asia/Seoul')).strftime("%m/%d/%Y, %H:%M:%S"))
             print('Other Error Raised!')
             print(traceback.format_exc())
-            
-            del self.api
-            print('deleted api')
-            
-            self.setup_api()
-            msg = self.start_msg()
+            failed = True
+
+            msg = await self.start_msg()
             await self.post_message(msg)
-            print('New API generated')
+
+        return None if failed else order_list
 
     async def post_trade(self, order_list):
         msg_list = []
 
+        # -----------------------------
+        # 체결 정보 조회 (미확인 주문만 묶어서 조회)
+        # -----------------------------
+        placed = [
+            (target_symbol, order)
+            for target_symbol, order, trade_type, _, _ in order_list
+            if order is not None and trade_type is not None
+        ]
+        fills = iter(await self.confirm_fills(placed))
+
         for target_symbol, order, trade_type, trade_vol, cur_time in order_list:
             if order is None or trade_type is None:
                 msg_list.append(None)
                 continue
 
-            # -----------------------------
-            # 체결 정보 조회
-            # -----------------------------
-            _order = await self.fetch_order(target_symbol, order['id'])
-            self.sleep(1)
+            _order = next(fills)
+            if _order is None:
+                msg_list.append(self.unconfirmed_fill_msg(target_symbol, order))
+                msg_list.append(await self.update_positions(owned=(target_symbol,)))
+                continue
+            # 로컬 상태를 직접 바꾸므로 다음 update_positions 에서 반드시 재계산
+            self.reconciler.invalidate(target_symbol)
 
             # target_coin = self.symbol_parser(target_symbol)
             now_str = datetime.now(timezone('Asia/Seoul')).strftime("%m/%d/%Y, %H:%M:%S")
+            state = self.trader.symbol_state(target_symbol)
 
             # ==================================================
             # 🟢 BUY
@@ -780,25 +1316,25 @@ class Bot():
             if trade_type.startswith('buy'):
                 avg_price = float(_order['price'])
 
-                cur_buy_cnt = self.trader.get_info(target_symbol, key='buy_cnt')
-                self.trader.update(target_symbol, key='buy_cnt', value=cur_buy_cnt + trade_vol)
+                self.trader.update(target_symbol, key='buy_cnt', value=state.buy_cnt + trade_vol)
                 self.trader.update(target_symbol, key='buy_time', value=cur_time)
 
                 # 포지션 업데이트
-                msg_list.append(await self.update_positions())
-                self.set_balance()
+                msg_list.append(await self.update_positions(owned=(target_symbol,)))
+                await self.set_balance()
 
+                round_num = state.round_num
                 trade_chat = (
                     f"현재 시간 : {now_str}\n"
                     f"[매수 - {target_symbol.split('/')[0].upper()}] "
-                    f"- 수량 : {self.trader.get_real_trade_vol(target_symbol, trade_vol):,.{self.trader.get_info(target_symbol, key='round_num')}f}\n"
-                    f"현재 포지션 : {self.trader.get_info(target_symbol, key='position')} | "
-                    f"Lev : x{self.trader.get_info(target_symbol, key='leverage'):.1f}\n"
-                    f"평균 진입 가격 : {avg_price:.{self.trader.get_info(target_symbol, key='precision')}f}\n"
+                    f"- 수량 : {self.trader.get_real_trade_vol(target_symbol, trade_vol):,.{round_num}f}\n"
+                    f"현재 포지션 : {state.position} | "
+                    f"Lev : x{state.leverage:.1f}\n"
+                    f"평균 진입 가격 : {avg_price:.{state.precision}f}\n"
                     f"현재 보유 수량 : "
-                    f"[{self.trader.get_belong_vol(target_symbol, False):,.{self.trader.get_info(target_symbol, key='round_num')}f}/"
-                    f"{self.trader.get_buy_vol(target_symbol) * self.trader.get_info(target_symbol, key='max_buy_cnt'):,.{self.trader.get_info(target_symbol, key='round_num')}f}] "
-                    f"[{self.trader.get_info(target_symbol, key='buy_cnt')}/{self.trader.get_info(target_symbol, key='max_buy_cnt')}]\n"
+                    f"[{self.trader.get_belong_vol(target_symbol, False):,.{round_num}f}/"
+                    f"{self.trader.get_buy_vol(target_symbol) * state.max_buy_cnt:,.{round_num}f}] "
+                    f"[{state.buy_cnt}/{state.max_buy_cnt}]\n"
                 )
 
                 await self.trader.save_info()
@@ -809,54 +1345,50 @@ class Bot():
             # 🔴 SELL
             # ==================================================
             if trade_type.startswith('sell'):
-                map_vol = self.trader.get_info(target_symbol, key='map_vol')
-                round_num = self.trader.get_info(target_symbol, key='round_num')
+                round_num = state.round_num
 
-                filled_vol = round(float(_order['amount']) / map_vol, round_num)
+                filled_vol = round(float(_order['amount']) / state.map_vol, round_num)
                 filled_price = float(_order['price'])
 
                 total_profit = self.trader.calc_profit(target_symbol, filled_price, filled_vol)
                 ratio = abs(total_profit) / await self.get_balance()
 
-                cum_profit = self.trader.get_info(None, key='cum_profit')
-                cum_pnl = self.trader.get_info(None, key='cum_pnl')
+                trader = self.trader
 
                 # 승패 처리
-                self.trader.update(None, key='tot_cnt', value=self.trader.get_info(None, key='tot_cnt') + 1)
+                trader.update(None, key='tot_cnt', value=trader.tot_cnt + 1)
                 if total_profit < 0:
                     ratio = -ratio
                     profit_type = 'LOSS'
                 else:
-                    self.trader.update(None, key='win_cnt', value=self.trader.get_info(None, key='win_cnt') + 1)
+                    trader.update(None, key='win_cnt', value=trader.win_cnt + 1)
                     profit_type = 'PROFIT'
 
-                self.trader.update(target_symbol, key='sell_time', value=cur_time)
-                self.trader.update(None, key='cum_profit', value=cum_profit + total_profit)
-                self.trader.update(None, key='cum_pnl', value=cum_pnl + ratio)
+                trader.update(target_symbol, key='sell_time', value=cur_time)
+                trader.update(None, key='cum_profit', value=trader.cum_profit + total_profit)
+                trader.update(None, key='cum_pnl', value=trader.cum_pnl + ratio)
 
-                win_cnt = self.trader.get_info(None, key='win_cnt')
-                tot_cnt = self.trader.get_info(None, key='tot_cnt')
-
-                avg_price = self.trader.get_info(target_symbol, key='avg_buy_price')
+                win_cnt = trader.win_cnt
+                tot_cnt = trader.tot_cnt
 
                 trade_chat = (
                     f"현재 시간 : {now_str}\n"
                     f"[매도 - {target_symbol.split('/')[0].upper()}] - [{profit_type}]\n"
-                    f"현재 포지션 : {self.trader.get_info(target_symbol, key='position')} | "
-                    f"Lev : x{self.trader.get_info(target_symbol, key='leverage'):.1f}\n"
-                    f"평균 진입 가격 : {avg_price:.{self.trader.get_info(target_symbol, key='precision')}f}\n"
+                    f"현재 포지션 : {state.position} | "
+                    f"Lev : x{state.leverage:.1f}\n"
+                    f"평균 진입 가격 : {state.avg_buy_price:.{state.precision}f}\n"
                     f"매도 수량 : {filled_vol:.{round_num}f}\n"
-                    f"남은 수량 : {self.trader.get_belong_vol(target_symbol, False) - filled_vol:.{round_num}f}\n"
-                    f"평균 매도 가격 : {filled_price:.{self.trader.get_info(target_symbol, key='precision')}f}\n"
+                    f"남은 수량 : {trader.get_belong_vol(target_symbol, False) - filled_vol:.{round_num}f}\n"
+                    f"평균 매도 가격 : {filled_price:.{state.precision}f}\n"
                     f"현재 거래 이익 : {total_profit:,.2f} USDT [{ratio * 100:,.2f}%]\n"
-                    f"누적 거래 이익 : {self.trader.get_info(None, key='cum_profit'):,.2f} USDT "
-                    f"[{self.trader.get_info(None, key='cum_pnl') * 100:,.2f}%]\n"
+                    f"누적 거래 이익 : {trader.cum_profit:,.2f} USDT "
+                    f"[{trader.cum_pnl * 100:,.2f}%]\n"
                     f"승률 : [{win_cnt}/{tot_cnt}] "
                     f"- {(win_cnt / tot_cnt * 100 if tot_cnt > 0 else 0):.4f}%\n"
                 )
 
-                msg_list.append(await self.update_positions())
-                self.set_balance()
+                msg_list.append(await self.update_positions(owned=(target_symbol,)))
+                await self.set_balance()
                 await self.trader.save_info()
                 msg_list.append(trade_chat)
                 continue
@@ -865,23 +1397,37 @@ class Bot():
 
         return msg_list
 
-    async def update_positions(self):
+    async def update_positions(self, owned=()):
+        # owned: 호출자가 이미 lock 을 잡고 있는 심볼 (post_trade 에서 자기 심볼 재계산용)
         if self.trader.is_hedge_mode():
-            return await self.update_positions_hedge()
+            return await self.update_positions_hedge(owned)
 
         old_balance = self.trader.get_info(None, 'balance')
 
-        positions = self.api.fetch_positions()
-        indexed = self.api.index_by(positions, 'contracts')
+        positions, indexed = await self.fetch_positions()
 
         check=False
         msg = None
 
-        self.set_balance()
+        await self.set_balance()
+
+        target_symbols = self.trader.get_target_symbols()
+        groups = self.reconciler.group(positions)
+        touched = 0
+
+        for target_symbol in target_symbols:
+            # 거래소 포지션이 직전 cycle 과 같으면 재계산 생략
+            fingerprint = self.position_fingerprint(target_symbol, groups)
+            if not self.reconciler.changed(target_symbol, fingerprint):
+                continue
+            # 주문 처리 중(lock 사용 중)인 다른 심볼은 post_trade 가 끝날 때까지 상태를 덮어쓰지 않음
+            # (fingerprint 를 commit 하지 않으므로 다음 cycle 에 다시 재계산)
+            if target_symbol not in owned and self.get_symbol_lock(target_symbol).locked():
+                continue
+            touched += 1
 
-        for target_symbol in self.trader.get_target_symbols():
             chk = True
-            for pos in positions:
+            for pos in groups.get(target_symbol, []):
                 pos_symbol, entry_price, pos_side, n_contracts = pos['symbol'], pos['entryPrice'], pos['side'], float(pos['contracts'])
                 if n_contracts > 0 and target_symbol == pos_symbol:
                     self.trader.update(target_symbol, key='avg_buy_price', value=float(entry_price))
@@ -915,27 +1461,31 @@ class Bot():
                 self.trader.update(target_symbol, key='amt', value=0)
                 self.trader.update(target_symbol, key='avg_buy_price', value=0)
                 self.trader.update(target_symbol, key='position_list', value=[])
-                
 
-        if check or old_balance != await self.get_balance():
+            self.reconciler.commit(target_symbol, fingerprint)
+
+        self.reconciler.finish_cycle(len(target_symbols), touched)
+
+        cur_balance = await self.get_balance()
+        if check or old_balance != cur_balance:
             if check:
-                print(check, old_balance, await self.get_balance())
+                print(check, old_balance, cur_balance)
                 print()
                 msg = await self.status_msg()
 
-            self.set_balance()
+            await self.set_balance()
             return msg
 
         return msg
 
-    def set_balance(self):
-        d = self.api.fetch_balance()
+    async def set_balance(self):
+        d = await self.fetch_balance()
         total_balance = float(d['USDT']['free'])
         
         self.trader.update(None, 'balance', total_balance)
 
-    def get_cur_balance(self):
-        d = self.api.fetch_balance()
+    async def get_cur_balance(self):
+        d = await self.fetch_balance()
         d2 = d['info']['data'][0]['details'][0]
 
         total_sum = float(d2['cashBal'])
@@ -957,8 +1507,9 @@ class Bot():
         text += "[자동 거래 시작] USER : [{}]\n".format(
             self.trader.get_info(None, 'user_name'),
             )
+        text += self.boot_text()
 
-        total_sum, cur_balance, unpnl = self.get_cur_balance()
+        total_sum, cur_balance, unpnl = await self.get_cur_balance()
 
         text += "현재 계좌\nFree: [{:.2f}/{:.2f} USDT]\n".format(
             self.trader.get_info(None, 'balance'),
@@ -1001,7 +1552,7 @@ class Bot():
         else:
             text += '[거래 일시중지]\n'
 
-        total_sum, cur_balance, unpnl = self.get_cur_balance()
+        total_sum, cur_balance, unpnl = await self.get_cur_balance()
 
         # text += "현재 거래 방법 : [{}]\n".format(self.get_trade_mode())
         text += "[현재 정보] USER: [{}]\n현재 시간 : {}\n".format(
@@ -1045,217 +1596,389 @@ class Bot():
             return symbol.split('USDT.P')[0] + '/USDT:USDT'
         return symbol.split('/')[0] + '/USDT:USDT'
 
+    def get_symbol_lock(self, target_symbol):
+        lock = self.symbol_locks.get(target_symbol)
+        if lock is None:
+            lock = asyncio.Lock()
+            self.symbol_locks[target_symbol] = lock
+        return lock
+
     async def trade_hedge(self, symbol, check_pos, trade_vol, cur_close):
         target_coin = self.normalize_target_symbol(symbol)
         cur_time = time.time()
-        order_list = []
+        targets = [
+            target_symbol
+            for target_symbol in self.trader.get_target_symbols()
+            if target_coin in target_symbol
+        ]
+
+        # 같은 심볼 신호는 lock 으로 순서 보장 (신호 하나의 대상 심볼은 보통 하나라 순서대로 처리)
+        results = [
+            await self.trade_hedge_symbol(target_symbol, check_pos, trade_vol, cur_close, cur_time)
+            for target_symbol in targets
+        ]
+        if any(result is None for result in results):
+            return
 
         try:
-            metrics = await self.check_positions_hedge(target_coin)
+            msg = await self.update_positions_hedge()
+            await self.post_message(msg)
+        except (telegram.error.NetworkError, telegram.error.BadRequest, telegram.error.TimedOut):
+            print(datetime.now(timezone('Asia/Seoul')).strftime("%m/%d/%Y, %H:%M:%S"))
+            print('Network 관련 에러 발생!\nBot 재시작!')
+            print(traceback.format_exc())
+        except Exception:
+            print(datetime.now(timezone('Asia/Seoul')).strftime("%m/%d/%Y, %H:%M:%S"))
+            print('Other Error Raised!')
+            print(traceback.format_exc())
 
-            for target_symbol in self.trader.get_target_symbols():
-                if target_coin not in target_symbol:
-                    continue
+    def leave_order_batch(self):
+        batcher = current_batcher.get()
+        if batcher is not None:
+            batcher.leave()
 
-                if not self.trader.get_info(target_coin, key='go_trade'):
-                    continue
+    async def trade_batch(self, signals):
+        """
+            여러 webhook 신호를 한 번에 처리 (/webhook/batch)
+            - signals: [{'symbol', 'position', 'position_size', 'cur_close'}, ...]
+            - hedge 모드: 같은 심볼이 겹치지 않게 round 로 나눔
+                - round 마다 포지션 snapshot 한 번으로 모든 심볼 주문 계획 -> 주문은 batch-orders 로 함께 전송
+                - 마지막에 포지션 정리 / 상태 메시지 한 번
+            - one-way 모드: 기존 trade() 를 순서대로 호출 (심볼 lock 으로 queue lane 과 순서 보장)
+            - 반환: 신호 순서대로 {'symbol', 'status', 'orders'} (status: ok / failed / ignored)
+        """
+        results = [None] * len(signals)
+        if not self.trader.is_hedge_mode():
+            for index, signal in enumerate(signals):
+                results[index] = await self.trade_batch_oneway(signal)
+            return results
+
+        rounds = []
+        for index, signal in enumerate(signals):
+            target_coin = self.normalize_target_symbol(signal['symbol'])
+            for batch_round in rounds:
+                if target_coin not in batch_round:
+                    batch_round[target_coin] = index
+                    break
+            else:
+                rounds.append({target_coin: index})
+
+        requests_before = self.snapshot.total_requests()
+        for batch_round in rounds:
+            await self.trade_batch_round(signals, list(batch_round.values()), results)
+        print(
+            f'Trade batch | signals={len(signals)} rounds={len(rounds)} '
+            f'snapshot_requests={self.snapshot.total_requests() - requests_before}',
+            flush=True,
+        )
 
-                side = check_pos
-                opp_side = 'short' if side == 'long' else 'long'
-                side_amt = self.trader.get_side_belong_vol(target_coin, side, False)
-                opp_amt = self.trader.get_side_belong_vol(target_coin, opp_side, False)
-                side_buy_cnt = self.trader.get_side_info(target_coin, side, 'buy_cnt')
-                new_buy_roe = self.get_dynamic_new_buy_roe(target_coin)
-                max_buy_cnt = self.trader.get_info(target_coin, key='max_buy_cnt')
-                min_vol = self.trader.get_info(target_coin, key='min_vol')
-                buy_time = self.trader.get_side_info(target_coin, side, 'buy_time')
-                opp_sell_time = self.trader.get_side_info(target_coin, opp_side, 'sell_time')
-                side_metrics = metrics.get(target_coin, {}).get(side, {'roe': 0, 'pnl': 0})
-                side_roe = float(side_metrics.get('roe') or 0)
-                side_avg = self.trader.get_side_info(target_coin, side, 'avg_buy_price')
-                short_confirmed = True
-
-                if side != 'short':
-                    self.reset_short_signal_count(target_coin)
-                elif side_amt > 0:
-                    self.reset_short_signal_count(target_coin)
-                else:
-                    short_signal_count = self.advance_short_signal_count(target_coin)
-                    short_confirmed = short_signal_count >= 3
-
-                if opp_amt > 0 and cur_time != opp_sell_time:
-                    max_close_contracts = opp_amt * self.trader.get_info(target_coin, key='map_vol')
-                    requested_contracts = min_vol * trade_vol
-                    close_contracts = min(requested_contracts, max_close_contracts)
-                    executed_trade_vol = round(close_contracts / min_vol, self.trader.get_info(target_coin, key='round_num'))
-                    if close_contracts > 0:
-                        close_order = await self.market_order_hedge(
-                            target_coin,
-                            opp_side,
-                            'close',
-                            vol=close_contracts,
-                        )
-                        order_list.append(
-                            self.build_order_entry(
-                                target_coin,
-                                close_order,
-                                f'close_{opp_side}',
-                                executed_trade_vol,
-                                cur_time,
-                                side=opp_side,
-                                action='close',
-                            )
-                        )
-                        if side != 'short' or short_confirmed:
-                            open_order = await self.market_order_hedge(
-                                target_coin,
-                                side,
-                                'open',
-                                vol=close_contracts,
-                            )
-                            self.trader.update_side_pos_list(target_coin, side, executed_trade_vol)
-                            if side == 'short':
-                                self.reset_short_signal_count(target_coin)
-                            order_list.append(
-                                self.build_order_entry(
-                                    target_coin,
-                                    open_order,
-                                    f'open_{side}',
-                                    executed_trade_vol,
-                                    cur_time,
-                                    side=side,
-                                    action='open',
-                                )
-                            )
-                    else:
-                        order_list.append(self.build_order_entry(target_coin, None, None, trade_vol, cur_time))
-                    continue
+        if any(result['status'] == 'ok' for result in results):
+            try:
+                msg = await self.update_positions_hedge()
+                await self.post_message(msg)
+            except Exception:
+                print(datetime.now(timezone('Asia/Seoul')).strftime("%m/%d/%Y, %H:%M:%S"))
+                print('Other Error Raised!')
+                print(traceback.format_exc())
+
+        return results
+
+    async def trade_batch_oneway(self, signal):
+        result = {'symbol': signal['symbol'], 'status': 'ignored', 'orders': []}
+        target_coin = self.normalize_target_symbol(signal['symbol'])
+        if signal['position'] is None or not any(
+            target_coin in target_symbol for target_symbol in self.trader.get_target_symbols()
+        ):
+            return result
+
+        order_list = await self.trade(signal['symbol'], signal['position'], signal['position_size'], signal['cur_close'])
+        if order_list is None:
+            result['status'] = 'failed'
+            return result
+
+        result['status'] = 'ok'
+        for target_symbol, order, trade_type, _, _ in order_list:
+            if order is not None:
+                result['orders'].append(self.batch_order_summary(target_symbol, order, trade_type))
+        return result
 
-                if side_amt <= 0:
-                    if side == 'short' and not short_confirmed:
-                        order_list.append(self.build_order_entry(target_coin, None, None, trade_vol, cur_time))
-                        continue
-                    order = await self.market_order_hedge(
-                        target_coin,
-                        side,
-                        'open',
-                        vol=min_vol * trade_vol,
-                    )
-                    self.trader.update_side_pos_list(target_coin, side, trade_vol)
-                    if side == 'short':
-                        self.reset_short_signal_count(target_coin)
-                    order_list.append(
-                        self.build_order_entry(
-                            target_coin,
-                            order,
-                            f'open_{side}',
-                            trade_vol,
-                            cur_time,
-                            side=side,
-                            action='open',
-                        )
-                    )
-                    continue
+    def batch_order_summary(self, target_symbol, order, trade_type):
+        return {
+            'target_symbol': target_symbol,
+            'trade_type': trade_type,
+            'order_id': order.get('id'),
+        }
 
-                price_ok = (
-                    (side == 'long' and side_avg > cur_close) or
-                    (side == 'short' and side_avg < cur_close)
-                )
-                can_add = (
-                    cur_time != buy_time and
-                    side_roe < -new_buy_roe and
-                    side_buy_cnt + trade_vol <= max_buy_cnt and
-                    price_ok
+    async def trade_batch_round(self, signals, indexes, results):
+        cur_time = time.time()
+        target_symbols = self.trader.get_target_symbols()
+        jobs = []
+        for index in indexes:
+            signal = signals[index]
+            results[index] = {'symbol': signal['symbol'], 'status': 'ignored', 'orders': []}
+            if signal['position'] is None:
+                continue
+            target_coin = self.normalize_target_symbol(signal['symbol'])
+            for target_symbol in target_symbols:
+                if target_coin in target_symbol:
+                    jobs.append((index, target_symbol))
+        if not jobs:
+            return
+
+        # 모든 심볼 계획이 같은 포지션 snapshot 을 공유
+        await self.fetch_positions()
+
+        batcher = OrderBatcher(len(jobs), self.create_orders)
+
+        async def run(index, target_symbol):
+            signal = signals[index]
+            try:
+                return await self.trade_hedge_symbol(
+                    target_symbol, signal['position'], signal['position_size'], signal['cur_close'], cur_time
                 )
+            finally:
+                batcher.leave()
 
-                if can_add:
-                    def calc_max_mult(roe):
-                        if roe < -50:
-                            return 30
-                        if roe < -40:
-                            return 25
-                        if roe < -30:
-                            return 20
-                        if roe < -20:
-                            return 15
-                        return 0
+        token = current_batcher.set(batcher)
+        try:
+            outcomes = await asyncio.gather(*(run(index, target_symbol) for index, target_symbol in jobs),
+                                            return_exceptions=True)
+        finally:
+            current_batcher.reset(token)
+
+        for (index, target_symbol), outcome in zip(jobs, outcomes):
+            result = results[index]
+            if isinstance(outcome, BaseException) or outcome is None:
+                if isinstance(outcome, BaseException):
+                    print('Batch trade failed', target_symbol, repr(outcome))
+                result['status'] = 'failed'
+                continue
+            if result['status'] == 'ignored':
+                result['status'] = 'ok'
+            for item in outcome:
+                if item.get('order') is not None:
+                    result['orders'].append(self.batch_order_summary(target_symbol, item['order'], item.get('trade_type')))
+
+    async def trade_hedge_symbol(self, target_symbol, check_pos, trade_vol, cur_close, cur_time):
+        # 성공하면 order_list (주문 없으면 빈 list), 실패하면 None
+        async with self.get_symbol_lock(target_symbol):
+            try:
+                order_list = await self.plan_hedge_orders(target_symbol, check_pos, trade_vol, cur_close, cur_time)
+            except ccxt.InvalidOrder:
+                print(datetime.now(timezone('Asia/Seoul')).strftime("%m/%d/%Y, %H:%M:%S"))
+                print('InvalidOrder Error Raised!')
+                print(traceback.format_exc())
+                return None
+            except ccxt.InsufficientFunds:
+                print(datetime.now(timezone('Asia/Seoul')).strftime("%m/%d/%Y, %H:%M:%S"))
+                print('Insufficient Fund Error Raised!')
+                print(traceback.format_exc())
+                return None
+            finally:
+                # batch 처리 중이면 주문이 없거나 실패한 심볼도 도착 처리 -> 나머지 주문 전송
+                self.leave_order_batch()
 
-                    max_mult = calc_max_mult(side_roe)
-                    if max_mult > 0:
-                        pos_list = self.trader.get_side_info(target_coin, side, 'position_list')
-                        sum_pos = sum(pos_list)
-                        for mult in range(max_mult, 0, -1):
-                            adjusted_trade_vol = (mult / 10.0) * sum_pos
-                            if side_buy_cnt + adjusted_trade_vol <= max_buy_cnt:
-                                trade_vol = adjusted_trade_vol
-                                break
+            print('Hedge Order List')
+            for ii, item in enumerate(order_list):
+                print(ii + 1, item)
+                print()
 
-                    order = await self.market_order_hedge(
-                        target_coin,
-                        side,
-                        'open',
-                        vol=min_vol * trade_vol,
+            try:
+                msg_list = await self.post_trade_hedge(order_list)
+
+                for msg in msg_list:
+                    await self.post_message(msg)
+            except (telegram.error.NetworkError, telegram.error.BadRequest, telegram.error.TimedOut):
+                print(datetime.now(timezone('Asia/Seoul')).strftime("%m/%d/%Y, %H:%M:%S"))
+                print('Network 관련 에러 발생!\nBot 재시작!')
+                print(traceback.format_exc())
+                return None
+            except Exception:
+                print(datetime.now(timezone('Asia/Seoul')).strftime("%m/%d/%Y, %H:%M:%S"))
+                print('Other Error Raised!')
+                print(traceback.format_exc())
+                return None
+
+            return order_list
+
+    async def plan_hedge_orders(self, target_symbol, check_pos, trade_vol, cur_close, cur_time):
+        order_list = []
+        if not self.trader.get_info(target_symbol, key='go_trade'):
+            return order_list
+
+        metrics = await self.check_positions_hedge(target_symbol)
+
+        side = check_pos
+        opp_side = 'short' if side == 'long' else 'long'
+        side_amt = self.trader.get_side_belong_vol(target_symbol, side, False)
+        opp_amt = self.trader.get_side_belong_vol(target_symbol, opp_side, False)
+        side_buy_cnt = self.trader.get_side_info(target_symbol, side, 'buy_cnt')
+        new_buy_roe = self.get_dynamic_new_buy_roe(target_symbol)
+        max_buy_cnt = self.trader.get_info(target_symbol, key='max_buy_cnt')
+        min_vol = self.trader.get_info(target_symbol, key='min_vol')
+        buy_time = self.trader.get_side_info(target_symbol, side, 'buy_time')
+        opp_sell_time = self.trader.get_side_info(target_symbol, opp_side, 'sell_time')
+        side_metrics = metrics.get(target_symbol, {}).get(side, {'roe': 0, 'pnl': 0})
+        side_roe = float(side_metrics.get('roe') or 0)
+        side_avg = self.trader.get_side_info(target_symbol, side, 'avg_buy_price')
+        short_confirmed = True
+
+        if side != 'short':
+            self.reset_short_signal_count(target_symbol)
+        elif side_amt > 0:
+            self.reset_short_signal_count(target_symbol)
+        else:
+            short_signal_count = self.advance_short_signal_count(target_symbol)
+            short_confirmed = short_signal_count >= 3
+
+        if opp_amt > 0 and cur_time != opp_sell_time:
+            max_close_contracts = opp_amt * self.trader.get_info(target_symbol, key='map_vol')
+            requested_contracts = min_vol * trade_vol
+            close_contracts = min(requested_contracts, max_close_contracts)
+            executed_trade_vol = round(close_contracts / min_vol, self.trader.get_info(target_symbol, key='round_num'))
+            if close_contracts > 0:
+                open_leg = side != 'short' or short_confirmed
+                if open_leg:
+                    # 반대 포지션 청산 + 신규 진입을 한 번의 batch 요청으로 전송
+                    close_order, open_order = await self.market_order_hedge_batch([
+                        (target_symbol, opp_side, 'close', close_contracts),
+                        (target_symbol, side, 'open', close_contracts),
+                    ])
+                else:
+                    close_order = await self.market_order_hedge(
+                        target_symbol,
+                        opp_side,
+                        'close',
+                        vol=close_contracts,
+                    )
+                    open_order = None
+
+                order_list.append(
+                    self.build_order_entry(
+                        target_symbol,
+                        close_order,
+                        f'close_{opp_side}',
+                        executed_trade_vol,
+                        cur_time,
+                        side=opp_side,
+                        action='close',
                     )
-                    self.trader.update_side_pos_list(target_coin, side, trade_vol)
+                )
+                if open_leg and open_order is not None:
+                    self.trader.update_side_pos_list(target_symbol, side, executed_trade_vol)
+                    if side == 'short':
+                        self.reset_short_signal_count(target_symbol)
                     order_list.append(
                         self.build_order_entry(
-                            target_coin,
-                            order,
+                            target_symbol,
+                            open_order,
                             f'open_{side}',
-                            trade_vol,
+                            executed_trade_vol,
                             cur_time,
                             side=side,
                             action='open',
                         )
                     )
-                    continue
-
-                order_list.append(self.build_order_entry(target_coin, None, None, trade_vol, cur_time))
-
-        except ccxt.InvalidOrder:
-            print(datetime.now(timezone('Asia/Seoul')).strftime("%m/%d/%Y, %H:%M:%S"))
-            print('InvalidOrder Error Raised!')
-            print(traceback.format_exc())
-            del self.api
-            self.setup_api()
-            return
-        except ccxt.InsufficientFunds:
-            print(datetime.now(timezone('Asia/Seoul')).strftime("%m/%d/%Y, %H:%M:%S"))
-            print('Insufficient Fund Error Raised!')
-            print(traceback.format_exc())
-            del self.api
-            self.setup_api()
-            return
+            else:
+                order_list.append(self.build_order_entry(target_symbol, None, None, trade_vol, cur_time))
+            return order_list
+
+        if side_amt <= 0:
+            if side == 'short' and not short_confirmed:
+                order_list.append(self.build_order_entry(target_symbol, None, None, trade_vol, cur_time))
+                return order_list
+            order = await self.market_order_hedge(
+                target_symbol,
+                side,
+                'open',
+                vol=min_vol * trade_vol,
+            )
+            self.trader.update_side_pos_list(target_symbol, side, trade_vol)
+            if side == 'short':
+                self.reset_short_signal_count(target_symbol)
+            order_list.append(
+                self.build_order_entry(
+                    target_symbol,
+                    order,
+                    f'open_{side}',
+                    trade_vol,
+                    cur_time,
+                    side=side,
+                    action='open',
+                )
+            )
+            return order_list
 
-        print('Hedge Order List')
-        for ii, item in enumerate(order_list):
-            print(ii + 1, item)
-            print()
+        can_add = (
+            cur_time != buy_time and
+            side_roe < -new_buy_roe and
+            side_buy_cnt + trade_vol <= max_buy_cnt
+        )
+        if can_add:
+            cur_price = await self.get_decision_price(target_symbol, cur_close)
+            can_add = (
+                (side == 'long' and side_avg > cur_price) or
+                (side == 'short' and side_avg < cur_price)
+            )
 
-        try:
-            msg_list = await self.post_trade_hedge(order_list)
+        if can_add:
+            def calc_max_mult(roe):
+                if roe < -50:
+                    return 30
+                if roe < -40:
+                    return 25
+                if roe < -30:
+                    return 20
+                if roe < -20:
+                    return 15
+                return 0
+
+            max_mult = calc_max_mult(side_roe)
+            if max_mult > 0:
+                pos_list = self.trader.get_side_info(target_symbol, side, 'position_list')
+                sum_pos = sum(pos_list)
+                for mult in range(max_mult, 0, -1):
+                    adjusted_trade_vol = (mult / 10.0) * sum_pos
+                    if side_buy_cnt + adjusted_trade_vol <= max_buy_cnt:
+                        trade_vol = adjusted_trade_vol
+                        break
+
+            order = await self.market_order_hedge(
+                target_symbol,
+                side,
+                'open',
+                vol=min_vol * trade_vol,
+            )
+            self.trader.update_side_pos_list(target_symbol, side, trade_vol)
+            order_list.append(
+                self.build_order_entry(
+                    target_symbol,
+                    order,
+                    f'open_{side}',
+                    trade_vol,
+                    cur_time,
+                    side=side,
+                    action='open',
+                )
+            )
+            return order_list
 
-            for msg in msg_list:
-                await self.post_message(msg)
-                self.sleep(0.1)
-
-            msg = await self.update_positions_hedge()
-            await self.post_message(msg)
-            self.sleep(1)
-        except (telegram.error.NetworkError, telegram.error.BadRequest, telegram.error.TimedOut):
-            print(datetime.now(timezone('Asia/Seoul')).strftime("%m/%d/%Y, %H:%M:%S"))
-            print('Network 관련 에러 발생!\nBot 재시작!')
-            print(traceback.format_exc())
-        except Exception:
-            print(datetime.now(timezone('Asia/Seoul')).strftime("%m/%d/%Y, %H:%M:%S"))
-            print('Other Error Raised!')
-            print(traceback.format_exc())
-            del self.api
-            self.setup_api()
+        order_list.append(self.build_order_entry(target_symbol, None, None, trade_vol, cur_time))
+        return order_list
 
     async def post_trade_hedge(self, order_list):
         msg_list = []
 
+        # 체결 조회는 미확인 주문만 묶어서 진행하고, 상태 반영은 주문 순서대로 처리
+        placed = [
+            entry for entry in order_list
+            if entry['order'] is not None and entry['trade_type'] is not None
+        ]
+        fills = await self.confirm_fills([
+            (entry['target_symbol'], entry['order']) for entry in placed
+        ])
+        fill_map = {id(entry): fill for entry, fill in zip(placed, fills)}
+
         for entry in order_list:
             order = entry['order']
             if order is None or entry['trade_type'] is None:
@@ -1267,147 +1990,188 @@ class Bot():
             action = entry['action']
             trade_vol = entry['trade_vol']
             cur_time = entry['cur_time']
-            order_info = await self.fetch_order(target_symbol, order['id'])
-            self.sleep(1)
+            order_info = fill_map[id(entry)]
+            if order_info is None:
+                msg_list.append(self.unconfirmed_fill_msg(target_symbol, order))
+                await self.update_positions_hedge(owned=(target_symbol,))
+                continue
+            # 로컬 상태를 직접 바꾸므로 다음 update_positions_hedge 에서 반드시 재계산
+            self.reconciler.invalidate(target_symbol)
 
             now_str = datetime.now(timezone('Asia/Seoul')).strftime("%m/%d/%Y, %H:%M:%S")
-            round_num = self.trader.get_info(target_symbol, key='round_num')
-            filled_vol = round(float(order_info['amount']) / self.trader.get_info(target_symbol, key='map_vol'), round_num)
+            trader = self.trader
+            state = trader.symbol_state(target_symbol)
+            round_num = state.round_num
+            precision = state.precision
+            filled_vol = round(float(order_info['amount']) / state.map_vol, round_num)
             filled_price = float(order_info['price'])
 
             if action == 'open':
-                cur_buy_cnt = self.trader.get_side_info(target_symbol, side, 'buy_cnt')
-                self.trader.update_side_info(target_symbol, side, 'buy_cnt', cur_buy_cnt + trade_vol)
-                self.trader.update_side_info(target_symbol, side, 'buy_time', cur_time)
-                await self.update_positions_hedge()
-                self.set_balance()
+                trader.update_side_info(target_symbol, side, 'buy_cnt', state.positions[side].buy_cnt + trade_vol)
+                trader.update_side_info(target_symbol, side, 'buy_time', cur_time)
+                await self.update_positions_hedge(owned=(target_symbol,))
+                await self.set_balance()
+                # update_positions_hedge 에서 SideState 가 교체될 수 있으므로 다시 조회
+                side_state = state.positions[side]
                 trade_chat = (
                     f"현재 시간 : {now_str}\n"
                     f"[{self.side_label(side)} 진입 - {target_symbol.split('/')[0].upper()}] "
                     f"- 수량 : {filled_vol:.{round_num}f}\n"
-                    f"평균 진입 가격 : {filled_price:.{self.trader.get_info(target_symbol, key='precision')}f}\n"
+                    f"평균 진입 가격 : {filled_price:.{precision}f}\n"
                     f"현재 보유 수량 : "
-                    f"[{self.trader.get_side_belong_vol(target_symbol, side, False):,.{round_num}f}/"
-                    f"{self.trader.get_buy_vol(target_symbol) * self.trader.get_info(target_symbol, key='max_buy_cnt'):,.{round_num}f}] "
-                    f"[{self.trader.get_side_info(target_symbol, side, 'buy_cnt')}/{self.trader.get_info(target_symbol, key='max_buy_cnt')}]\n"
+                    f"[{side_state.amt:,.{round_num}f}/"
+                    f"{trader.get_buy_vol(target_symbol) * state.max_buy_cnt:,.{round_num}f}] "
+                    f"[{side_state.buy_cnt}/{state.max_buy_cnt}]\n"
                 )
-                await self.trader.save_info()
+                await trader.save_info()
                 msg_list.append(trade_chat)
                 continue
 
-            total_profit = self.trader.calc_side_profit(target_symbol, side, filled_price, filled_vol)
+            total_profit = trader.calc_side_profit(target_symbol, side, filled_price, filled_vol)
             ratio = abs(total_profit) / await self.get_balance()
-            cum_profit = self.trader.get_info(None, key='cum_profit')
-            cum_pnl = self.trader.get_info(None, key='cum_pnl')
-            avg_entry_price = self.trader.get_side_info(target_symbol, side, 'avg_buy_price')
+            avg_entry_price = state.positions[side].avg_buy_price
 
-            self.trader.update(None, key='tot_cnt', value=self.trader.get_info(None, key='tot_cnt') + 1)
+            trader.update(None, key='tot_cnt', value=trader.tot_cnt + 1)
             if total_profit < 0:
                 ratio = -ratio
                 profit_type = 'LOSS'
             else:
-                self.trader.update(None, key='win_cnt', value=self.trader.get_info(None, key='win_cnt') + 1)
+                trader.update(None, key='win_cnt', value=trader.win_cnt + 1)
                 profit_type = 'PROFIT'
 
-            self.trader.update_side_info(target_symbol, side, 'sell_time', cur_time)
-            self.trader.update(None, key='cum_profit', value=cum_profit + total_profit)
-            self.trader.update(None, key='cum_pnl', value=cum_pnl + ratio)
-            await self.update_positions_hedge()
-            self.set_balance()
+            trader.update_side_info(target_symbol, side, 'sell_time', cur_time)
+            trader.update(None, key='cum_profit', value=trader.cum_profit + total_profit)
+            trader.update(None, key='cum_pnl', value=trader.cum_pnl + ratio)
+            await self.update_positions_hedge(owned=(target_symbol,))
+            await self.set_balance()
 
             trade_chat = (
                 f"현재 시간 : {now_str}\n"
                 f"[{self.side_label(side)} 청산 - {target_symbol.split('/')[0].upper()}] - [{profit_type}]\n"
-                f"평균 진입 가격 : {avg_entry_price:.{self.trader.get_info(target_symbol, key='precision')}f}\n"
+                f"평균 진입 가격 : {avg_entry_price:.{precision}f}\n"
                 f"청산 수량 : {filled_vol:.{round_num}f}\n"
-                f"남은 수량 : {self.trader.get_side_belong_vol(target_symbol, side, False):.{round_num}f}\n"
-                f"평균 청산 가격 : {filled_price:.{self.trader.get_info(target_symbol, key='precision')}f}\n"
+                f"남은 수량 : {state.positions[side].amt:.{round_num}f}\n"
+                f"평균 청산 가격 : {filled_price:.{precision}f}\n"
                 f"현재 거래 이익 : {total_profit:,.2f} USDT [{ratio * 100:,.2f}%]\n"
-                f"누적 거래 이익 : {self.trader.get_info(None, key='cum_profit'):,.2f} USDT "
-                f"[{self.trader.get_info(None, key='cum_pnl') * 100:,.2f}%]\n"
+                f"누적 거래 이익 : {trader.cum_profit:,.2f} USDT "
+                f"[{trader.cum_pnl * 100:,.2f}%]\n"
             )
             await self.trader.save_info()
             msg_list.append(trade_chat)
 
         return msg_list
 
-    async def update_positions_hedge(self):
+    async def update_positions_hedge(self, owned=()):
+        # owned: 호출자가 이미 lock 을 잡고 있는 심볼 (post_trade_hedge 에서 자기 심볼 재계산용)
         old_balance = self.trader.get_info(None, 'balance')
-        positions = self.api.fetch_positions()
-        check = False
+        positions, _ = await self.fetch_positions()
         msg = None
 
-        self.set_balance()
+        await self.set_balance()
 
-        for target_symbol in self.trader.get_target_symbols():
-            found = {'long': False, 'short': False}
-            div_num = float(self.trader.get_info(target_symbol, key='map_vol'))
+        target_symbols = self.trader.get_target_symbols()
+        groups = self.reconciler.group(positions)
+        fingerprints = {
+            target_symbol: self.position_fingerprint(target_symbol, groups)
+            for target_symbol in target_symbols
+        }
+        # 거래소 포지션이 직전 cycle 과 같은 심볼은 재계산 생략
+        # 주문 처리 중(lock 사용 중)인 다른 심볼은 상태를 덮어쓰지 않고 다음 cycle 로 미룸
+        # (fingerprint 를 commit 하지 않으므로 다음 cycle 에 다시 재계산)
+        touched = [
+            target_symbol for target_symbol in target_symbols
+            if self.reconciler.changed(target_symbol, fingerprints[target_symbol])
+            and (target_symbol in owned or not self.get_symbol_lock(target_symbol).locked())
+        ]
 
-            for pos in positions:
-                pos_symbol = pos.get('symbol')
-                if pos_symbol != target_symbol:
-                    continue
+        # reconcile 은 await 없이 끝나므로 중간에 다른 심볼 주문 처리가 끼어들 수 없음
+        check = False
+        for target_symbol in touched:
+            if self.reconcile_hedge_symbol(target_symbol, groups.get(target_symbol, [])):
+                check = True
+            self.reconciler.commit(target_symbol, fingerprints[target_symbol])
+        self.reconciler.finish_cycle(len(target_symbols), len(touched))
 
-                side = self.get_position_side(pos)
-                if side not in ('long', 'short'):
-                    continue
+        if check or old_balance != await self.get_balance():
+            if check:
+                msg = await self.status_msg_hedge()
+            await self.set_balance()
+            return msg
 
-                n_contracts = float(pos.get('contracts') or 0)
-                if n_contracts <= 0:
-                    continue
+        return msg
 
-                found[side] = True
-                entry_price = float(pos.get('entryPrice') or pos.get('entry_price') or 0)
-                belong_vol = n_contracts / div_num
-                prev_amt = self.trader.get_side_belong_vol(target_symbol, side, False)
+    def position_fingerprint(self, target_symbol, groups):
+        state = self.trader.symbol_state(target_symbol)
+        return self.reconciler.fingerprint(
+            groups.get(target_symbol, []),
+            params=(state.map_vol, state.min_vol, state.max_buy_cnt),
+        )
 
-                self.trader.update_side_info(target_symbol, side, 'avg_buy_price', entry_price)
-                self.trader.update_side_info(target_symbol, side, 'amt', belong_vol)
+    def reconcile_hedge_symbol(self, target_symbol, positions):
+        check = False
+        found = {'long': False, 'short': False}
+        div_num = float(self.trader.get_info(target_symbol, key='map_vol'))
 
-                if abs(prev_amt - belong_vol) > 1e-12:
-                    check = True
+        for pos in positions:
+            pos_symbol = pos.get('symbol')
+            if pos_symbol != target_symbol:
+                continue
 
-                cnt = self.trader.recal_side_pos_list(target_symbol, side, belong_vol)
-                self.trader.update_side_info(target_symbol, side, 'buy_cnt', cnt)
+            side = self.get_position_side(pos)
+            if side not in ('long', 'short'):
+                continue
 
-            for side in ('long', 'short'):
-                if found[side]:
-                    continue
-                if self.trader.get_side_belong_vol(target_symbol, side, False) != 0:
-                    check = True
-                self.trader.reset_side_info(target_symbol, side)
-
-            long_amt = self.trader.get_side_belong_vol(target_symbol, 'long', False)
-            short_amt = self.trader.get_side_belong_vol(target_symbol, 'short', False)
-            if long_amt > 0 and short_amt > 0:
-                summary_pos = 'hedge'
-            elif long_amt > 0:
-                summary_pos = 'long'
-            elif short_amt > 0:
-                summary_pos = 'short'
-            else:
-                summary_pos = None
+            n_contracts = float(pos.get('contracts') or 0)
+            if n_contracts <= 0:
+                continue
 
-            self.trader.update(target_symbol, key='position', value=summary_pos)
-            self.trader.update(target_symbol, key='amt', value=long_amt + short_amt)
-            self.trader.update(target_symbol, key='buy_cnt', value=(
-                self.trader.get_side_info(target_symbol, 'long', 'buy_cnt') +
-                self.trader.get_side_info(target_symbol, 'short', 'buy_cnt')
-            ))
+            found[side] = True
+            entry_price = float(pos.get('entryPrice') or pos.get('entry_price') or 0)
+            belong_vol = n_contracts / div_num
+            prev_amt = self.trader.get_side_belong_vol(target_symbol, side, False)
 
-        if check or old_balance != await self.get_balance():
-            if check:
-                msg = await self.status_msg_hedge()
-            self.set_balance()
-            return msg
+            self.trader.update_side_info(target_symbol, side, 'avg_buy_price', entry_price)
+            self.trader.update_side_info(target_symbol, side, 'amt', belong_vol)
 
-        return msg
+            if abs(prev_amt - belong_vol) > 1e-12:
+                check = True
+
+            cnt = self.trader.recal_side_pos_list(target_symbol, side, belong_vol)
+            self.trader.update_side_info(target_symbol, side, 'buy_cnt', cnt)
+
+        for side in ('long', 'short'):
+            if found[side]:
+                continue
+            if self.trader.get_side_belong_vol(target_symbol, side, False) != 0:
+                check = True
+            self.trader.reset_side_info(target_symbol, side)
+
+        long_amt = self.trader.get_side_belong_vol(target_symbol, 'long', False)
+        short_amt = self.trader.get_side_belong_vol(target_symbol, 'short', False)
+        if long_amt > 0 and short_amt > 0:
+            summary_pos = 'hedge'
+        elif long_amt > 0:
+            summary_pos = 'long'
+        elif short_amt > 0:
+            summary_pos = 'short'
+        else:
+            summary_pos = None
+
+        self.trader.update(target_symbol, key='position', value=summary_pos)
+        self.trader.update(target_symbol, key='amt', value=long_amt + short_amt)
+        self.trader.update(target_symbol, key='buy_cnt', value=(
+            self.trader.get_side_info(target_symbol, 'long', 'buy_cnt') +
+            self.trader.get_side_info(target_symbol, 'short', 'buy_cnt')
+        ))
+
+        return check
 
     async def start_msg_hedge(self):
-        total_sum, cur_balance, unpnl = self.get_cur_balance()
+        total_sum, cur_balance, unpnl = await self.get_cur_balance()
         text = "============================================\n"
         text += '현재 시간: {}\n'.format(datetime.now(timezone('Asia/Seoul')).strftime("%m/%d/%Y, %H:%M:%S"),)
         text += "[자동 거래 시작] USER : [{}]\n".format(self.trader.get_info(None, 'user_name'))
+        text += self.boot_text()
         text += "현재 모드 : [hedge]\n"
         text += "현재 계좌\nFree: [{:.2f}/{:.2f} USDT]\n".format(
             self.trader.get_info(None, 'balance'),
@@ -1425,7 +2189,7 @@ class Bot():
         return text
 
     async def status_msg_hedge(self):
-        total_sum, cur_balance, unpnl = self.get_cur_balance()
+        total_sum, cur_balance, unpnl = await self.get_cur_balance()
         metrics = await self.check_positions_hedge()
         text = "============================================\n"
         text += '[거래 중]\n' if self.go_trade else '[거래 일시중지]\n'
@@ -1,13 +1,16 @@
 import os
 import json
-import aiofiles
-import asyncio
 import math
+import asyncio
 import traceback
 from pytz import timezone
 from datetime import datetime
-import numpy as np
 from core.misc import read_config_okx
+from core.persistence import StateWriter
+from core.journal import StateJournal
+from core.state import SideState, SymbolState
+from core.ladder import rebuild_ladder
+from core.ratelimit import DEFAULT_LIMITS
 
 
 class UserData():
@@ -21,6 +24,7 @@ class UserData():
         self.config = config
         self.config['OKX'].setdefault('POSITION_MODE', 'one_way')
         self.config['OKX'].setdefault('ENVIRONMENT', 'live')
+        self.config['OKX'].setdefault('SNAPSHOT_TTL', 2.0)
 
         self.data = {}
         self.user_name = self.config['USER']['NAME']
@@ -31,44 +35,45 @@ class UserData():
         self.win_cnt = 0
         self.tot_cnt = 0
         self.commition = 0.05
+        self.journal_seq = 0
+        self.journal = None
+        self.writer = None
 
         for target in self.config['OKX']['TARGET']:
-            if target not in self.data:
-                self.data[target] = {}
-
             ticker = target.split('/')[0]
             options = self.config['TRADE_OPTION'][ticker]
 
-            for k, v in options.items():
-                self.data[target][k] = v
-            self.data[target]['position'] = None
-            self.data[target]['amt'] = 0
-            self.data[target]['buy_cnt'] = 0
-            self.data[target]['max_buy_cnt'] = 500
-            self.data[target]['avg_buy_price'] = 0
-            self.data[target]['position_list'] = []
-            self.data[target]['buy_time'] = 0
-            self.data[target]['sell_time'] = 0
-            self.data[target]['short_signal_count'] = 0
-            self.data[target]['positions'] = {
-                'long': self._empty_side_state(),
-                'short': self._empty_side_state(),
-            }
+            # 코인 설정 + 포지션 상태 (SymbolState 기본값)
+            self.data[target] = SymbolState.from_dict(options)
 
         self.load_info()
 
-        for target in self.config['OKX']['TARGET']:
-            self.data[target]['new_buy_roe'] = float(self.data[target]['leverage'])
-
-    def _empty_side_state(self):
-        return {
-            'amt': 0,
-            'buy_cnt': 0,
-            'avg_buy_price': 0,
-            'position_list': [],
-            'buy_time': 0,
-            'sell_time': 0,
-        }
+        # snapshot(SAVE_PATH) 이후의 변경은 journal 에서 replay
+        persist = self.config.get('PERSIST', {})
+        journal = StateJournal(
+            persist.get('JOURNAL_PATH', f"{self.config['SAVE_PATH']}.journal"),
+            start_seq=self.journal_seq,
+        )
+        replayed = self.replay_journal(journal)
+        self._prune_segment = None
+        self.writer = StateWriter(
+            self.config['SAVE_PATH'],
+            self.snapshot_info,
+            interval=float(persist.get('INTERVAL', 60.0)),
+            max_mutations=int(persist.get('MAX_MUTATIONS', 500)),
+            compact=bool(persist.get('COMPACT', False)),
+            after_write=self._prune_journal,
+        )
+        self.journal = journal
+        if replayed:
+            # replay 한 내용은 다음 snapshot 에 포함시켜 journal 을 정리
+            self.writer.mark_dirty()
+
+        for state in self.data.values():
+            state.new_buy_roe = float(state.leverage)
+
+    def symbol_state(self, target_symbol):
+        return self.data[target_symbol]
 
     def get_target_symbols(self):
         return self.config['OKX']['TARGET']
@@ -82,237 +87,137 @@ class UserData():
     def is_hedge_mode(self):
         return self.get_position_mode() == 'hedge'
 
+    def get_snapshot_ttl(self):
+        return float(self.config['OKX'].get('SNAPSHOT_TTL', 2.0))
+
+    def get_webhook_max_pending(self):
+        return int(self.config.get('WEBHOOK', {}).get('MAX_PENDING', 100))
+
+    def get_webhook_coalesce_window(self):
+        # ms 단위 설정 -> 초
+        return float(self.config.get('WEBHOOK', {}).get('COALESCE_MS', 0)) / 1000
+
+    def get_stream_config(self):
+        stream = self.config.get('STREAM', {})
+        return {
+            'enabled': bool(stream.get('ENABLED', True)),
+            'resync_interval': float(stream.get('RESYNC_INTERVAL', 300)),
+            'coalesce': float(stream.get('COALESCE', 0.2)),
+            'price_max_age': float(stream.get('PRICE_MAX_AGE', 5.0)),
+        }
+
+    def get_exchange_config(self):
+        exchange = self.config.get('EXCHANGE', {})
+        return {
+            'markets_ttl': float(exchange.get('MARKETS_REFRESH', 3600)),
+            'retry_delays': tuple(float(d) for d in exchange.get('RETRY_DELAYS', (0.5, 1.0, 2.0))),
+            'pool_size': int(exchange.get('POOL_SIZE', 20)),
+            'keepalive': float(exchange.get('KEEPALIVE', 60)),
+            # 파일 이름의 {env} 는 live / demo 로 바뀜 (환경마다 캐시 파일 분리)
+            'markets_cache': exchange.get('MARKETS_CACHE', 'markets_okx_{env}.json').format(env=self.get_environment()),
+            'cache_key': self.get_environment(),
+        }
+
+    def get_rate_limit_config(self):
+        # RATE_LIMIT: {TRADE: [초당 요청 수, burst], ACCOUNT: [...], PUBLIC: [...]}
+        limits = dict(DEFAULT_LIMITS)
+        for endpoint, value in self.config.get('RATE_LIMIT', {}).items():
+            rate, burst = value
+            limits[endpoint.lower()] = (float(rate), int(burst))
+        return limits
+
+    def _record(self, op, *args):
+        # 변경 한 건 = journal 한 줄, snapshot 은 StateWriter 가 주기적으로 압축
+        if self.journal is None:
+            return
+        self.journal.append(op, *args)
+        self.writer.mark_dirty()
+
+    @staticmethod
+    def _unchanged(current, value):
+        # list / dict 는 제자리 수정됐을 수 있으므로 항상 기록
+        if isinstance(value, (list, dict)):
+            return False
+        return type(current) is type(value) and current == value
+
     def update(self, target_symbol, key, value=None):
         assert key is not None, f"{target_symbol} - Error! Key shouldn't None!"
 
         if target_symbol is None:
+            if hasattr(self, key) and self._unchanged(getattr(self, key), value):
+                return
             setattr(self, key, value)
         else:
-            assert key in self.data[target_symbol], f"{target_symbol} - Error! Key Not Founded"
-            self.data[target_symbol][key] = value
+            state = self.data[target_symbol]
+            assert key in state, f"{target_symbol} - Error! Key Not Founded"
+            if self._unchanged(state[key], value):
+                return
+            state[key] = value
+        self._record('set', target_symbol, key, value)
 
     def get_info(self, target_symbol, key):
         assert key is not None, f"{target_symbol} | {key} - Error! Key shouldn't None!"
 
         if target_symbol is None:
             return getattr(self, key)
-        else:
-            assert key in self.data[target_symbol], f"{target_symbol} | {key}  - Error! Key Not Founded"
+        try:
             return self.data[target_symbol][key]
+        except KeyError:
+            raise AssertionError(f"{target_symbol} | {key}  - Error! Key Not Founded") from None
 
     def update_pos_list(self, target_symbol, qty):
-        self.data[target_symbol]['position_list'].append(qty)
+        self.data[target_symbol].position_list.append(qty)
+        self._record('push', target_symbol, qty)
 
     def remove_pos_list(self, target_symbol):
-        return self.data[target_symbol]['position_list'].pop()
+        qty = self.data[target_symbol].position_list.pop()
+        self._record('pop', target_symbol)
+        return qty
 
     def get_side_info(self, target_symbol, side, key):
-        return self.data[target_symbol]['positions'][side][key]
+        return getattr(self.data[target_symbol].positions[side], key)
 
     def update_side_info(self, target_symbol, side, key, value):
-        self.data[target_symbol]['positions'][side][key] = value
+        side_state = self.data[target_symbol].positions[side]
+        if self._unchanged(getattr(side_state, key), value):
+            return
+        setattr(side_state, key, value)
+        self._record('side_set', target_symbol, side, key, value)
 
     def reset_side_info(self, target_symbol, side):
-        self.data[target_symbol]['positions'][side] = self._empty_side_state()
+        self.data[target_symbol].positions[side] = SideState()
+        self._record('side_reset', target_symbol, side)
 
     def update_side_pos_list(self, target_symbol, side, qty):
-        self.data[target_symbol]['positions'][side]['position_list'].append(qty)
+        self.data[target_symbol].positions[side].position_list.append(qty)
+        self._record('side_push', target_symbol, side, qty)
 
     def remove_side_pos_list(self, target_symbol, side):
-        pos_list = self.data[target_symbol]['positions'][side]['position_list']
+        pos_list = self.data[target_symbol].positions[side].position_list
         if not pos_list:
             return 0
-        return pos_list.pop()
+        qty = pos_list.pop()
+        self._record('side_pop', target_symbol, side)
+        return qty
 
     def recal_pos_list(self, target_symbol, belong_vol):
-        # -----------------------------
-        # 기본 정보 로드
-        # -----------------------------
-        position_list = []
-        prev_positions = self.get_info(target_symbol, key='position_list')
-        max_cnt = self.get_info(target_symbol, key='max_buy_cnt')
-        buy_vol = self.get_buy_vol(target_symbol)
-        min_vol = self.get_info(target_symbol, key='min_vol')
-
-        if buy_vol <= 0:
-            self.update(target_symbol, key='position_list', value=[])
-            return 0
-
-        # Rebuild buy count from the actual held size instead of relying on
-        # internally tracked order history.
-        real_cnt = int(round(belong_vol / buy_vol))
-        if belong_vol > 0 and real_cnt == 0:
-            real_cnt = 1
-
-        # -----------------------------
-        # last_qty 계산
-        # -----------------------------
-        buy_ratio = real_cnt / max_cnt
-
-        if buy_ratio > 0.5:
-            last_qty = real_cnt // 2
-        elif buy_ratio > 0.25:
-            last_qty = real_cnt // 3
-        else:
-            last_qty = 0
-
-        base_cnt = real_cnt - last_qty if last_qty > 0 else real_cnt
-
-        # -----------------------------
-        # 공통 유틸: 4단위 분할
-        # -----------------------------
-        def split_by_4(cnt):
-            result = []
-            while cnt > 0:
-                if cnt >= 4:
-                    result.append(4)
-                    cnt -= 4
-                else:
-                    result.append(cnt)
-                    break
-            return result
-
-        # -----------------------------
-        # 기존 포지션이 있는 경우
-        # -----------------------------
-        cum_cnt = 0
-
-        if prev_positions:
-            matched = False
-
-            for qty in prev_positions:
-                if matched:
-                    break
-
-                used = 0
-                for _ in range(int(qty)):
-                    if cum_cnt == base_cnt:
-                        matched = True
-                        break
-                    used += 1
-                    cum_cnt += 1
-
-                if matched:
-                    position_list.append(used)
-                    break
-                else:
-                    position_list.append(qty)
-
-            # 남은 수량 분배
-            remain = base_cnt - cum_cnt
-            if last_qty == 0 and remain > 0:
-                position_list.extend(split_by_4(remain))
-                cum_cnt += remain
-
-        # -----------------------------
-        # 기존 포지션이 없는 경우
-        # -----------------------------
-        else:
-            if base_cnt <= max_cnt:
-                position_list.extend(split_by_4(base_cnt))
-                cum_cnt = base_cnt
-            else:
-                position_list.extend(split_by_4(base_cnt))
-                cum_cnt = base_cnt
-
-        # -----------------------------
-        # last_qty 추가
-        # -----------------------------
-        if last_qty > 0:
-            position_list.append(last_qty)
-            cum_cnt += last_qty
-
-        # -----------------------------
-        # 결과 저장
-        # -----------------------------
-        self.update(target_symbol, key='position_list', value=position_list)
-
-        # -----------------------------
-        # 반환 cnt 보정
-        # -----------------------------
-        if cum_cnt > 0 and cum_cnt * buy_vol < belong_vol:
-            return max(real_cnt, int(cum_cnt))
-
-        return int(cum_cnt)
+        state = self.data[target_symbol]
+        position_list, cnt = rebuild_ladder(
+            belong_vol, self.get_buy_vol(target_symbol), state.max_buy_cnt, tuple(state.position_list)
+        )
+        # 매 poll 마다 같은 ladder 를 journal 에 쌓지 않도록 바뀐 경우만 기록
+        if list(position_list) != state.position_list:
+            self.update(target_symbol, key='position_list', value=list(position_list))
+        return cnt
 
     def recal_side_pos_list(self, target_symbol, side, belong_vol):
-        position_list = []
-        prev_positions = self.get_side_info(target_symbol, side, 'position_list')
-        max_cnt = self.get_info(target_symbol, key='max_buy_cnt')
-        buy_vol = self.get_buy_vol(target_symbol)
-
-        if buy_vol <= 0:
-            self.update_side_info(target_symbol, side, 'position_list', [])
-            return 0
-
-        real_cnt = int(round(belong_vol / buy_vol))
-        if belong_vol > 0 and real_cnt == 0:
-            real_cnt = 1
-
-        buy_ratio = real_cnt / max_cnt
-
-        if buy_ratio > 0.5:
-            last_qty = real_cnt // 2
-        elif buy_ratio > 0.25:
-            last_qty = real_cnt // 3
-        else:
-            last_qty = 0
-
-        base_cnt = real_cnt - last_qty if last_qty > 0 else real_cnt
-
-        def split_by_4(cnt):
-            result = []
-            while cnt > 0:
-                if cnt >= 4:
-                    result.append(4)
-                    cnt -= 4
-                else:
-                    result.append(cnt)
-                    break
-            return result
-
-        cum_cnt = 0
-
-        if prev_positions:
-            matched = False
-
-            for qty in prev_positions:
-                if matched:
-                    break
-
-                used = 0
-                for _ in range(int(qty)):
-                    if cum_cnt == base_cnt:
-                        matched = True
-                        break
-                    used += 1
-                    cum_cnt += 1
-
-                if matched:
-                    position_list.append(used)
-                    break
-                else:
-                    position_list.append(qty)
-
-            remain = base_cnt - cum_cnt
-            if last_qty == 0 and remain > 0:
-                position_list.extend(split_by_4(remain))
-                cum_cnt += remain
-
-        else:
-            position_list.extend(split_by_4(base_cnt))
-            cum_cnt = base_cnt
-
-        if last_qty > 0:
-            position_list.append(last_qty)
-            cum_cnt += last_qty
-
-        self.update_side_info(target_symbol, side, 'position_list', position_list)
-
-        if cum_cnt > 0 and cum_cnt * buy_vol < belong_vol:
-            return max(real_cnt, int(cum_cnt))
-
-        return int(cum_cnt)
+        state = self.data[target_symbol]
+        position_list, cnt = rebuild_ladder(
+            belong_vol, self.get_buy_vol(target_symbol), state.max_buy_cnt, tuple(state.positions[side].position_list)
+        )
+        if list(position_list) != state.positions[side].position_list:
+            self.update_side_info(target_symbol, side, 'position_list', list(position_list))
+        return cnt
 
     def get_telegram_id(self):
         return self.config['TELEGRAM']['ID']
@@ -322,7 +227,7 @@ class UserData():
 
     def calc_profit(self, target_symbol, filled_price, filled_vol):
         position = self.get_info(target_symbol, key='position')
-        avg_price = self.data[target_symbol]['avg_buy_price']
+        avg_price = self.data[target_symbol].avg_buy_price
 
         if position == 'long':
             diff = (filled_price - avg_price)
@@ -330,6 +235,11 @@ class UserData():
         elif position == 'short':
             diff = (avg_price - filled_price)
 
+        else:
+            # 포지션 정보가 이미 정리된 경우 (체결 전에 재계산됨) 손익 계산 불가
+            print(f'calc_profit | {target_symbol} has no position, profit is 0')
+            return 0
+
         profit = ((diff * filled_vol) * (1 - self.commition * 2)) # * self.leverage
         
         print('profit : ', profit, diff, filled_vol, self.commition)
@@ -351,43 +261,38 @@ class UserData():
         return profit
 
     def get_real_trade_vol(self, target_symbol, trade_vol):
-        min_vol = self.get_info(target_symbol, key='min_vol')
-        map_vol = self.get_info(target_symbol, key='map_vol')
+        state = self.data[target_symbol]
 
-        return min_vol / map_vol * trade_vol
+        return state.min_vol / state.map_vol * trade_vol
 
     def get_belong_vol(self, target_symbol, is_trade=True):
-        amt = self.get_info(target_symbol, key='amt')
-        map_vol = self.get_info(target_symbol, key='map_vol')
-        rnd_num = self.get_info(target_symbol, key='round_num')
+        state = self.data[target_symbol]
 
         if is_trade:
-            return round(amt * map_vol, rnd_num)
+            return round(state.amt * state.map_vol, state.round_num)
         else:
-            return amt
+            return state.amt
 
     def get_side_belong_vol(self, target_symbol, side, is_trade=True):
-        amt = self.get_side_info(target_symbol, side, 'amt')
-        map_vol = self.get_info(target_symbol, key='map_vol')
-        rnd_num = self.get_info(target_symbol, key='round_num')
+        state = self.data[target_symbol]
+        amt = state.positions[side].amt
 
         if is_trade:
-            return round(amt * map_vol, rnd_num)
+            return round(amt * state.map_vol, state.round_num)
         return amt
 
     def get_buy_vol(self, target_symbol):
-        min_vol = self.get_info(target_symbol, key='min_vol')
-        map_vol = self.get_info(target_symbol, key='map_vol')
+        state = self.data[target_symbol]
 
-        return min_vol / map_vol
+        return state.min_vol / state.map_vol
 
     def get_buy_vol_okx(self, target_symbol, position=None):
-        map_vol = self.get_info(target_symbol, key='map_vol')
+        state = self.data[target_symbol]
 
         if position == 'short':
-            return round(self.data[target_symbol]['buy_vol'] * map_vol/2, 1)
+            return round(state['buy_vol'] * state.map_vol/2, 1)
         else:
-            return round(self.data[target_symbol]['buy_vol'] * map_vol, 1)
+            return round(state['buy_vol'] * state.map_vol, 1)
 
     def load_info(self):
         if os.path.exists(self.config['SAVE_PATH']):
@@ -407,17 +312,7 @@ class UserData():
 
             print('Load info Success!')
 
-    async def save_info(self):
-        class NpEncoder(json.JSONEncoder):
-            def default(self, obj):
-                if isinstance(obj, np.integer):
-                    return int(obj)
-                if isinstance(obj, np.floating):
-                    return float(obj)
-                if isinstance(obj, np.ndarray):
-                    return obj.tolist()
-                return super(NpEncoder, self).default(obj)
-    
+    def dump_info(self):
         data = {}
 
         data['user_name'] = self.user_name
@@ -430,11 +325,56 @@ class UserData():
         data['commition'] = self.commition
 
         for t_coin in self.get_target_symbols():
-            data[t_coin] = {}
-            for k, v in self.data[t_coin].items():
-                data[t_coin][k] = v
-        
-        async with asyncio.Lock():
-            async with aiofiles.open(self.config['SAVE_PATH'], mode='w') as f:
-                await f.write(json.dumps(data, indent=4, cls=NpEncoder))
-                print('Save info Success!')
+            data[t_coin] = self.data[t_coin].to_dict()
+
+        return data
+
+    def replay_journal(self, journal):
+        ops = {
+            'set': self.update,
+            'push': self.update_pos_list,
+            'pop': self.remove_pos_list,
+            'side_set': self.update_side_info,
+            'side_reset': self.reset_side_info,
+            'side_push': self.update_side_pos_list,
+            'side_pop': self.remove_side_pos_list,
+        }
+        targets = self.get_target_symbols()
+        count = 0
+
+        for seq, op, target_symbol, *args in journal.records(after_seq=self.journal_seq):
+            if target_symbol is not None and target_symbol not in targets:
+                continue
+            try:
+                ops[op](target_symbol, *args)
+                count += 1
+            except Exception:
+                print(traceback.format_exc())
+                print('Error! journal replay', seq, op, target_symbol, args)
+
+        if count:
+            print(f'Replay journal Success! ({count})')
+        return count
+
+    def snapshot_info(self):
+        # snapshot 에 포함된 마지막 seq 를 같이 기록하고 journal 은 새 segment 로 넘김
+        seq, segment = self.journal.rotate()
+        self._prune_segment = segment
+        data = self.dump_info()
+        data['journal_seq'] = seq
+        return data
+
+    def _prune_journal(self):
+        if self._prune_segment is not None:
+            self.journal.prune(self._prune_segment)
+            self._prune_segment = None
+
+    async def save_info(self):
+        # 변경 내용은 이미 journal 에 기록됨 -> 거래 단위로 fsync 만 수행
+        # 전체 snapshot 은 StateWriter 가 주기적으로 압축해서 저장
+        await self.journal.sync()
+
+    async def close_info(self):
+        if await self.writer.close():
+            print('Save info Success!')
+        await asyncio.to_thread(self.journal.close)
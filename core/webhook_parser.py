@@ -0,0 +1,187 @@
+import json
+
+try:
+    import orjson
+except ImportError:  # 없으면 표준 json 으로 처리
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # 없으면 msgpack body 는 415
+    msgpack = None
+
+
+JSON_TYPES = ('application/json', 'text/json')
+MSGPACK_TYPES = ('application/msgpack', 'application/x-msgpack', 'application/vnd.msgpack')
+
+
+class UnsupportedFormat(ValueError):
+    pass
+
+
+class Alert():
+    """
+        TradingView alert 한 줄 파싱 결과
+        - 형식: action,ticker[,size,close][,key=value,...]
+        - action 은 소문자로 통일 (CSV / JSON / msgpack 모두)
+        - size / close 는 4개 이상 토큰일 때만 채워짐 (아니면 None)
+        - fields: 5번째 토큰부터의 key=value (key 는 소문자)
+        - JSON / msgpack body 면 action / symbol / size / close 외 나머지 key 가 fields (값 타입 유지)
+    """
+    __slots__ = ('action', 'symbol', 'size', 'close', 'fields', 'raw')
+
+    def __init__(self, action, symbol, size, close, fields, raw):
+        self.action = action
+        self.symbol = symbol
+        self.size = size
+        self.close = close
+        self.fields = fields
+        self.raw = raw
+
+    def __repr__(self):
+        return f'Alert({self.action!r}, {self.symbol!r}, {self.size!r}, {self.close!r}, {self.fields!r})'
+
+
+def parse_alert(text, min_tokens=2):
+    """
+        main.parse_webhook / hedge_strategy_v1 schema 공용 파서
+        - split 한 번 + 토큰당 strip 한 번으로 끝냄
+        - 앞 4개는 위치 인자 (비어 있어도 자리 유지), 그 뒤는 key=value 만 fields 에 담음 (빈 토큰 / '=' 없는 토큰은 무시)
+        - 토큰이 min_tokens 보다 적거나 action / ticker 가 비었거나 size / close 가 숫자가 아니면 ValueError
+            (예: 'buy,BTCUSDT.P,,65000' 은 size 가 비어 있으므로 거부)
+    """
+    positional = []
+    fields = {}
+    for token in text.split(','):
+        token = token.strip()
+        if len(positional) < 4:
+            positional.append(token)
+            continue
+        if not token:
+            continue
+        key, sep, value = token.partition('=')
+        if sep:
+            fields[key.strip().lower()] = value.strip()
+
+    if len(positional) < min_tokens or not positional[0] or not positional[1]:
+        raise ValueError(f'Invalid webhook payload: {text}')
+
+    if len(positional) > 3:
+        size = float(positional[2])
+        close = float(positional[3])
+    else:
+        size = close = None
+
+    return Alert(positional[0].lower(), positional[1], size, close, fields, text)
+
+
+def media_type(content_type):
+    return (content_type or '').split(';', 1)[0].strip().lower()
+
+
+def _load_structured(body, kind):
+    # JSON / msgpack body 를 python 값으로 (그 외 형식이면 None)
+    if kind in JSON_TYPES or kind.endswith('+json'):
+        try:
+            return orjson.loads(body) if orjson is not None else json.loads(body)
+        except ValueError as exc:
+            raise ValueError(f'Invalid JSON webhook payload: {exc}') from exc
+    if kind in MSGPACK_TYPES:
+        if msgpack is None:
+            raise UnsupportedFormat('msgpack webhook payloads need the msgpack package')
+        try:
+            return msgpack.unpackb(body, raw=False)
+        except Exception as exc:
+            raise ValueError(f'Invalid msgpack webhook payload: {exc}') from exc
+    return None
+
+
+def decode_body(body, content_type=None):
+    """
+        Content-Type 으로 body 형식 결정
+        - JSON (orjson, 없으면 json) / msgpack -> dict
+        - 그 외 (text/plain 등) -> 기존 CSV 문자열
+    """
+    data = _load_structured(body, media_type(content_type))
+    if data is None:
+        return body.decode('utf-8') if isinstance(body, bytes) else body
+
+    if not isinstance(data, dict):
+        raise ValueError('Webhook payload must be an object')
+    return data
+
+
+def _number(value, name):
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        raise ValueError(f'Invalid webhook {name}: {value!r}')
+    try:
+        return float(value)
+    except (TypeError, ValueError) as exc:
+        raise ValueError(f'Invalid webhook {name}: {value!r}') from exc
+
+
+def alert_from_mapping(data, raw=''):
+    """
+        JSON / msgpack object -> Alert
+        - action, symbol (또는 ticker) 필수, size / close 는 숫자 (없으면 None)
+        - 나머지 key 는 소문자로 fields 에 그대로 (값 타입 유지)
+    """
+    fields = {str(key).lower(): value for key, value in data.items()}
+    action = fields.pop('action', None)
+    symbol = fields.pop('symbol', None)
+    ticker = fields.pop('ticker', None)
+    symbol = symbol or ticker
+    if not isinstance(action, str) or not action.strip():
+        raise ValueError(f'Webhook payload needs an action: {raw}')
+    if not isinstance(symbol, str) or not symbol.strip():
+        raise ValueError(f'Webhook payload needs a symbol: {raw}')
+
+    size = _number(fields.pop('size', None), 'size')
+    close = _number(fields.pop('close', None), 'close')
+    return Alert(action.strip().lower(), symbol.strip(), size, close, fields, raw)
+
+
+def parse_body(body, content_type=None, min_tokens=2):
+    # /webhook, /hedge/webhook 공용: Content-Type 에 따라 JSON / msgpack / CSV 로 파싱
+    data = decode_body(body, content_type)
+    if isinstance(data, str):
+        return parse_alert(data, min_tokens)
+    if isinstance(body, bytes) and media_type(content_type) not in MSGPACK_TYPES:
+        raw = body.decode('utf-8', 'replace')
+    else:
+        raw = repr(data)
+    return alert_from_mapping(data, raw)
+
+
+def parse_batch_body(body, content_type=None, min_tokens=2):
+    """
+        /webhook/batch 용: 신호 여러 개를 한 body 로
+        - JSON / msgpack: 신호 list 또는 {"signals": [...]} (각 항목은 object 또는 CSV 문자열)
+        - 그 외: 한 줄에 CSV 신호 하나 (빈 줄 무시)
+        - 반환: 항목 순서대로 Alert, 파싱 실패한 항목은 ValueError (나머지는 그대로 처리)
+        - body 자체를 읽을 수 없으면 ValueError / UnsupportedFormat
+    """
+    data = _load_structured(body, media_type(content_type))
+    if data is None:
+        text = body.decode('utf-8') if isinstance(body, bytes) else body
+        data = [line for line in text.splitlines() if line.strip()]
+
+    if isinstance(data, dict):
+        data = data.get('signals')
+    if not isinstance(data, list):
+        raise ValueError('Batch webhook payload must be a list of signals')
+
+    alerts = []
+    for item in data:
+        try:
+            if isinstance(item, str):
+                alerts.append(parse_alert(item, min_tokens))
+            elif isinstance(item, dict):
+                alerts.append(alert_from_mapping(item, repr(item)))
+            else:
+                raise ValueError(f'Invalid batch webhook signal: {item!r}')
+        except ValueError as exc:
+            alerts.append(exc)
+    return alerts
@@ -0,0 +1,148 @@
+import time
+import asyncio
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFull(Exception):
+    pass
+
+
+class WebhookQueue():
+    """
+        Webhook 처리 큐
+        - 전체 대기 건수를 max_pending 으로 제한 (초과 시 QueueFull)
+        - 심볼(key)별 worker lane: 같은 심볼은 들어온 순서대로, 다른 심볼은 병렬 처리
+        - coalesce_window (초) > 0 이면 심볼별 첫 신호 도착 후 window 동안 들어온 같은 심볼 신호를 모아
+          merge(items) 결과만 처리 (기본: 마지막 신호 하나만 남김)
+        - 대기 건수 / 대기 시간 / 합쳐진 신호 수 지표 제공
+    """
+    def __init__(self, handler, max_pending=100, coalesce_window=0.0, merge=None):
+        self.handler = handler
+        self.max_pending = max_pending
+        self.coalesce_window = coalesce_window
+        self.merge = merge or (lambda items: items[-1:])
+        self.lanes = {}
+        self.workers = {}
+        self.pending = 0
+        self.started = 0
+        self.processed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.last_wait = 0.0
+        self.max_wait = 0.0
+        self.total_wait = 0.0
+        self.coalesced = 0
+        self.windows = 0
+
+    def submit(self, key, item):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise QueueFull(f'webhook queue is full ({self.pending}/{self.max_pending})')
+
+        lane = self.lanes.get(key)
+        if lane is None:
+            lane = asyncio.Queue()
+            self.lanes[key] = lane
+            self.workers[key] = asyncio.create_task(self._worker(key, lane))
+
+        lane.put_nowait((time.monotonic(), item))
+        self.pending += 1
+        return self.pending
+
+    def reserve(self, count):
+        """
+            lane 밖에서 바로 처리하는 신호 (/webhook/batch) 도 pending 한도에 포함
+            - 한도를 넘으면 QueueFull, 처리가 끝나면 release(count)
+        """
+        if self.pending + count > self.max_pending:
+            self.rejected += count
+            raise QueueFull(f'webhook queue is full ({self.pending}+{count}/{self.max_pending})')
+        self.pending += count
+        return self.pending
+
+    def release(self, count):
+        self.pending -= count
+        self.processed += count
+
+    async def _worker(self, key, lane):
+        carry = None
+        while True:
+            if carry is None:
+                carry = await lane.get()
+            enqueued_at, item = carry
+            carry = None
+            batch = [item]
+            if self.coalesce_window > 0:
+                delay = self.coalesce_window - (time.monotonic() - enqueued_at)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                # window 안에 도착한 신호만 합침 (그 뒤 신호는 다음 차례)
+                while carry is None and not lane.empty():
+                    entry = lane.get_nowait()
+                    if entry[0] - enqueued_at <= self.coalesce_window:
+                        batch.append(entry[1])
+                    else:
+                        carry = entry
+
+            wait = time.monotonic() - enqueued_at
+            self.started += 1
+            self.last_wait = wait
+            self.max_wait = max(self.max_wait, wait)
+            self.total_wait += wait
+
+            items = batch
+            if len(batch) > 1:
+                self.windows += 1
+                try:
+                    items = self.merge(batch)
+                except Exception:
+                    logger.exception('Webhook merge failed | key=%s', key)
+                self.coalesced += len(batch) - len(items)
+
+            try:
+                for item in items:
+                    try:
+                        await self.handler(item)
+                    except Exception:
+                        self.failed += 1
+                        logger.exception('Webhook worker failed | key=%s', key)
+            finally:
+                self.processed += len(batch)
+                self.pending -= len(batch)
+                for _ in batch:
+                    lane.task_done()
+
+    async def join(self):
+        for lane in list(self.lanes.values()):
+            await lane.join()
+
+    async def close(self):
+        for task in self.workers.values():
+            task.cancel()
+        await asyncio.gather(*self.workers.values(), return_exceptions=True)
+        self.workers.clear()
+        self.lanes.clear()
+
+    def metrics(self):
+        avg_wait = self.total_wait / self.started if self.started else 0.0
+        return {
+            'pending': self.pending,
+            'max_pending': self.max_pending,
+            'lanes': {key: lane.qsize() for key, lane in self.lanes.items()},
+            'processed': self.processed,
+            'failed': self.failed,
+            'rejected': self.rejected,
+            'coalesce': {
+                'window_ms': round(self.coalesce_window * 1000, 3),
+                'windows': self.windows,
+                'coalesced': self.coalesced,
+            },
+            'wait_ms': {
+                'last': round(self.last_wait * 1000, 3),
+                'avg': round(avg_wait * 1000, 3),
+                'max': round(self.max_wait * 1000, 3),
+            },
+        }
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import bisect
+from collections import deque
+from typing import Iterable
+
+
+class DedupeIndex:
+    """Recent dedupe keys held in a ring of per-minute buckets.
+
+    Lookups go through a key -> created_at map, and expiry drops whole
+    buckets from the old end of the ring, so both stay O(1) per key.
+    """
+
+    def __init__(self, bucket_seconds: int = 60):
+        self.bucket_seconds = bucket_seconds
+        self._seen: dict[str, int] = {}
+        self._buckets: dict[int, set[str]] = {}
+        self._order: deque[int] = deque()
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._seen
+
+    def seen_since(self, key: str, cutoff: int) -> bool:
+        created_at = self._seen.get(key)
+        return created_at is not None and created_at >= cutoff
+
+    def add(self, key: str, created_at: int) -> None:
+        self.discard(key)
+        bucket_id = created_at // self.bucket_seconds
+        bucket = self._buckets.get(bucket_id)
+        if bucket is None:
+            bucket = self._buckets[bucket_id] = set()
+            if not self._order or self._order[-1] < bucket_id:
+                self._order.append(bucket_id)
+            else:
+                # Only reached for out-of-order timestamps, e.g. during bulk reload.
+                order = list(self._order)
+                bisect.insort(order, bucket_id)
+                self._order = deque(order)
+        bucket.add(key)
+        self._seen[key] = created_at
+
+    def discard(self, key: str) -> None:
+        created_at = self._seen.pop(key, None)
+        if created_at is None:
+            return
+        bucket = self._buckets.get(created_at // self.bucket_seconds)
+        if bucket is not None:
+            bucket.discard(key)
+
+    def expire(self, cutoff: int) -> int:
+        """Drop every bucket that ends before ``cutoff``; returns the number of keys removed."""
+        removed = 0
+        cutoff_bucket = cutoff // self.bucket_seconds
+        while self._order and self._order[0] < cutoff_bucket:
+            keys = self._buckets.pop(self._order.popleft())
+            for key in keys:
+                self._seen.pop(key, None)
+            removed += len(keys)
+        return removed
+
+    def load(self, rows: Iterable[tuple[str, int]]) -> None:
+        for key, created_at in sorted(rows, key=lambda row: row[1]):
+            self.add(key, int(created_at))
@@ -2,9 +2,11 @@ from __future__ import annotations
 
 import hashlib
 import time
-from dataclasses import dataclass, field
+from dataclasses import asdict, dataclass, field
 from typing import Any
 
+from core.webhook_parser import Alert, parse_alert, parse_body
+
 from .config import normalize_symbol
 
 
@@ -27,59 +29,57 @@ class WebhookPayload:
     timestamp: int = field(default_factory=lambda: int(time.time()))
     raw: str = ""
     extras: dict[str, Any] = field(default_factory=dict)
+    # computed once when the payload is built; the fields above are not changed afterwards
+    dedupe_key: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        key = (
+            f"{self.action}|{self.symbol}|{self.size:.8f}|{self.close:.8f}|{self.regime}|{self.role}|"
+            f"{self.hedge_ratio:.4f}|{self.timeframe}|{self.strategy_id}|{self.timestamp // 60}"
+        )
+        self.dedupe_key = hashlib.sha256(key.encode("utf-8")).hexdigest()
 
-    @property
-    def dedupe_key(self) -> str:
-        parts = [
-            self.action,
-            self.symbol,
-            f"{self.size:.8f}",
-            f"{self.close:.8f}",
-            self.regime,
-            self.role,
-            f"{self.hedge_ratio:.4f}",
-            self.timeframe,
-            self.strategy_id,
-            str(self.timestamp // 60),
-        ]
-        return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
-
-
-def _parse_key_value(tokens: list[str]) -> dict[str, str]:
-    extras: dict[str, str] = {}
-    for token in tokens:
-        if "=" not in token:
-            continue
-        key, value = token.split("=", 1)
-        extras[key.strip().lower()] = value.strip()
-    return extras
+    def to_dict(self) -> dict[str, Any]:
+        # dedupe_key is derived, keep it out of the persisted event payload
+        data = asdict(self)
+        del data["dedupe_key"]
+        return data
 
 
 def parse_webhook_payload(raw_text: str) -> WebhookPayload:
-    tokens = [token.strip() for token in raw_text.split(",") if token.strip()]
-    if len(tokens) < 4:
-        raise ValueError(f"Invalid webhook payload: {raw_text}")
+    return payload_from_alert(parse_alert(raw_text, min_tokens=4))
+
+
+def parse_webhook_body(body: bytes, content_type: str | None = None) -> WebhookPayload:
+    """Parse a webhook body by content type: JSON / msgpack objects or the legacy CSV line."""
+    return payload_from_alert(parse_body(body, content_type, min_tokens=4))
+
+
+def payload_from_alert(alert: Alert) -> WebhookPayload:
+    if alert.size is None or alert.close is None:
+        raise ValueError(f"Webhook payload needs size and close: {alert.raw}")
 
-    action = tokens[0].lower()
+    action = alert.action.lower()
     if action not in VALID_ACTIONS:
         raise ValueError(f"Unsupported action: {action}")
 
-    symbol = normalize_symbol(tokens[1])
-    size = float(tokens[2])
-    close = float(tokens[3])
-    extras = _parse_key_value(tokens[4:])
+    symbol = normalize_symbol(alert.symbol)
+    size = alert.size
+    close = alert.close
+    extras = alert.fields
 
-    regime = extras.get("regime", "unknown").lower()
+    # JSON / msgpack values keep their types, so normalise them to the CSV string forms
+    regime = str(extras.get("regime", "unknown")).lower()
     if regime not in VALID_REGIMES:
         regime = "unknown"
 
-    role = extras.get("role", "main").lower()
+    role = str(extras.get("role", "main")).lower()
     if role not in VALID_ROLES:
         role = "main"
 
     hedge_ratio = float(extras.get("hedge", extras.get("hedge_ratio", 0.0)) or 0.0)
-    timeframe = extras.get("tf", extras.get("timeframe", "15"))
-    strategy_id = extras.get("strategy_id", "hedge_strategy_v1")
+    timeframe = str(extras.get("tf", extras.get("timeframe", "15")))
+    strategy_id = str(extras.get("strategy_id", "hedge_strategy_v1"))
     timestamp = int(float(extras.get("timestamp", time.time())))
 
     return WebhookPayload(
@@ -93,7 +93,7 @@ def parse_webhook_payload(raw_text: str) -> WebhookPayload:
         timeframe=timeframe,
         strategy_id=strategy_id,
         timestamp=timestamp,
-        raw=raw_text,
+        raw=alert.raw,
         extras=extras,
     )
 
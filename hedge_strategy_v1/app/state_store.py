@@ -2,28 +2,83 @@ from __future__ import annotations
 
 import json
 import sqlite3
+import threading
 import time
 from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Iterator
+from typing import Any, Callable, Iterator
 
 from .config import StrategyConfig
+from .dedupe import DedupeIndex
+
+
+STATEMENT_CACHE_SIZE = 256
 
 
 class StateStore:
+    """SQLite-backed state shared through one long-lived WAL connection."""
+
     def __init__(self, config: StrategyConfig):
         self.db_path = Path(config.db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._tx_depth = 0
+        self._rollback_hooks: list[Callable[[], None]] = []
+        self._conn: sqlite3.Connection | None = self._open()
+        self._dedupe = DedupeIndex()
+        self._dedupe_purged_at = 0
+        # symbol -> symbol_state row with meta already decoded; patched by update_symbol_state
+        self._states: dict[str, dict[str, Any]] = {}
         self._init_db()
+        self._column_types = self._load_column_types()
+        self._load_dedupe(config.debounce_seconds)
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+            isolation_level=None,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
 
     @contextmanager
     def connect(self) -> Iterator[sqlite3.Connection]:
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        try:
-            yield conn
-        finally:
-            conn.close()
+        with self._lock:
+            if self._conn is None:
+                self._conn = self._open()
+            yield self._conn
+
+    @contextmanager
+    def unit_of_work(self) -> Iterator[sqlite3.Connection]:
+        """Group writes into one BEGIN IMMEDIATE ... COMMIT; nested calls join the outer one."""
+        with self.connect() as conn:
+            if self._tx_depth == 0:
+                conn.execute("BEGIN IMMEDIATE")
+            self._tx_depth += 1
+            try:
+                yield conn
+            except BaseException:
+                self._tx_depth -= 1
+                if self._tx_depth == 0:
+                    conn.execute("ROLLBACK")
+                    hooks, self._rollback_hooks = self._rollback_hooks, []
+                    for hook in reversed(hooks):
+                        hook()
+                raise
+            self._tx_depth -= 1
+            if self._tx_depth == 0:
+                conn.execute("COMMIT")
+                self._rollback_hooks.clear()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
 
     def _init_db(self) -> None:
         with self.connect() as conn:
@@ -66,12 +121,37 @@ class StateStore:
                     dedupe_key TEXT PRIMARY KEY,
                     created_at INTEGER NOT NULL
                 );
+                CREATE INDEX IF NOT EXISTS idx_dedupe_log_created_at
+                    ON dedupe_log(created_at);
                 """
             )
-            conn.commit()
 
-    def bootstrap_symbols(self, config: StrategyConfig) -> None:
+    def _load_column_types(self) -> dict[str, str]:
+        with self.connect() as conn:
+            rows = conn.execute("PRAGMA table_info(symbol_state)").fetchall()
+        return {row["name"]: row["type"].upper() for row in rows}
+
+    def _stored_value(self, column: str, value: Any) -> Any:
+        # mirror SQLite column affinity so cached rows match what a fresh SELECT returns
+        column_type = self._column_types.get(column)
+        if isinstance(value, bool):
+            value = int(value)
+        if column_type == "REAL" and isinstance(value, int):
+            return float(value)
+        return value
+
+    def _load_dedupe(self, debounce_seconds: int) -> None:
+        cutoff = int(time.time()) - debounce_seconds
         with self.connect() as conn:
+            rows = conn.execute(
+                "SELECT dedupe_key, created_at FROM dedupe_log WHERE created_at >= ?",
+                (cutoff,),
+            ).fetchall()
+        self._dedupe.load((row["dedupe_key"], row["created_at"]) for row in rows)
+
+    def bootstrap_symbols(self, config: StrategyConfig) -> None:
+        with self.unit_of_work() as conn:
+            self._states.clear()
             for symbol, symbol_config in config.symbols.items():
                 conn.execute(
                     """
@@ -94,51 +174,76 @@ class StateStore:
                 ON CONFLICT(key) DO NOTHING
                 """
             )
-            conn.commit()
 
     def is_duplicate(self, dedupe_key: str, debounce_seconds: int) -> bool:
-        cutoff = int(time.time()) - debounce_seconds
-        with self.connect() as conn:
-            conn.execute("DELETE FROM dedupe_log WHERE created_at < ?", (cutoff,))
-            row = conn.execute(
-                "SELECT dedupe_key FROM dedupe_log WHERE dedupe_key = ?",
-                (dedupe_key,),
-            ).fetchone()
-            if row:
-                conn.commit()
+        now = int(time.time())
+        cutoff = now - debounce_seconds
+        with self.connect():
+            self._dedupe.expire(cutoff)
+            if self._dedupe.seen_since(dedupe_key, cutoff):
                 return True
-            conn.execute(
-                "INSERT INTO dedupe_log(dedupe_key, created_at) VALUES (?, ?)",
-                (dedupe_key, int(time.time())),
-            )
-            conn.commit()
+            with self.unit_of_work() as conn:
+                # Write-through so a restart can reload the window; stale rows are
+                # purged at most once per bucket instead of on every webhook.
+                conn.execute(
+                    "INSERT OR REPLACE INTO dedupe_log(dedupe_key, created_at) VALUES (?, ?)",
+                    (dedupe_key, now),
+                )
+                if now - self._dedupe_purged_at >= self._dedupe.bucket_seconds:
+                    conn.execute("DELETE FROM dedupe_log WHERE created_at < ?", (cutoff,))
+                    self._dedupe_purged_at = now
+                self._dedupe.add(dedupe_key, now)
+                self._rollback_hooks.append(lambda: self._dedupe.discard(dedupe_key))
             return False
 
+    @staticmethod
+    def _copy_state(state: dict[str, Any]) -> dict[str, Any]:
+        # callers get their own copy so edits never leak into the cache
+        return {**state, "meta": dict(state["meta"])}
+
     def get_symbol_state(self, symbol: str) -> dict[str, Any]:
         with self.connect() as conn:
-            row = conn.execute(
-                "SELECT * FROM symbol_state WHERE symbol = ?",
-                (symbol,),
-            ).fetchone()
-            if row is None:
-                raise KeyError(f"Unknown symbol: {symbol}")
-            state = dict(row)
-            state["meta"] = json.loads(state.pop("meta_json", "{}"))
-            return state
+            state = self._states.get(symbol)
+            if state is None:
+                row = conn.execute(
+                    "SELECT * FROM symbol_state WHERE symbol = ?",
+                    (symbol,),
+                ).fetchone()
+                if row is None:
+                    raise KeyError(f"Unknown symbol: {symbol}")
+                state = self._cache_row(row)
+            return self._copy_state(state)
+
+    def _cache_row(self, row: sqlite3.Row) -> dict[str, Any]:
+        state = dict(row)
+        state["meta"] = json.loads(state.pop("meta_json", "{}"))
+        self._states[state["symbol"]] = state
+        return state
 
     def update_symbol_state(self, symbol: str, **changes: Any) -> None:
         if not changes:
             return
+        meta = None
         if "meta" in changes:
-            changes["meta_json"] = json.dumps(changes.pop("meta"), ensure_ascii=False)
+            meta = changes.pop("meta")
+            changes["meta_json"] = json.dumps(meta, ensure_ascii=False)
         columns = ", ".join(f"{key} = ?" for key in changes)
         params = list(changes.values()) + [symbol]
-        with self.connect() as conn:
+        with self.unit_of_work() as conn:
             conn.execute(f"UPDATE symbol_state SET {columns} WHERE symbol = ?", params)
-            conn.commit()
+            state = self._states.get(symbol)
+            if state is not None:
+                for key, value in changes.items():
+                    if key != "meta_json":
+                        state[key] = self._stored_value(key, value)
+                if meta is not None:
+                    # cache a copy of the caller's dict instead of decoding the text just encoded
+                    state["meta"] = dict(meta)
+            # a rolled-back transaction leaves the row as it was; reload it on next read
+            self._rollback_hooks.append(lambda: self._states.pop(symbol, None))
 
     def log_event(self, symbol: str, event_type: str, message: str, payload: dict[str, Any]) -> None:
-        with self.connect() as conn:
+        with self.unit_of_work() as conn:
             conn.execute(
                 """
                 INSERT INTO event_log(symbol, event_type, message, payload_json, created_at)
@@ -146,7 +251,6 @@ class StateStore:
                 """,
                 (symbol, event_type, message, json.dumps(payload, ensure_ascii=False), int(time.time())),
             )
-            conn.commit()
 
     def recent_events(self, limit: int = 10) -> list[dict[str, Any]]:
         with self.connect() as conn:
@@ -164,7 +268,7 @@ class StateStore:
             return row is None or row["value"] == "1"
 
     def set_trading_enabled(self, enabled: bool) -> None:
-        with self.connect() as conn:
+        with self.unit_of_work() as conn:
             conn.execute(
                 """
                 INSERT INTO app_state(key, value) VALUES ('trading_enabled', ?)
@@ -172,15 +276,15 @@ class StateStore:
                 """,
                 ("1" if enabled else "0",),
             )
-            conn.commit()
 
     def all_symbol_states(self) -> list[dict[str, Any]]:
         with self.connect() as conn:
             rows = conn.execute("SELECT * FROM symbol_state ORDER BY symbol").fetchall()
             states = []
             for row in rows:
-                item = dict(row)
-                item["meta"] = json.loads(item.pop("meta_json", "{}"))
-                states.append(item)
+                state = self._states.get(row["symbol"])
+                if state is None:
+                    state = self._cache_row(row)
+                states.append(self._copy_state(state))
             return states
 
@@ -1,11 +1,11 @@
 from __future__ import annotations
 
-from dataclasses import asdict
+from core.webhook_parser import UnsupportedFormat
 
 from .config import load_config
 from .executor_stub import ExecutionStub
 from .notifier import render_trade_message
-from .schema import parse_webhook_payload
+from .schema import WebhookPayload, parse_webhook_body, parse_webhook_payload
 from .signal_engine import decide_action
 from .state_store import StateStore
 from .telegram_bot import TelegramCommandHandler, TelegramNotifier, maybe_notify
@@ -27,26 +27,31 @@ telegram_notifier = TelegramNotifier(config)
 
 
 def handle_webhook_text(raw_text: str) -> dict:
-    payload = parse_webhook_payload(raw_text)
-    if store.is_duplicate(payload.dedupe_key, config.debounce_seconds):
-        state = store.get_symbol_state(payload.symbol)
-        plan = decide_action(payload, state, config)
-        plan.accepted = False
-        plan.event_type = "signal_rejected"
-        plan.reason = "duplicate_signal"
-    elif not store.get_trading_enabled():
-        state = store.get_symbol_state(payload.symbol)
-        plan = decide_action(payload, state, config)
-        plan.accepted = False
-        plan.event_type = "signal_rejected"
-        plan.reason = "trading_disabled"
-    else:
-        state = store.get_symbol_state(payload.symbol)
-        plan = decide_action(payload, state, config)
+    return handle_webhook_payload(parse_webhook_payload(raw_text))
 
-    updated_state = executor.apply(plan)
+
+def handle_webhook_payload(payload: WebhookPayload) -> dict:
+    # dedupe insert, state update and event log commit together or not at all
+    with store.unit_of_work():
+        if store.is_duplicate(payload.dedupe_key, config.debounce_seconds):
+            state = store.get_symbol_state(payload.symbol)
+            plan = decide_action(payload, state, config)
+            plan.accepted = False
+            plan.event_type = "signal_rejected"
+            plan.reason = "duplicate_signal"
+        elif not store.get_trading_enabled():
+            state = store.get_symbol_state(payload.symbol)
+            plan = decide_action(payload, state, config)
+            plan.accepted = False
+            plan.event_type = "signal_rejected"
+            plan.reason = "trading_disabled"
+        else:
+            state = store.get_symbol_state(payload.symbol)
+            plan = decide_action(payload, state, config)
+
+        updated_state = executor.apply(plan)
+        store.log_event(payload.symbol, plan.event_type, plan.reason if not plan.accepted else plan.event_type, payload.to_dict())
     message = render_trade_message(plan, updated_state)
-    store.log_event(payload.symbol, plan.event_type, plan.reason if not plan.accepted else plan.event_type, asdict(payload))
     return {
         "accepted": plan.accepted,
         "plan": plan.to_dict(),
@@ -65,10 +70,16 @@ if FastAPI is not None:  # pragma: no branch
     @app.post("/hedge/webhook")
     async def webhook(request: Request):
         body = await request.body()
-        raw_text = body.decode("utf-8").strip()
-        if not raw_text:
+        if not body.strip():
             raise HTTPException(status_code=400, detail="empty webhook payload")
-        result = handle_webhook_text(raw_text)
+        # text/plain keeps the CSV format; application/json and application/msgpack map straight into WebhookPayload
+        try:
+            payload = parse_webhook_body(body, request.headers.get("content-type"))
+        except UnsupportedFormat as exc:
+            raise HTTPException(status_code=415, detail=str(exc))
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        result = handle_webhook_payload(payload)
         await maybe_notify(telegram_notifier.send, result["message"])
         return result
 
@@ -16,6 +16,7 @@ class RiskManagerTests(unittest.TestCase):
         self.store.bootstrap_symbols(self.config)
 
     def tearDown(self):
+        self.store.close()
         self.tmp.close()
 
     def test_reject_neutral_main_entry(self):
@@ -1,6 +1,8 @@
+import json
 import unittest
 
-from hedge_strategy_v1.app.schema import parse_webhook_payload
+from core.webhook_parser import UnsupportedFormat, msgpack
+from hedge_strategy_v1.app.schema import parse_webhook_body, parse_webhook_payload
 
 
 class SchemaTests(unittest.TestCase):
@@ -19,6 +21,55 @@ class SchemaTests(unittest.TestCase):
         self.assertEqual(payload.regime, "bear")
         self.assertEqual(payload.hedge_ratio, 0.25)
 
+    def test_logged_payload_keeps_the_event_format(self):
+        payload = parse_webhook_payload("sell,ETHUSDT.P,0.25,3120,regime=bear,role=hedge,hedge=0.25,tf=15")
+        data = payload.to_dict()
+        self.assertNotIn("dedupe_key", data)
+        self.assertEqual(
+            list(data),
+            ["action", "symbol", "size", "close", "regime", "role", "hedge_ratio",
+             "timeframe", "strategy_id", "timestamp", "raw", "extras"],
+        )
+        json.dumps(data)
+
+    def test_json_body_matches_csv_payload(self):
+        csv_payload = parse_webhook_payload(
+            "sell,ETHUSDT.P,0.25,3120,regime=bear,role=hedge,hedge=0.25,tf=15,timestamp=1700000000"
+        )
+        body = json.dumps({
+            "action": "SELL",
+            "ticker": "ETHUSDT.P",
+            "size": 0.25,
+            "close": 3120,
+            "regime": "bear",
+            "role": "hedge",
+            "hedge": 0.25,
+            "tf": 15,
+            "timestamp": 1700000000,
+        }).encode()
+        payload = parse_webhook_body(body, "application/json; charset=utf-8")
+        self.assertEqual(payload.role, "hedge")
+        self.assertEqual(payload.timeframe, "15")
+        self.assertEqual(payload.dedupe_key, csv_payload.dedupe_key)
+
+    def test_body_without_json_content_type_uses_csv_path(self):
+        payload = parse_webhook_body(b"buy,BTCUSDT.P,1,67250\n", "text/plain")
+        self.assertEqual((payload.action, payload.size, payload.close), ("buy", 1.0, 67250.0))
+
+    def test_invalid_json_bodies(self):
+        for body in (b"{", b"[1, 2]", b'{"action": "buy", "symbol": "BTCUSDT.P", "size": 1}', b'{"action": "hold", "symbol": "BTCUSDT.P", "size": 1, "close": 2}'):
+            with self.assertRaises(ValueError):
+                parse_webhook_body(body, "application/json")
+
+    def test_msgpack_body(self):
+        if msgpack is None:
+            with self.assertRaises(UnsupportedFormat):
+                parse_webhook_body(b"\x80", "application/msgpack")
+            return
+        body = msgpack.packb({"action": "buy", "symbol": "BTCUSDT.P", "size": 1, "close": 67250, "role": "main"})
+        payload = parse_webhook_body(body, "application/msgpack")
+        self.assertEqual((payload.symbol, payload.role), ("BTCUSDT.P", "main"))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -18,6 +18,7 @@ class SignalFlowTests(unittest.TestCase):
         self.executor = ExecutionStub(self.store)
 
     def tearDown(self):
+        self.store.close()
         self.tmp.close()
 
     def test_main_then_hedge(self):
@@ -0,0 +1,155 @@
+import json
+import tempfile
+import unittest
+from unittest import mock
+
+from hedge_strategy_v1.app.config import load_config
+from hedge_strategy_v1.app.dedupe import DedupeIndex
+from hedge_strategy_v1.app.executor_stub import ExecutionStub
+from hedge_strategy_v1.app.schema import parse_webhook_payload
+from hedge_strategy_v1.app.signal_engine import decide_action
+from hedge_strategy_v1.app.state_store import StateStore
+
+
+class StateStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.config = load_config()
+        self.tmp = tempfile.NamedTemporaryFile(suffix=".db")
+        self.config.db_path = self.tmp.name
+        self.store = StateStore(self.config)
+        self.store.bootstrap_symbols(self.config)
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.close()
+
+    def test_connection_is_reused_in_wal_mode(self):
+        with self.store.connect() as first:
+            mode = first.execute("PRAGMA journal_mode").fetchone()[0]
+        with self.store.connect() as second:
+            self.assertIs(first, second)
+        self.assertEqual(mode, "wal")
+
+    def test_reopens_after_close(self):
+        self.store.set_trading_enabled(False)
+        self.store.log_event("BTCUSDT.P", "main_entry", "main_entry", {})
+        self.store.close()
+        self.assertFalse(self.store.get_trading_enabled())
+        self.assertEqual(len(self.store.recent_events()), 1)
+
+    def test_unit_of_work_commits_all_writes_together(self):
+        with self.store.unit_of_work():
+            self.assertFalse(self.store.is_duplicate("key-1", 60))
+            self.store.update_symbol_state("BTCUSDT.P", regime="bull")
+            self.store.log_event("BTCUSDT.P", "main_entry", "main_entry", {})
+        self.assertTrue(self.store.is_duplicate("key-1", 60))
+        self.assertEqual(self.store.get_symbol_state("BTCUSDT.P")["regime"], "bull")
+        self.assertEqual(len(self.store.recent_events()), 1)
+
+    def test_unit_of_work_rolls_back_on_error(self):
+        with self.assertRaises(RuntimeError):
+            with self.store.unit_of_work():
+                self.store.is_duplicate("key-2", 60)
+                self.store.update_symbol_state("BTCUSDT.P", regime="bear")
+                raise RuntimeError("crash mid-signal")
+        self.assertFalse(self.store.is_duplicate("key-2", 60))
+        self.assertEqual(self.store.get_symbol_state("BTCUSDT.P")["regime"], "unknown")
+        self.assertEqual(self.store.recent_events(), [])
+
+    def test_dedupe_keys_survive_restart(self):
+        self.assertFalse(self.store.is_duplicate("key-3", 60))
+        self.store.close()
+        restarted = StateStore(self.config)
+        try:
+            self.assertTrue(restarted.is_duplicate("key-3", 60))
+        finally:
+            restarted.close()
+
+
+class SymbolStateCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.config = load_config()
+        self.tmp = tempfile.NamedTemporaryFile(suffix=".db")
+        self.config.db_path = self.tmp.name
+        self.store = StateStore(self.config)
+        self.store.bootstrap_symbols(self.config)
+        self.reads = []
+        with self.store.connect() as conn:
+            conn.set_trace_callback(self.trace)
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.close()
+
+    def trace(self, statement):
+        if statement.startswith("SELECT * FROM symbol_state"):
+            self.reads.append(statement)
+
+    def fresh_state(self, symbol):
+        with self.store.connect() as conn:
+            row = dict(conn.execute("SELECT * FROM symbol_state WHERE symbol = ?", (symbol,)).fetchone())
+        row["meta"] = json.loads(row.pop("meta_json"))
+        return row
+
+    def test_webhook_reads_the_row_and_decodes_meta_once(self):
+        executor = ExecutionStub(self.store)
+        payload = parse_webhook_payload("buy,BTCUSDT.P,1,67000,regime=bull,role=main")
+        with mock.patch("hedge_strategy_v1.app.state_store.json.loads", wraps=json.loads) as loads:
+            with self.store.unit_of_work():
+                state = self.store.get_symbol_state(payload.symbol)
+                updated = executor.apply(decide_action(payload, state, self.config))
+        self.assertEqual(len(self.reads), 1)
+        self.assertEqual(loads.call_count, 1)
+        self.assertEqual(updated, self.fresh_state("BTCUSDT.P"))
+
+    def test_cached_rows_match_column_types(self):
+        self.store.get_symbol_state("BTCUSDT.P")
+        meta = {"note": "x"}
+        with mock.patch("hedge_strategy_v1.app.state_store.json.loads", wraps=json.loads) as loads:
+            self.store.update_symbol_state("BTCUSDT.P", main_qty=2, main_entries=True, meta=meta)
+        meta["note"] = "changed"
+        state = self.store.get_symbol_state("BTCUSDT.P")
+        self.assertEqual(loads.call_count, 0)
+        self.assertEqual(state, self.fresh_state("BTCUSDT.P"))
+        self.assertIsInstance(state["main_qty"], float)
+        self.assertEqual(state["meta"], {"note": "x"})
+
+    def test_returned_state_is_a_copy(self):
+        state = self.store.get_symbol_state("BTCUSDT.P")
+        state["regime"] = "bear"
+        state["meta"]["x"] = 1
+        self.assertEqual(self.store.get_symbol_state("BTCUSDT.P")["regime"], "unknown")
+        self.assertEqual(self.store.get_symbol_state("BTCUSDT.P")["meta"], {})
+
+    def test_rollback_drops_the_patched_row(self):
+        self.store.get_symbol_state("BTCUSDT.P")
+        with self.assertRaises(RuntimeError):
+            with self.store.unit_of_work():
+                self.store.update_symbol_state("BTCUSDT.P", regime="bear")
+                self.assertEqual(self.store.get_symbol_state("BTCUSDT.P")["regime"], "bear")
+                raise RuntimeError("crash mid-signal")
+        self.assertNotIn("BTCUSDT.P", self.store._states)
+        self.assertEqual(self.store.get_symbol_state("BTCUSDT.P")["regime"], "unknown")
+        self.assertEqual(len(self.reads), 2)
+
+
+class DedupeIndexTests(unittest.TestCase):
+    def test_expire_drops_whole_buckets(self):
+        index = DedupeIndex(bucket_seconds=60)
+        index.add("old", 100)
+        index.add("new", 200)
+        self.assertEqual(index.expire(180), 1)
+        self.assertNotIn("old", index)
+        self.assertTrue(index.seen_since("new", 180))
+        self.assertFalse(index.seen_since("new", 201))
+
+    def test_load_accepts_unordered_rows(self):
+        index = DedupeIndex(bucket_seconds=60)
+        index.load([("b", 300), ("a", 100)])
+        self.assertEqual(len(index), 2)
+        self.assertEqual(index.expire(240), 1)
+        self.assertIn("b", index)
+
+
+if __name__ == "__main__":
+    unittest.main()
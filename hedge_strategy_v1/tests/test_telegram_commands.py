@@ -16,6 +16,7 @@ class TelegramCommandTests(unittest.TestCase):
         self.handler = TelegramCommandHandler(self.store, self.config)
 
     def tearDown(self):
+        self.store.close()
         self.tmp.close()
 
     def test_trade_toggle(self):
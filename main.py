@@ -1,6 +1,7 @@
 from fastapi import FastAPI, Request, HTTPException, Depends
 import asyncio
 import logging
+from collections import Counter
 from datetime import datetime
 from pytz import timezone
 
@@ -13,6 +14,9 @@ from telegram.ext import (
 
 from telegram import Update
 from core.trader import Bot
+from core.exchange import call_counter
+from core.webhook_queue import WebhookQueue, QueueFull
+from core.webhook_parser import parse_alert, parse_body, parse_batch_body, UnsupportedFormat
 
 
 class UvicornAccessFilter(logging.Filter):
@@ -53,7 +57,6 @@ def configure_logging():
 app = FastAPI()
 configure_logging()
 logger = logging.getLogger(__name__)
-background_tasks = set()
 
 # ======================================================
 # Telegram Bot
@@ -84,21 +87,33 @@ tg_app.add_handler(
 # Background task
 # ======================================================
 async def periodic_task(interval: int):
+    # private WebSocket 이 연결되어 있으면 포지션/잔고는 push 로 갱신된 snapshot 에서 읽음
+    # (REST 는 재연결 / RESYNC_INTERVAL 주기 복구에만 사용)
     while True:
         try:
+            await bot.exchange.refresh_markets_if_due()
+            if bot.stream_resync_due():
+                await bot.resync_stream()
             msg = await bot.update_positions()
             await bot.post_message(msg)
         except Exception as e:
             print("Periodic task error:", e)
         await asyncio.sleep(interval)
 
+async def post_start_msg():
+    try:
+        start_msg = await bot.start_msg()
+        await bot.post_message(start_msg)
+    except Exception as e:
+        print("Start message error:", e)
+
 # ======================================================
 # FastAPI lifecycle
 # ======================================================
 @app.on_event("startup")
 async def on_startup():
-    await bot.ensure_exchange_mode()
-    await bot.sync_configured_leverage()
+    # 연결 pool + market 정보(캐시) / position mode / 레버리지 / WebSocket 준비
+    await bot.boot()
 
     # Telegram initialize
     await tg_app.initialize()
@@ -109,9 +124,8 @@ async def on_startup():
     await tg_app.updater.start_polling(drop_pending_updates=False)
     print("Telegram polling started", flush=True)
 
-    # 시작 메시지
-    start_msg = await bot.start_msg()
-    await bot.post_message(start_msg)
+    # 시작 메시지 - 잔고 조회가 webhook 수신 시작을 막지 않도록 백그라운드로 전송
+    asyncio.create_task(post_start_msg())
 
     # 주기 작업 시작
     asyncio.create_task(periodic_task(15))
@@ -124,6 +138,10 @@ async def on_shutdown():
         print("Telegram polling stopped", flush=True)
     await tg_app.stop()
     await tg_app.shutdown()
+    await webhook_queue.close()
+    await bot.stop_stream()
+    await bot.trader.close_info()
+    await bot.close_api()
 
 # ======================================================
 # TradingView Webhook
@@ -135,69 +153,188 @@ ALLOWED_IPS = {
     "52.32.178.7",
 }
 
+LOCAL_IPS = {"127.0.0.1", "::1"}
+
 def check_ip(request: Request):
     client_ip = request.client.host
     if client_ip not in ALLOWED_IPS:
         raise HTTPException(status_code=403, detail="Access forbidden")
 
+def check_local_ip(request: Request):
+    client_ip = request.client.host
+    if client_ip not in LOCAL_IPS:
+        raise HTTPException(status_code=403, detail="Access forbidden")
+
 @app.post("/webhook", dependencies=[Depends(check_ip)])
 async def receive_webhook(request: Request):
+    # text/plain 은 기존 CSV, application/json / application/msgpack 은 object 로 파싱
+    body = await request.body()
+
+    try:
+        alert = parse_body(body, request.headers.get("content-type"))
+        signal = signal_from_alert(alert)
+    except UnsupportedFormat as exc:
+        raise HTTPException(status_code=415, detail=str(exc))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    text = alert.raw
+
+    try:
+        depth = webhook_queue.submit(signal["target_symbol"], signal)
+    except QueueFull as exc:
+        print("Webhook rejected:", text, exc)
+        raise HTTPException(status_code=429, detail=str(exc))
+
+    print("Webhook queued:", text, "depth:", depth)
+
+    return {"status": "accepted", "queue_depth": depth}
+
+
+@app.post("/webhook/batch", dependencies=[Depends(check_ip)])
+async def receive_webhook_batch(request: Request):
+    # 신호 여러 개를 한 번에: 포지션 조회 한 번 + 주문 batch 전송 후 신호 순서대로 결과 반환
     body = await request.body()
-    text = body.decode("utf-8")
 
-    print("Webhook queued:", text)
+    try:
+        alerts = parse_batch_body(body, request.headers.get("content-type"))
+    except UnsupportedFormat as exc:
+        raise HTTPException(status_code=415, detail=str(exc))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    results = [None] * len(alerts)
+    signals = []
+    for index, alert in enumerate(alerts):
+        if isinstance(alert, ValueError):
+            results[index] = {"index": index, "status": "invalid", "error": str(alert)}
+        else:
+            signals.append((index, signal_from_alert(alert)))
+
+    # 대기 중인 /webhook 신호와 같은 pending 한도를 공유, 심볼 순서는 Bot 의 심볼 lock 으로 보장
+    try:
+        webhook_queue.reserve(len(signals))
+    except QueueFull as exc:
+        print("Webhook batch rejected:", len(signals), "signals", exc)
+        raise HTTPException(status_code=429, detail=str(exc))
+
+    print("Webhook batch:", len(alerts), "signals,", len(signals), "valid")
+    try:
+        traded = await bot.trade_batch([signal for _, signal in signals])
+    finally:
+        webhook_queue.release(len(signals))
+    for (index, _), result in zip(signals, traded):
+        results[index] = {"index": index, **result}
+
+    return {"status": "done", "results": results}
+
 
-    task = asyncio.create_task(process_webhook(text))
-    background_tasks.add(task)
-    task.add_done_callback(_on_webhook_task_done)
+@app.get("/webhook/metrics", dependencies=[Depends(check_local_ip)])
+async def webhook_metrics():
+    metrics = webhook_queue.metrics()
+    return {
+        **metrics,
+        "coalesce": coalesce_metrics(metrics),
+        "reconcile": bot.reconciler.stats(),
+        "stream": bot.stream.stats() if bot.stream is not None else None,
+        "price_stream": bot.price_stream.stats() if bot.price_stream is not None else None,
+        "prices": bot.prices.stats(),
+        "price_decisions": bot.price_decisions,
+        "rate_limit": bot.scheduler.stats(),
+        "exchange": bot.exchange.stats(),
+    }
 
-    return {"status": "accepted"}
 
+def parse_webhook(text: str):
+    return signal_from_alert(parse_alert(text))
 
-async def process_webhook(text: str):
-    tokens = [token.strip() for token in text.split(",")]
-    if len(tokens) < 2:
-        raise ValueError(f"Invalid webhook payload: {text}")
 
-    if tokens[0] == "buy":
+def signal_from_alert(alert):
+    if alert.action == "buy":
         position = "long"
-    elif tokens[0] == "sell":
+    elif alert.action == "sell":
         position = "short"
     else:
         position = None
 
-    target_symbol = tokens[1]
+    position_size = alert.size if alert.size is not None else 1
+    cur_close = alert.close if alert.close is not None else 0
+
+    return {
+        "target_symbol": bot.normalize_target_symbol(alert.symbol),
+        "symbol": alert.symbol,
+        "position": position,
+        "position_size": position_size,
+        "cur_close": cur_close,
+    }
+
+
+def coalesce_signals(signals: list):
+    # 같은 심볼 coalesce window 안에 모인 신호 정리
+    # - 매매 신호가 있으면 상태 조회(position None) 는 생략 (매매 후 상태 메시지가 나감)
+    # - 방향 / 수량 / 가격이 모두 같은 연속 신호(재발송)만 하나로 합침
+    # - 수량을 더하는 신호나 방향이 바뀐 신호는 순서대로 모두 처리
+    trades = [signal for signal in signals if signal["position"] is not None]
+    merged = []
+    for signal in trades or signals[-1:]:
+        if merged and signal_identity(merged[-1]) == signal_identity(signal):
+            continue
+        merged.append(signal)
+    return merged
+
+
+def signal_identity(signal: dict):
+    return signal["position"], signal["position_size"], signal["cur_close"]
 
-    if len(tokens) > 3:
-        position_size = float(tokens[2])
-        cur_close = float(tokens[3])
-    else:
-        position_size = 1
-        cur_close = 0
 
+# 신호 한 건 처리에 쓴 거래소 호출 수 -> 합쳐서 생략한 신호로 아낀 호출 수 추정
+webhook_cost = {"signals": 0, "calls": 0}
+
+
+def coalesce_metrics(queue_metrics: dict):
+    calls_per_signal = webhook_cost["calls"] / webhook_cost["signals"] if webhook_cost["signals"] else 0.0
+    return {
+        **queue_metrics["coalesce"],
+        "calls_per_signal": round(calls_per_signal, 2),
+        "round_trips_saved": round(queue_metrics["coalesce"]["coalesced"] * calls_per_signal),
+    }
+
+
+async def process_webhook(signal: dict):
+    counter = Counter()
+    token = call_counter.set(counter)
+    try:
+        await handle_signal(signal)
+    finally:
+        call_counter.reset(token)
+        webhook_cost["signals"] += 1
+        webhook_cost["calls"] += sum(counter.values())
+
+
+async def handle_signal(signal: dict):
     print(
         datetime.now(timezone("Asia/Seoul")).strftime("%Y-%m-%d %H:%M:%S"),
-        target_symbol,
-        position,
-        position_size,
-        cur_close,
+        signal["symbol"],
+        signal["position"],
+        signal["position_size"],
+        signal["cur_close"],
     )
 
-    if position is None:
+    if signal["position"] is None:
         msg = await bot.update_positions()
         await bot.post_message(msg)
     else:
         await bot.trade(
-            symbol=target_symbol,
-            check_pos=position,
-            trade_vol=position_size,
-            cur_close=cur_close,
+            symbol=signal["symbol"],
+            check_pos=signal["position"],
+            trade_vol=signal["position_size"],
+            cur_close=signal["cur_close"],
         )
 
 
-def _on_webhook_task_done(task: asyncio.Task):
-    background_tasks.discard(task)
-    try:
-        task.result()
-    except Exception:
-        logger.exception("Webhook background task failed")
+# 심볼별 lane 으로 순서를 보장하는 webhook 처리 큐
+webhook_queue = WebhookQueue(
+    process_webhook,
+    max_pending=bot.trader.get_webhook_max_pending(),
+    coalesce_window=bot.trader.get_webhook_coalesce_window(),
+    merge=coalesce_signals,
+)
@@ -15,8 +15,8 @@ def parse_args():
     return parser.parse_args()
 
 
-def print_snapshot(bot, symbol):
-    positions = bot.api.fetch_positions()
+async def print_snapshot(bot, symbol):
+    positions, _ = await bot.fetch_positions()
     print(f"[snapshot] {symbol}")
     for side in ("long", "short"):
         found = False
@@ -37,12 +37,7 @@ def print_snapshot(bot, symbol):
             print(f"  {side}: empty")
 
 
-async def main():
-    args = parse_args()
-    bot = Bot()
-    bot.trader.config["OKX"]["POSITION_MODE"] = "hedge"
-    bot.trader.config["OKX"]["ENVIRONMENT"] = args.env
-    bot.setup_api()
+async def run(bot, args):
     try:
         await bot.ensure_exchange_mode()
     except (ccxt.AuthenticationError, RuntimeError) as exc:
@@ -62,12 +57,24 @@ async def main():
     long_order = await bot.market_order_hedge(symbol, "long", "open", vol=order_amount)
     print(f"long order id={long_order['id']}")
     await asyncio.sleep(args.wait_seconds)
-    print_snapshot(bot, symbol)
+    await print_snapshot(bot, symbol)
 
     short_order = await bot.market_order_hedge(symbol, "short", "open", vol=order_amount)
     print(f"short order id={short_order['id']}")
     await asyncio.sleep(args.wait_seconds)
-    print_snapshot(bot, symbol)
+    await print_snapshot(bot, symbol)
+
+
+async def main():
+    args = parse_args()
+    bot = Bot()
+    bot.trader.config["OKX"]["POSITION_MODE"] = "hedge"
+    bot.trader.config["OKX"]["ENVIRONMENT"] = args.env
+    await bot.reset_api()
+    try:
+        await run(bot, args)
+    finally:
+        await bot.close_api()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,101 @@
+import asyncio
+import unittest
+from collections import OrderedDict
+
+from core.trader import Bot
+from core.reconcile import PositionReconciler
+from core.snapshot import ExchangeSnapshot
+
+
+class FakeApi():
+    def __init__(self, closed_orders):
+        self.closed_orders = closed_orders
+        self.calls = []
+
+    async def fetch_closed_orders(self, symbol, limit=None):
+        self.calls.append(('fetch_closed_orders', symbol))
+        return [order for order in self.closed_orders if order['symbol'] == symbol]
+
+    async def fetch_order(self, order_id, symbol):
+        self.calls.append(('fetch_order', order_id))
+        return next(
+            (order for order in self.closed_orders if order['id'] == order_id),
+            {'id': order_id, 'symbol': symbol, 'status': 'open', 'price': None},
+        )
+
+    def parse_order(self, row):
+        return {'id': row['ordId'], 'status': 'closed', 'average': float(row['avgPx']), 'filled': float(row['accFillSz'])}
+
+
+def closed(order_id, symbol, price=100.0, amount=1.0):
+    return {'id': order_id, 'symbol': symbol, 'status': 'closed', 'average': price, 'filled': amount}
+
+
+class ConfirmFillsTests(unittest.IsolatedAsyncioTestCase):
+    def make_bot(self, closed_orders):
+        # 설정 파일 / 거래소 연결 없이 체결 확인 로직만 사용
+        bot = Bot.__new__(Bot)
+        bot.api = FakeApi(closed_orders)
+        bot.fill_poll_delays = (0.01, 0.01)
+        bot.stream_orders = OrderedDict()
+        bot.order_event = asyncio.Event()
+        return bot
+
+    async def test_only_unresolved_orders_hit_rest_in_one_batch(self):
+        bot = self.make_bot([closed('2', 'BTC', 101), closed('3', 'BTC', 102)])
+        fills = await bot.confirm_fills([
+            ('BTC', closed('1', 'BTC', 100)),
+            ('BTC', {'id': '2', 'status': 'open'}),
+            ('BTC', {'id': '3', 'status': None}),
+        ])
+        self.assertEqual([fill['price'] for fill in fills], [100, 101, 102])
+        self.assertEqual(bot.api.calls, [('fetch_closed_orders', 'BTC')])
+
+    async def test_pushed_order_update_resolves_without_rest(self):
+        bot = self.make_bot([])
+        bot.fill_poll_delays = (1.0,)
+
+        async def push():
+            await asyncio.sleep(0.01)
+            bot.stream_orders['9'] = {'ordId': '9', 'state': 'filled', 'avgPx': '99.5', 'accFillSz': '2'}
+            event, bot.order_event = bot.order_event, asyncio.Event()
+            event.set()
+
+        pusher = asyncio.create_task(push())
+        fills = await asyncio.wait_for(bot.confirm_fills([('ETH', {'id': '9', 'status': 'open'})]), 0.5)
+        await pusher
+
+        self.assertEqual((fills[0]['price'], fills[0]['amount']), (99.5, 2.0))
+        self.assertEqual(bot.api.calls, [])
+
+    async def test_unconfirmed_fill_is_none(self):
+        bot = self.make_bot([])
+        fills = await bot.confirm_fills([('BTC', {'id': '5', 'status': None, 'price': None})])
+        self.assertEqual(fills, [None])
+        self.assertEqual(bot.api.calls, [('fetch_order', '5'), ('fetch_order', '5')])
+
+    async def test_post_trade_hedge_flags_unconfirmed_order_and_reconciles(self):
+        bot = self.make_bot([])
+        bot.snapshot = ExchangeSnapshot(ttl=60)
+        bot.reconciler = PositionReconciler()
+        bot.reconciler.commit('BTC/USDT:USDT', ('fp',))
+        bot.snapshot.put('positions', [])
+        reconciled = []
+
+        async def update_positions_hedge(owned=()):
+            reconciled.append(owned)
+
+        bot.update_positions_hedge = update_positions_hedge
+        entry = bot.build_order_entry('BTC/USDT:USDT', {'id': '5', 'status': None, 'price': None},
+                                      'open_long', 1, 0, side='long', action='open')
+        msg_list = await bot.post_trade_hedge([entry])
+
+        self.assertEqual(len(msg_list), 1)
+        self.assertIn('체결 미확인', msg_list[0])
+        self.assertEqual(reconciled, [('BTC/USDT:USDT',)])
+        self.assertIsNone(bot.snapshot.age('positions'))
+        self.assertTrue(bot.reconciler.changed('BTC/USDT:USDT', ('fp',)))
+
+
+if __name__ == '__main__':
+    unittest.main()
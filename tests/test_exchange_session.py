@@ -0,0 +1,165 @@
+import os
+import json
+import tempfile
+import asyncio
+import unittest
+from collections import Counter
+
+import ccxt
+
+from core.exchange import ExchangeSession, call_counter
+
+
+class FakeClient():
+    def __init__(self, failures=()):
+        self.failures = list(failures)
+        self.calls = []
+        self.markets = {}
+
+    async def _call(self, name):
+        self.calls.append(name)
+        if self.failures:
+            raise self.failures.pop(0)
+        return name
+
+    async def fetch_positions(self):
+        return await self._call('fetch_positions')
+
+    async def create_order(self, **kwargs):
+        return await self._call('create_order')
+
+    async def fetch_ticker(self, symbol):
+        return await self._call('fetch_ticker')
+
+    async def load_markets(self, reload=False):
+        self.calls.append(('load_markets', reload))
+        self.markets = {'BTC/USDT:USDT': {'symbol': 'BTC/USDT:USDT', 'id': 'BTC-USDT-SWAP'}}
+        return self.markets
+
+    def set_markets(self, markets, currencies=None):
+        self.calls.append('set_markets')
+        self.markets = {market['symbol']: market for market in markets}
+
+    async def close(self):
+        self.calls.append('close')
+
+
+class ExchangeSessionTests(unittest.IsolatedAsyncioTestCase):
+    def make_session(self, failures=()):
+        built = []
+
+        def factory():
+            client = FakeClient(failures)
+            built.append(client)
+            return client
+
+        session = ExchangeSession(factory, retry_delays=(0, 0))
+        return session, built
+
+    async def test_call_counter_counts_calls_of_the_current_task(self):
+        session, _ = self.make_session([ccxt.RequestTimeout('t')])
+        counter = Counter()
+        token = call_counter.set(counter)
+        try:
+            await asyncio.gather(session.call('account', 'fetch_positions'), session.call('public', 'fetch_ticker', 'BTC'))
+        finally:
+            call_counter.reset(token)
+        await session.call('public', 'fetch_ticker', 'ETH')
+        # 재시도도 거래소 왕복 한 번으로 셈
+        self.assertEqual(counter, Counter({'account': 2, 'public': 1}))
+
+    async def test_reads_retry_network_errors_on_same_client(self):
+        session, built = self.make_session([ccxt.RequestTimeout('t'), ccxt.ExchangeNotAvailable('e')])
+        self.assertEqual(await session.call('account', 'fetch_positions'), 'fetch_positions')
+        self.assertEqual(len(built), 1)
+        self.assertEqual(session.stats()['retries'], 2)
+
+    async def test_orders_are_not_resent(self):
+        session, built = self.make_session([ccxt.RequestTimeout('t')])
+        with self.assertRaises(ccxt.RequestTimeout):
+            await session.call('trade', 'create_order', idempotent=False, symbol='BTC/USDT:USDT')
+        self.assertEqual(built[0].calls, ['create_order'])
+        self.assertEqual(session.stats()['escalated'], 1)
+
+    async def test_exchange_errors_escalate_without_rebuilding(self):
+        session, built = self.make_session([ccxt.InsufficientFunds('f')])
+        with self.assertRaises(ccxt.InsufficientFunds):
+            await session.call('trade', 'create_order', idempotent=False)
+        self.assertEqual(await session.call('trade', 'create_order', idempotent=False), 'create_order')
+        self.assertEqual(len(built), 1)
+
+    async def test_bad_symbol_reloads_markets_once(self):
+        session, built = self.make_session([ccxt.BadSymbol('b')])
+        await session.start()
+        self.assertEqual(await session.call('public', 'fetch_ticker', 'NEW/USDT:USDT'), 'fetch_ticker')
+        self.assertEqual(
+            built[0].calls,
+            [('load_markets', False), 'fetch_ticker', ('load_markets', True), 'fetch_ticker'],
+        )
+
+    async def test_markets_loaded_once_until_due(self):
+        session, built = self.make_session()
+        await session.start()
+        await session.load_markets()
+        await session.refresh_markets_if_due()
+        self.assertEqual(session.stats()['market_loads'], 1)
+
+        session.markets_ttl = 0
+        await session.refresh_markets_if_due()
+        self.assertEqual(built[0].calls[-1], ('load_markets', True))
+
+
+
+class MarketsCacheTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'markets.json')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_session(self, **kwargs):
+        return ExchangeSession(FakeClient, markets_cache=self.path, cache_key='live', **kwargs)
+
+    async def test_second_boot_reads_markets_from_cache(self):
+        first = self.make_session()
+        await first.start()
+        self.assertEqual(first.markets_source, 'network')
+
+        second = self.make_session()
+        await second.start()
+        self.assertEqual(second.markets_source, 'cache')
+        self.assertEqual(second.client.calls, ['set_markets'])
+        self.assertIn('BTC/USDT:USDT', second.client.markets)
+
+    async def test_stale_or_foreign_cache_is_ignored(self):
+        await self.make_session().start()
+        with open(self.path) as f:
+            payload = json.load(f)
+
+        payload['saved_at'] -= 7200
+        with open(self.path, 'w') as f:
+            json.dump(payload, f)
+        session = self.make_session()
+        await session.start()
+        self.assertEqual(session.markets_source, 'network')
+
+        other_env = ExchangeSession(FakeClient, markets_cache=self.path, cache_key='demo')
+        await other_env.start()
+        self.assertEqual(other_env.markets_source, 'network')
+
+    async def test_restart_switches_to_the_new_environment_cache(self):
+        live = self.make_session()
+        await live.start()
+
+        demo_path = os.path.join(self.tmp.name, 'markets_demo.json')
+        await live.restart(markets_cache=demo_path, cache_key='demo')
+        self.assertEqual(live.markets_source, 'network')
+        with open(demo_path) as f:
+            self.assertEqual(json.load(f)['header'], live.cache_header())
+        with open(self.path) as f:
+            self.assertNotEqual(json.load(f)['header'], live.cache_header())
+
+
+if __name__ == '__main__':
+    unittest.main()
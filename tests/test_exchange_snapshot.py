@@ -0,0 +1,112 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+
+from core.snapshot import ExchangeSnapshot
+from core.trader import Bot
+
+
+class ExchangeSnapshotTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.calls = 0
+
+    async def loader(self):
+        self.calls += 1
+        await asyncio.sleep(0)
+        return [{"symbol": "BTC/USDT:USDT", "contracts": self.calls}]
+
+    async def test_reuses_value_within_ttl(self):
+        snapshot = ExchangeSnapshot(ttl=60)
+        first = await snapshot.get("positions", self.loader)
+        second = await snapshot.get("positions", self.loader)
+        self.assertIs(first, second)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(snapshot.stats()["positions"], {"requests": 1, "hits": 1})
+
+    async def test_concurrent_requests_share_one_fetch(self):
+        snapshot = ExchangeSnapshot(ttl=60)
+        results = await asyncio.gather(*(snapshot.get("positions", self.loader) for _ in range(5)))
+        self.assertEqual(self.calls, 1)
+        self.assertTrue(all(item is results[0] for item in results))
+
+    async def test_invalidate_forces_refetch(self):
+        snapshot = ExchangeSnapshot(ttl=60)
+        await snapshot.get("positions", self.loader)
+        snapshot.invalidate()
+        await snapshot.get("positions", self.loader)
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(snapshot.total_requests(), 2)
+
+    async def test_invalidate_during_load_is_not_overwritten(self):
+        snapshot = ExchangeSnapshot(ttl=60)
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def slow_loader():
+            self.calls += 1
+            started.set()
+            await release.wait()
+            return "before-order"
+
+        pending = asyncio.create_task(snapshot.get("positions", slow_loader))
+        await started.wait()
+        snapshot.invalidate()
+        release.set()
+        # 호출자는 값을 받지만 주문 전 값은 캐시되지 않음
+        self.assertEqual(await pending, "before-order")
+        self.assertEqual(snapshot.age("positions"), None)
+        await snapshot.get("positions", self.loader)
+        self.assertEqual(self.calls, 2)
+
+    async def test_put_during_load_keeps_pushed_value(self):
+        snapshot = ExchangeSnapshot(ttl=60)
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def slow_loader():
+            started.set()
+            await release.wait()
+            return "rest"
+
+        pending = asyncio.create_task(snapshot.get("positions", slow_loader))
+        await started.wait()
+        snapshot.put("positions", "ws")
+        release.set()
+        await pending
+        self.assertEqual(await snapshot.get("positions", self.loader), "ws")
+
+    async def test_get_keeps_loaded_value_for_given_ttl(self):
+        snapshot = ExchangeSnapshot(ttl=0)
+        await snapshot.get("positions", self.loader, ttl=60)
+        await snapshot.get("positions", self.loader, ttl=60)
+        self.assertEqual(self.calls, 1)
+
+
+class StreamSnapshotTtlTests(unittest.IsolatedAsyncioTestCase):
+    async def test_reload_after_order_uses_stream_ttl_while_connected(self):
+        bot = Bot.__new__(Bot)
+        bot.snapshot = ExchangeSnapshot(ttl=2)
+        bot.stream = SimpleNamespace(connected=True)
+        bot.stream_config = {"resync_interval": 300}
+        calls = []
+
+        async def request(group, method, *args, **kwargs):
+            calls.append(method)
+            return {"USDT": {"free": 1}}
+
+        bot.request = request
+        await bot.fetch_balance()
+        # 주문으로 무효화된 뒤 REST 재조회 값은 stream TTL 로 보관
+        bot.snapshot.invalidate("balance")
+        await bot.fetch_balance()
+        self.assertEqual(bot.snapshot._entries["balance"][2], 300)
+
+        bot.stream.connected = False
+        bot.snapshot.invalidate("balance")
+        await bot.fetch_balance()
+        self.assertEqual(bot.snapshot._entries["balance"][2], 2)
+        self.assertEqual(len(calls), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+
+from core.trader import Bot
+from core.reconcile import PositionReconciler
+from core.snapshot import ExchangeSnapshot
+
+
+class FakeApi():
+    has = {'createOrders': True}
+
+    def __init__(self, reject=()):
+        self.reject = reject
+        self.batches = []
+
+    async def create_orders(self, requests):
+        self.batches.append(requests)
+        orders = []
+        for i, request in enumerate(requests):
+            client_id = request['params']['clOrdId']
+            if i in self.reject:
+                orders.append({'id': None, 'clientOrderId': client_id, 'status': 'rejected',
+                               'info': {'sCode': '51008', 'sMsg': 'Insufficient margin'}})
+            else:
+                orders.append({'id': f'ord{i}', 'clientOrderId': client_id, 'status': None, 'info': {}})
+        # 응답 순서가 요청 순서와 달라도 clOrdId 로 매핑되는지 확인
+        return list(reversed(orders))
+
+
+class HedgeBatchOrderTests(unittest.IsolatedAsyncioTestCase):
+    def make_bot(self, reject=()):
+        bot = Bot.__new__(Bot)
+        bot.api = FakeApi(reject)
+        bot.snapshot = ExchangeSnapshot()
+        bot.reconciler = PositionReconciler()
+        return bot
+
+    async def test_close_and_open_legs_go_out_in_one_batch(self):
+        bot = self.make_bot()
+        bot.reconciler.commit('BTC/USDT:USDT', ('fp',))
+        close_order, open_order = await bot.market_order_hedge_batch([
+            ('BTC/USDT:USDT', 'short', 'close', 3),
+            ('BTC/USDT:USDT', 'long', 'open', 3),
+        ])
+
+        self.assertEqual(len(bot.api.batches), 1)
+        close_req, open_req = bot.api.batches[0]
+        self.assertEqual((close_req['side'], close_req['params']['posSide']), ('buy', 'short'))
+        self.assertEqual((open_req['side'], open_req['params']['posSide']), ('buy', 'long'))
+        self.assertEqual((close_order['id'], open_order['id']), ('ord0', 'ord1'))
+        self.assertTrue(bot.reconciler.changed('BTC/USDT:USDT', ('fp',)))
+
+    async def test_rejected_leg_maps_to_none(self):
+        bot = self.make_bot(reject=(1,))
+        close_order, open_order = await bot.market_order_hedge_batch([
+            ('ETH/USDT:USDT', 'long', 'close', 1),
+            ('ETH/USDT:USDT', 'short', 'open', 1),
+        ])
+        self.assertEqual(close_order['id'], 'ord0')
+        self.assertIsNone(open_order)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+
+from core.trader import Bot
+from core.reconcile import PositionReconciler
+
+
+class FakeTrader():
+    def get_info(self, target_symbol, key):
+        return 100.0
+
+    def get_target_symbols(self):
+        return ['BTC/USDT:USDT', 'ETH/USDT:USDT']
+
+
+class HedgeReconcileLockTests(unittest.IsolatedAsyncioTestCase):
+    def make_bot(self):
+        bot = Bot.__new__(Bot)
+        bot.trader = FakeTrader()
+        bot.reconciler = PositionReconciler()
+        bot.symbol_locks = {}
+        bot.reconciled = []
+
+        async def fetch_positions():
+            return [], {}
+
+        async def balance():
+            return 100.0
+
+        def reconcile_hedge_symbol(target_symbol, positions):
+            bot.reconciled.append(target_symbol)
+            return False
+
+        bot.fetch_positions = fetch_positions
+        bot.set_balance = balance
+        bot.get_balance = balance
+        bot.position_fingerprint = lambda target_symbol, groups: (target_symbol,)
+        bot.reconcile_hedge_symbol = reconcile_hedge_symbol
+        return bot
+
+    async def test_symbol_in_flight_is_left_for_next_cycle(self):
+        bot = self.make_bot()
+        async with bot.get_symbol_lock('ETH/USDT:USDT'):
+            await bot.update_positions_hedge()
+        self.assertEqual(bot.reconciled, ['BTC/USDT:USDT'])
+
+        # 건너뛴 심볼은 fingerprint 가 commit 되지 않아 다음 cycle 에 재계산
+        await bot.update_positions_hedge()
+        self.assertEqual(bot.reconciled, ['BTC/USDT:USDT', 'ETH/USDT:USDT'])
+
+    async def test_lock_owner_reconciles_its_own_symbol(self):
+        bot = self.make_bot()
+        async with bot.get_symbol_lock('ETH/USDT:USDT'):
+            await bot.update_positions_hedge(owned=('ETH/USDT:USDT',))
+        self.assertEqual(bot.reconciled, ['BTC/USDT:USDT', 'ETH/USDT:USDT'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import random
+import unittest
+
+from core.ladder import rebuild_ladder
+
+
+def reference_ladder(belong_vol, buy_vol, max_cnt, prev_positions):
+    """recal_side_pos_list 의 기존 단위 순회 구현 (비교용)"""
+    position_list = []
+
+    if buy_vol <= 0:
+        return [], 0
+
+    real_cnt = int(round(belong_vol / buy_vol))
+    if belong_vol > 0 and real_cnt == 0:
+        real_cnt = 1
+
+    buy_ratio = real_cnt / max_cnt
+
+    if buy_ratio > 0.5:
+        last_qty = real_cnt // 2
+    elif buy_ratio > 0.25:
+        last_qty = real_cnt // 3
+    else:
+        last_qty = 0
+
+    base_cnt = real_cnt - last_qty if last_qty > 0 else real_cnt
+
+    def split_by_4(cnt):
+        result = []
+        while cnt > 0:
+            if cnt >= 4:
+                result.append(4)
+                cnt -= 4
+            else:
+                result.append(cnt)
+                break
+        return result
+
+    cum_cnt = 0
+
+    if prev_positions:
+        matched = False
+
+        for qty in prev_positions:
+            if matched:
+                break
+
+            used = 0
+            for _ in range(int(qty)):
+                if cum_cnt == base_cnt:
+                    matched = True
+                    break
+                used += 1
+                cum_cnt += 1
+
+            if matched:
+                position_list.append(used)
+                break
+            else:
+                position_list.append(qty)
+
+        remain = base_cnt - cum_cnt
+        if last_qty == 0 and remain > 0:
+            position_list.extend(split_by_4(remain))
+            cum_cnt += remain
+
+    else:
+        position_list.extend(split_by_4(base_cnt))
+        cum_cnt = base_cnt
+
+    if last_qty > 0:
+        position_list.append(last_qty)
+        cum_cnt += last_qty
+
+    if cum_cnt > 0 and cum_cnt * buy_vol < belong_vol:
+        return position_list, max(real_cnt, int(cum_cnt))
+
+    return position_list, int(cum_cnt)
+
+
+class LadderTests(unittest.TestCase):
+    def test_matches_reference_on_random_inputs(self):
+        rng = random.Random(20240601)
+        for _ in range(20000):
+            buy_vol = rng.choice([0, 0.001, 0.01, 0.1, 1.0])
+            max_cnt = rng.choice([1, 10, 100, 500])
+            belong_vol = round(rng.uniform(-buy_vol, buy_vol * max_cnt * 1.2), 4) if buy_vol else rng.uniform(0, 5)
+            prev_positions = tuple(
+                rng.choice([0, 1, 2, 3, 4, 4, 4, 2.0, 0.5, 7])
+                for _ in range(rng.randint(0, 12))
+            )
+
+            expected_list, expected_cnt = reference_ladder(belong_vol, buy_vol, max_cnt, prev_positions)
+            position_list, cnt = rebuild_ladder(belong_vol, buy_vol, max_cnt, prev_positions)
+
+            self.assertEqual(list(position_list), expected_list, (belong_vol, buy_vol, max_cnt, prev_positions))
+            self.assertEqual(cnt, expected_cnt)
+
+    def test_exact_ladder_boundary_keeps_zero_entry(self):
+        # 기존 구현은 base_cnt 가 묶음 경계에 걸리면 다음 묶음을 0 으로 남김
+        self.assertEqual(rebuild_ladder(0.8, 0.1, 500, (4, 4, 4)), ((4, 4, 0), 8))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+
+from core.trader import Bot
+
+
+class FakeTrader():
+    def __init__(self, leverage):
+        self.leverage = leverage
+
+    def get_target_symbols(self):
+        return list(self.leverage)
+
+    def get_info(self, target_symbol, key):
+        return self.leverage[target_symbol]
+
+    def is_hedge_mode(self):
+        return True
+
+
+class FakeApi():
+    def __init__(self, levers):
+        self.levers = levers
+        self.info_calls = []
+        self.set_calls = []
+
+    def market(self, symbol):
+        return {'id': symbol.split('/')[0] + '-USDT-SWAP'}
+
+    async def private_get_account_leverage_info(self, params):
+        self.info_calls.append(params)
+        return {'data': [
+            {'instId': inst_id, 'mgnMode': params['mgnMode'], 'posSide': pos_side, 'lever': str(lever)}
+            for (inst_id, mode, pos_side), lever in self.levers.items()
+            if mode == params['mgnMode'] and inst_id in params['instId'].split(',')
+        ]}
+
+    async def set_leverage(self, leverage, symbol, params):
+        self.set_calls.append((symbol, params['mgnMode'], params['posSide'], leverage))
+
+
+class LeverageSyncTests(unittest.IsolatedAsyncioTestCase):
+    async def test_only_mismatched_sides_are_set(self):
+        bot = Bot.__new__(Bot)
+        bot.trader = FakeTrader({'BTC/USDT:USDT': 5, 'ETH/USDT:USDT': 3})
+        bot.api = FakeApi({
+            ('BTC-USDT-SWAP', 'cross', 'long'): 5,
+            ('BTC-USDT-SWAP', 'cross', 'short'): 5,
+            ('BTC-USDT-SWAP', 'isolated', 'long'): 5,
+            ('BTC-USDT-SWAP', 'isolated', 'short'): 10,
+            ('ETH-USDT-SWAP', 'cross', 'net'): 3,
+        })
+
+        result = await bot.sync_configured_leverage()
+
+        # margin mode 별 조회는 심볼을 묶어 한 번씩
+        self.assertEqual([call['mgnMode'] for call in bot.api.info_calls], ['cross', 'isolated'])
+        self.assertEqual(sorted(bot.api.set_calls), [
+            ('BTC/USDT:USDT', 'isolated', 'short', 5),
+            ('ETH/USDT:USDT', 'isolated', 'long', 3),
+            ('ETH/USDT:USDT', 'isolated', 'short', 3),
+        ])
+        self.assertEqual(result['BTC/USDT:USDT']['cross'], 'skip')
+        self.assertEqual(result['ETH/USDT:USDT']['cross'], 'skip')
+        self.assertTrue(result['ETH/USDT:USDT']['isolated'])
+
+
+if __name__ == '__main__':
+    unittest.main()
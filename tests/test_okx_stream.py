@@ -0,0 +1,128 @@
+import asyncio
+import json
+import unittest
+
+try:
+    from aiohttp import web
+except ImportError:  # pragma: no cover
+    web = None
+
+if web is not None:
+    from core.okx_stream import OkxPrivateStream, login_args
+
+
+SUBSCRIPTIONS = [
+    {'channel': 'positions', 'instType': 'SWAP'},
+    {'channel': 'account', 'ccy': 'USDT'},
+]
+
+
+@unittest.skipIf(web is None, 'aiohttp is not installed')
+class OkxPrivateStreamTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.sessions = 0
+        self.logins = []
+        self.subscribed = []
+        self.drop_first = False
+
+        app = web.Application()
+        app.router.add_get('/ws', self.handle_ws)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f'http://127.0.0.1:{port}/ws'
+
+    async def asyncTearDown(self):
+        await self.runner.cleanup()
+
+    async def handle_ws(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.sessions += 1
+
+        login = json.loads((await ws.receive()).data)
+        args = login['args'][0]
+        self.logins.append(args)
+        expected = login_args('key', 'secret', 'pass', timestamp=args['timestamp'])
+        if login['op'] != 'login' or args != expected:
+            await ws.send_json({'event': 'error', 'code': '60009', 'msg': 'Login failed.'})
+            await ws.close()
+            return ws
+        await ws.send_json({'event': 'login', 'code': '0', 'msg': ''})
+
+        subscribe = json.loads((await ws.receive()).data)
+        self.subscribed.append(subscribe['args'])
+
+        if self.drop_first and self.sessions == 1:
+            await ws.close()
+            return ws
+
+        await ws.send_json({
+            'arg': {'channel': 'positions', 'instType': 'SWAP'},
+            'data': [{'instId': 'BTC-USDT-SWAP', 'posSide': 'long', 'pos': '3'}],
+        })
+        async for msg in ws:
+            if msg.data == 'ping':
+                await ws.send_str('pong')
+        return ws
+
+    def make_stream(self, received, resyncs, disconnects=None):
+        async def on_data(channel, data):
+            received.append((channel, data))
+
+        async def on_resync():
+            resyncs.append(1)
+
+        return OkxPrivateStream(
+            self.url, 'key', 'secret', 'pass', SUBSCRIPTIONS,
+            on_data=on_data,
+            on_resync=on_resync,
+            on_disconnect=(lambda: disconnects.append(1)) if disconnects is not None else None,
+            ping_interval=0.05,
+            reconnect_delays=(0.01,),
+        )
+
+    async def wait_for(self, predicate):
+        for _ in range(200):
+            if predicate():
+                return
+            await asyncio.sleep(0.01)
+        self.fail('condition not reached')
+
+    async def test_login_subscribe_and_dispatch(self):
+        received, resyncs = [], []
+        stream = self.make_stream(received, resyncs)
+        stream.start()
+        try:
+            await self.wait_for(lambda: received)
+            self.assertEqual(self.subscribed, [SUBSCRIPTIONS])
+            self.assertEqual(received[0][0], 'positions')
+            self.assertEqual(received[0][1][0]['pos'], '3')
+            self.assertEqual(resyncs, [1])
+
+            # ping / pong 으로 idle 연결 유지
+            await asyncio.sleep(0.2)
+            self.assertTrue(stream.connected)
+            self.assertEqual(self.sessions, 1)
+        finally:
+            await stream.close()
+
+    async def test_reconnect_triggers_resync(self):
+        self.drop_first = True
+        received, resyncs, disconnects = [], [], []
+        stream = self.make_stream(received, resyncs, disconnects)
+        stream.start()
+        try:
+            await self.wait_for(lambda: received)
+            self.assertEqual(self.sessions, 2)
+            self.assertEqual(len(resyncs), 2)
+            self.assertEqual(disconnects, [1])
+            self.assertEqual(stream.stats()['connects'], 2)
+        finally:
+            await stream.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+
+from core.trader import Bot
+from core.reconcile import PositionReconciler
+from core.snapshot import ExchangeSnapshot
+
+
+class FakeApi():
+    def index_by(self, positions, key):
+        return {}
+
+
+class FakeTrader():
+    def __init__(self):
+        self.data = {
+            'BTC/USDT:USDT': {'position': 'long', 'avg_buy_price': 100.0, 'amt': 1, 'map_vol': 1},
+            'ETH/USDT:USDT': {'position': 'long', 'avg_buy_price': 10.0, 'amt': 1, 'map_vol': 1},
+        }
+
+    def is_hedge_mode(self):
+        return False
+
+    def get_target_symbols(self):
+        return list(self.data)
+
+    def get_info(self, target_symbol, key):
+        if target_symbol is None:
+            return 100.0
+        return self.data[target_symbol][key]
+
+    def update(self, target_symbol, key, value):
+        self.data[target_symbol][key] = value
+
+    def get_belong_vol(self, target_symbol, *args):
+        return self.data[target_symbol]['amt']
+
+
+class OnewayReconcileLockTests(unittest.IsolatedAsyncioTestCase):
+    def make_bot(self):
+        bot = Bot.__new__(Bot)
+        bot.api = FakeApi()
+        bot.trader = FakeTrader()
+        bot.snapshot = ExchangeSnapshot()
+        bot.reconciler = PositionReconciler()
+        bot.symbol_locks = {}
+        bot.stream = None
+        bot.stream_config = {'coalesce': 0, 'resync_interval': 300}
+        bot.stream_positions = {('BTC-USDT-SWAP', 'net'): {}, ('ETH-USDT-SWAP', 'net'): {}}
+        bot._stream_reconcile_task = None
+        bot.messages = []
+
+        async def balance():
+            return 100.0
+
+        async def status_msg():
+            return 'status'
+
+        async def post_message(msg):
+            bot.messages.append(msg)
+
+        bot.set_balance = balance
+        bot.get_balance = balance
+        bot.status_msg = status_msg
+        bot.post_message = post_message
+        bot.position_fingerprint = lambda target_symbol, groups: (target_symbol, len(groups.get(target_symbol, [])))
+        return bot
+
+    async def push_close(self, bot):
+        # 두 심볼 모두 전량 청산된 positions push
+        await bot.on_stream_data('positions', [
+            {'instId': 'BTC-USDT-SWAP', 'posSide': 'net', 'pos': '0'},
+            {'instId': 'ETH-USDT-SWAP', 'posSide': 'net', 'pos': '0'},
+        ])
+        await bot._stream_reconcile_task
+
+    async def test_push_leaves_symbol_in_flight_for_post_trade(self):
+        bot = self.make_bot()
+        async with bot.get_symbol_lock('BTC/USDT:USDT'):
+            await self.push_close(bot)
+            # 주문 처리 중인 심볼은 post_trade 의 손익 계산 전까지 그대로 유지
+            self.assertEqual(bot.trader.data['BTC/USDT:USDT']['position'], 'long')
+            self.assertEqual(bot.trader.data['BTC/USDT:USDT']['avg_buy_price'], 100.0)
+            self.assertIsNone(bot.trader.data['ETH/USDT:USDT']['position'])
+
+            await bot.update_positions(owned=('BTC/USDT:USDT',))
+            self.assertIsNone(bot.trader.data['BTC/USDT:USDT']['position'])
+
+    async def test_skipped_symbol_is_reconciled_next_cycle(self):
+        bot = self.make_bot()
+        async with bot.get_symbol_lock('BTC/USDT:USDT'):
+            await self.push_close(bot)
+        await bot.update_positions()
+        self.assertIsNone(bot.trader.data['BTC/USDT:USDT']['position'])
+        self.assertEqual(bot.trader.data['BTC/USDT:USDT']['avg_buy_price'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
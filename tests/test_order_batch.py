@@ -0,0 +1,181 @@
+import asyncio
+import unittest
+
+import ccxt
+
+from core.order_batch import OrderBatcher
+from core.trader import Bot
+from core.reconcile import PositionReconciler
+from core.snapshot import ExchangeSnapshot
+
+
+class FakeApi():
+    has = {'createOrders': True}
+    exceptions = {'exact': {'51008': ccxt.InsufficientFunds}}
+
+    def __init__(self, reject_symbols=()):
+        self.reject_symbols = reject_symbols
+        self.batches = []
+
+    async def create_orders(self, requests):
+        self.batches.append([request['symbol'] for request in requests])
+        orders = []
+        for i, request in enumerate(requests):
+            client_id = request['params']['clOrdId']
+            if request['symbol'] in self.reject_symbols:
+                orders.append({'id': None, 'clientOrderId': client_id, 'status': 'rejected',
+                               'info': {'sCode': '51008', 'sMsg': 'Insufficient margin'}})
+            else:
+                orders.append({'id': f'ord{i}', 'clientOrderId': client_id, 'status': None, 'info': {}})
+        return orders
+
+
+class FakeTrader():
+    def __init__(self, symbols, hedge=True):
+        self.symbols = symbols
+        self.hedge = hedge
+
+    def is_hedge_mode(self):
+        return self.hedge
+
+    def get_target_symbols(self):
+        return self.symbols
+
+
+class OrderBatcherTests(unittest.IsolatedAsyncioTestCase):
+    async def test_flushes_once_after_every_participant_arrives(self):
+        calls = []
+
+        async def submit(requests):
+            calls.append(list(requests))
+            return [f'r-{request}' for request in requests]
+
+        batcher = OrderBatcher(3, submit)
+
+        async def skip():
+            await asyncio.sleep(0.01)
+            batcher.leave()
+
+        first, second, _ = await asyncio.gather(batcher.place(['a', 'b']), batcher.place(['c']), skip())
+        self.assertEqual(calls, [['a', 'b', 'c']])
+        self.assertEqual((first, second), (['r-a', 'r-b'], ['r-c']))
+        self.assertEqual(batcher.submitted, 3)
+
+    async def test_submit_error_reaches_every_placer(self):
+        async def submit(requests):
+            raise ccxt.NetworkError('down')
+
+        batcher = OrderBatcher(2, submit)
+        results = await asyncio.gather(batcher.place(['a']), batcher.place(['b']), return_exceptions=True)
+        self.assertTrue(all(isinstance(result, ccxt.NetworkError) for result in results))
+
+
+class TradeBatchTests(unittest.IsolatedAsyncioTestCase):
+    def make_bot(self, reject_symbols=()):
+        bot = Bot.__new__(Bot)
+        bot.api = FakeApi(reject_symbols)
+        bot.snapshot = ExchangeSnapshot()
+        bot.reconciler = PositionReconciler()
+        bot.trader = FakeTrader(['BTC/USDT:USDT', 'ETH/USDT:USDT', 'SOL/USDT:USDT'])
+        bot.position_loads = 0
+        bot.messages = []
+
+        async def load_positions():
+            bot.position_loads += 1
+            return []
+
+        async def fetch_positions():
+            return await bot.snapshot.get('positions', load_positions), {}
+
+        async def trade_hedge_symbol(target_symbol, check_pos, trade_vol, cur_close, cur_time):
+            # 실제 plan 대신: 한 번의 snapshot 조회 후 주문 (SOL 은 주문 없음)
+            try:
+                await bot.fetch_positions()
+                if target_symbol.startswith('SOL'):
+                    return []
+                order = await bot.market_order_hedge(target_symbol, check_pos, 'open', trade_vol)
+            except (ccxt.InvalidOrder, ccxt.InsufficientFunds):
+                return None
+            finally:
+                bot.leave_order_batch()
+            return [bot.build_order_entry(target_symbol, order, 'buy', trade_vol, cur_time, check_pos, 'open')]
+
+        async def update_positions_hedge():
+            return 'status'
+
+        async def post_message(msg):
+            bot.messages.append(msg)
+
+        bot.fetch_positions = fetch_positions
+        bot.trade_hedge_symbol = trade_hedge_symbol
+        bot.update_positions_hedge = update_positions_hedge
+        bot.post_message = post_message
+        return bot
+
+    def signal(self, symbol, position='long', size=1):
+        return {'symbol': symbol, 'position': position, 'position_size': size, 'cur_close': 100}
+
+    async def test_signals_share_one_snapshot_and_one_order_batch(self):
+        bot = self.make_bot()
+        results = await bot.trade_batch([
+            self.signal('BTCUSDT.P'),
+            self.signal('SOLUSDT.P'),
+            self.signal('ETHUSDT.P', 'short'),
+            self.signal('ETHUSDT.P', None),
+        ])
+
+        self.assertEqual(bot.position_loads, 1)
+        self.assertEqual(bot.api.batches, [['BTC/USDT:USDT', 'ETH/USDT:USDT']])
+        self.assertEqual([result['status'] for result in results], ['ok', 'ok', 'ok', 'ignored'])
+        self.assertEqual(results[0]['orders'], [{'target_symbol': 'BTC/USDT:USDT', 'trade_type': 'buy', 'order_id': 'ord0'}])
+        self.assertEqual(results[1]['orders'], [])
+        self.assertEqual(results[2]['orders'][0]['order_id'], 'ord1')
+        self.assertEqual(bot.messages, ['status'])
+
+    async def test_same_symbol_signals_run_in_separate_rounds(self):
+        bot = self.make_bot()
+        results = await bot.trade_batch([self.signal('BTCUSDT.P'), self.signal('BTCUSDT.P', 'short')])
+        self.assertEqual(bot.api.batches, [['BTC/USDT:USDT'], ['BTC/USDT:USDT']])
+        self.assertEqual([result['status'] for result in results], ['ok', 'ok'])
+
+    async def test_rejected_leg_fails_only_its_signal(self):
+        bot = self.make_bot(reject_symbols=('ETH/USDT:USDT',))
+        results = await bot.trade_batch([self.signal('BTCUSDT.P'), self.signal('ETHUSDT.P')])
+        self.assertEqual(len(bot.api.batches), 1)
+        self.assertEqual([result['status'] for result in results], ['ok', 'failed'])
+
+
+class TradeBatchOnewayTests(unittest.IsolatedAsyncioTestCase):
+    def make_bot(self, outcomes):
+        bot = Bot.__new__(Bot)
+        bot.snapshot = ExchangeSnapshot()
+        bot.trader = FakeTrader(['BTC/USDT:USDT', 'ETH/USDT:USDT'], hedge=False)
+        bot.symbol_locks = {}
+        bot.locked_during_trade = []
+
+        async def trade_oneway(symbol, check_pos, trade_vol, cur_close):
+            target_symbol = bot.normalize_target_symbol(symbol)
+            bot.locked_during_trade.append(bot.get_symbol_lock(target_symbol).locked())
+            return outcomes[target_symbol]
+
+        bot.trade_oneway = trade_oneway
+        return bot
+
+    async def test_reports_each_signal_outcome_under_the_symbol_lock(self):
+        bot = self.make_bot({
+            'BTC/USDT:USDT': [['BTC/USDT:USDT', {'id': 'o1'}, 'buy_long', 1, 0], ['BTC/USDT:USDT', None, None, 1, 0]],
+            'ETH/USDT:USDT': None,
+        })
+        results = await bot.trade_batch([
+            {'symbol': 'BTCUSDT.P', 'position': 'long', 'position_size': 1, 'cur_close': 100},
+            {'symbol': 'ETHUSDT.P', 'position': 'long', 'position_size': 1, 'cur_close': 100},
+            {'symbol': 'XRPUSDT.P', 'position': 'long', 'position_size': 1, 'cur_close': 100},
+        ])
+
+        self.assertEqual([result['status'] for result in results], ['ok', 'failed', 'ignored'])
+        self.assertEqual(results[0]['orders'], [{'target_symbol': 'BTC/USDT:USDT', 'trade_type': 'buy_long', 'order_id': 'o1'}])
+        self.assertEqual(bot.locked_during_trade, [True, True])
+
+
+if __name__ == '__main__':
+    unittest.main()
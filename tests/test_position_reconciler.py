@@ -0,0 +1,49 @@
+import unittest
+
+from core.reconcile import PositionReconciler
+
+
+def position(side, contracts, entry_price, updated='1'):
+    return {
+        'symbol': 'BTC/USDT:USDT',
+        'side': side,
+        'contracts': contracts,
+        'entryPrice': entry_price,
+        'timestamp': None,
+        'info': {'uTime': updated},
+    }
+
+
+class PositionReconcilerTests(unittest.TestCase):
+    def test_unchanged_payload_is_skipped(self):
+        reconciler = PositionReconciler()
+        first = reconciler.fingerprint([position('long', 2, 100), position('short', 1, 90)])
+        self.assertTrue(reconciler.changed('BTC', first))
+        reconciler.commit('BTC', first)
+
+        # 순서가 달라도 같은 포지션이면 같은 fingerprint
+        second = reconciler.fingerprint([position('short', 1, 90), position('long', 2, 100)])
+        self.assertFalse(reconciler.changed('BTC', second))
+
+    def test_contract_update_or_params_move_fingerprint(self):
+        reconciler = PositionReconciler()
+        base = reconciler.fingerprint([position('long', 2, 100)], params=(100, 0.1, 500))
+        reconciler.commit('BTC', base)
+
+        self.assertTrue(reconciler.changed('BTC', reconciler.fingerprint([position('long', 3, 100)], params=(100, 0.1, 500))))
+        self.assertTrue(reconciler.changed('BTC', reconciler.fingerprint([position('long', 2, 100, '2')], params=(100, 0.1, 500))))
+        self.assertTrue(reconciler.changed('BTC', reconciler.fingerprint([position('long', 2, 100)], params=(100, 0.1, 400))))
+
+    def test_invalidate_forces_rebuild(self):
+        reconciler = PositionReconciler()
+        fingerprint = reconciler.fingerprint([])
+        reconciler.commit('BTC', fingerprint)
+        reconciler.invalidate('BTC')
+        self.assertTrue(reconciler.changed('BTC', fingerprint))
+
+        reconciler.finish_cycle(2, 1)
+        self.assertEqual(reconciler.stats()['touched'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
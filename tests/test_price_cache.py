@@ -0,0 +1,37 @@
+import asyncio
+import unittest
+
+from core.price_cache import PriceCache
+
+
+class PriceCacheTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.calls = 0
+
+    async def loader(self):
+        self.calls += 1
+        await asyncio.sleep(0)
+        return 100.0 + self.calls
+
+    async def test_stream_price_needs_no_rest_call(self):
+        cache = PriceCache(max_age=5)
+        cache.update('BTC/USDT:USDT', '65000.5')
+        price, age, source = await cache.get('BTC/USDT:USDT', self.loader)
+        self.assertEqual((price, source), (65000.5, 'ws'))
+        self.assertLess(age, 5)
+        self.assertEqual(self.calls, 0)
+
+    async def test_missing_or_stale_price_falls_back_to_rest_once(self):
+        cache = PriceCache(max_age=0.05)
+        results = await asyncio.gather(*(cache.get('ETH/USDT:USDT', self.loader) for _ in range(3)))
+        self.assertEqual(self.calls, 1)
+        self.assertTrue(all(result[0] == 101.0 and result[2] == 'rest' for result in results))
+
+        await asyncio.sleep(0.06)
+        price, _, _ = await cache.get('ETH/USDT:USDT', self.loader)
+        self.assertEqual(price, 102.0)
+        self.assertEqual(cache.stats()['rest_loads'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
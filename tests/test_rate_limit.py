@@ -0,0 +1,65 @@
+import asyncio
+import unittest
+
+from core.ratelimit import RequestScheduler, TokenBucket, PRIORITY_ORDER, PRIORITY_POLL, PRIORITY_READ
+
+
+class TokenBucketTests(unittest.IsolatedAsyncioTestCase):
+    async def test_burst_passes_without_waiting(self):
+        bucket = TokenBucket(rate=10, burst=3)
+        waits = [await bucket.acquire() for _ in range(3)]
+        self.assertEqual(waits, [0.0, 0.0, 0.0])
+        self.assertEqual(bucket.stats()['delayed'], 0)
+
+    async def test_orders_jump_ahead_of_queued_polls_and_reads(self):
+        bucket = TokenBucket(rate=100, burst=1)
+        await bucket.acquire()
+        granted = []
+
+        async def call(name, priority):
+            await bucket.acquire(priority)
+            granted.append(name)
+
+        tasks = [
+            asyncio.create_task(call('read', PRIORITY_READ)),
+            asyncio.create_task(call('poll', PRIORITY_POLL)),
+            asyncio.create_task(call('order', PRIORITY_ORDER)),
+        ]
+        await asyncio.gather(*tasks)
+
+        self.assertEqual(granted, ['order', 'poll', 'read'])
+        stats = bucket.stats()
+        self.assertEqual(stats['delayed'], 3)
+        self.assertGreater(stats['max_wait_ms'], 0)
+
+    async def test_cancelled_waiter_does_not_consume_token(self):
+        bucket = TokenBucket(rate=50, burst=1)
+        await bucket.acquire()
+        waiter = asyncio.create_task(bucket.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+
+        await asyncio.wait_for(bucket.acquire(), 0.5)
+        self.assertEqual(bucket.stats()['queued'], 0)
+
+    async def test_penalize_empties_bucket(self):
+        bucket = TokenBucket(rate=50, burst=5)
+        bucket.penalize()
+        self.assertGreater(await bucket.acquire(), 0)
+        self.assertEqual(bucket.stats()['throttled'], 1)
+
+
+class RequestSchedulerTests(unittest.IsolatedAsyncioTestCase):
+    async def test_configure_keeps_bucket_state(self):
+        scheduler = RequestScheduler({'trade': (10, 2)})
+        await scheduler.acquire('trade', PRIORITY_ORDER)
+        scheduler.configure({'trade': (20, 4), 'public': (5, 5)})
+
+        self.assertEqual(scheduler.buckets['trade'].stats()['requests'], 1)
+        self.assertEqual(scheduler.buckets['trade'].rate, 20)
+        self.assertIn('public', scheduler.stats())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import os
+import threading
+import tempfile
+import unittest
+from unittest import mock
+
+from core.user import UserData
+
+
+CONFIG = {
+    'OKX': {'TARGET': ['BTC/USDT:USDT']},
+    'USER': {'NAME': 'tester', 'ID': 'T'},
+    'TRADE_OPTION': {
+        'BTC': {'leverage': 5, 'min_vol': 0.1, 'map_vol': 100, 'round_num': 4},
+    },
+}
+
+
+class StateJournalTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.save_path = os.path.join(self.tmpdir.name, 'info.json')
+
+    async def asyncTearDown(self):
+        self.tmpdir.cleanup()
+
+    def make_user(self):
+        config = {**CONFIG, 'SAVE_PATH': self.save_path, 'OKX': dict(CONFIG['OKX'])}
+        with mock.patch('core.user.read_config_okx', return_value=config):
+            return UserData()
+
+    def journal_files(self):
+        return sorted(name for name in os.listdir(self.tmpdir.name) if '.journal.' in name)
+
+    async def test_replays_journal_without_snapshot(self):
+        user = self.make_user()
+        user.update(None, 'cum_profit', 12.5)
+        user.update_side_info('BTC/USDT:USDT', 'long', 'amt', 3)
+        user.update_side_pos_list('BTC/USDT:USDT', 'long', 4)
+        user.update_side_pos_list('BTC/USDT:USDT', 'long', 2)
+        user.remove_side_pos_list('BTC/USDT:USDT', 'long')
+        await user.save_info()
+        self.assertFalse(os.path.exists(self.save_path))
+        user.journal.close()
+
+        restored = self.make_user()
+        self.assertEqual(restored.cum_profit, 12.5)
+        self.assertEqual(restored.get_side_info('BTC/USDT:USDT', 'long', 'amt'), 3)
+        self.assertEqual(restored.get_side_info('BTC/USDT:USDT', 'long', 'position_list'), [4])
+        restored.journal.close()
+
+    async def test_snapshot_compacts_journal(self):
+        user = self.make_user()
+        user.update(None, 'win_cnt', 1)
+        self.assertTrue(await user.writer.flush())
+        self.assertEqual(self.journal_files(), [])
+
+        user.update(None, 'win_cnt', 2)
+        user.reset_side_info('BTC/USDT:USDT', 'short')
+        user.journal.close()
+
+        restored = self.make_user()
+        self.assertEqual(restored.win_cnt, 2)
+        self.assertEqual(restored.journal_seq, 1)
+        await restored.close_info()
+        self.assertEqual(self.journal_files(), [])
+
+    async def test_unchanged_values_are_not_journaled(self):
+        user = self.make_user()
+        user.update(None, 'balance', 100.0)
+        user.update(None, 'balance', 100.0)
+        self.assertEqual(user.journal.seq, 1)
+        user.journal.close()
+
+    async def test_appends_and_fsync_run_off_the_event_loop(self):
+        user = self.make_user()
+        fsync_threads = []
+        real_fsync = os.fsync
+
+        def fsync(fd):
+            fsync_threads.append(threading.current_thread())
+            real_fsync(fd)
+
+        with mock.patch('core.journal.os.fsync', side_effect=fsync):
+            user.update(None, 'cum_profit', 1.5)
+            # append 는 메모리에만 쌓이고 파일은 아직 건드리지 않음
+            self.assertEqual(self.journal_files(), [])
+            await user.save_info()
+        self.assertEqual(len(self.journal_files()), 1)
+        self.assertTrue(fsync_threads)
+        self.assertNotIn(threading.main_thread(), fsync_threads)
+        await user.close_info()
+
+    async def test_appends_after_snapshot_are_restored(self):
+        user = self.make_user()
+        user.update(None, 'win_cnt', 1)
+        self.assertTrue(await user.writer.flush())
+        user.update(None, 'win_cnt', 2)
+        await user.save_info()
+        await user.close_info()
+
+        restored = self.make_user()
+        self.assertEqual(restored.win_cnt, 2)
+        restored.journal.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
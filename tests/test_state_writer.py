@@ -0,0 +1,70 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from core.persistence import StateWriter
+
+
+class StateWriterTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'info.json')
+        self.state = {'cnt': 0}
+
+    async def asyncTearDown(self):
+        self.tmpdir.cleanup()
+
+    def dump(self):
+        return dict(self.state)
+
+    def read(self):
+        with open(self.path) as f:
+            return json.load(f)
+
+    async def test_mutations_coalesce_into_one_write(self):
+        writer = StateWriter(self.path, self.dump, interval=0.05, max_mutations=100)
+        for cnt in range(1, 6):
+            self.state['cnt'] = cnt
+            writer.mark_dirty()
+        self.assertFalse(os.path.exists(self.path))
+
+        await asyncio.sleep(0.1)
+        self.assertEqual(writer.flush_count, 1)
+        self.assertEqual(self.read(), {'cnt': 5})
+        self.assertFalse(os.path.exists(self.path + '.tmp'))
+
+    async def test_max_mutations_flushes_early(self):
+        writer = StateWriter(self.path, self.dump, interval=60, max_mutations=3)
+        for cnt in range(1, 4):
+            self.state['cnt'] = cnt
+            writer.mark_dirty()
+        await asyncio.sleep(0.05)
+        self.assertEqual(self.read(), {'cnt': 3})
+        await writer.close()
+
+    async def test_close_flushes_pending_state(self):
+        writer = StateWriter(self.path, self.dump, interval=60, compact=True)
+        self.state['cnt'] = 7
+        writer.mark_dirty()
+        self.assertTrue(await writer.close())
+        with open(self.path) as f:
+            self.assertEqual(f.read(), '{"cnt":7}')
+        self.assertFalse(await writer.close())
+
+    async def test_failed_write_keeps_state_dirty(self):
+        writer = StateWriter(self.path, self.dump, interval=60)
+        self.state['cnt'] = 3
+        writer.mark_dirty()
+        with mock.patch('core.persistence.write_atomic', side_effect=OSError('disk full')):
+            with self.assertRaises(OSError):
+                await writer.flush()
+        self.assertTrue(writer.dirty)
+        self.assertTrue(await writer.close())
+        self.assertEqual(self.read(), {'cnt': 3})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,34 @@
+import json
+import unittest
+
+from core.state import SideState, SymbolState
+
+
+class SymbolStateTests(unittest.TestCase):
+    def test_json_round_trip(self):
+        state = SymbolState.from_dict({'leverage': 5, 'min_vol': 0.1, 'map_vol': 100, 'buy_vol': 2})
+        state.position_list.extend([4, 4, 1])
+        state.positions['long'].amt = 0.3
+
+        restored = SymbolState.from_dict(json.loads(json.dumps(state.to_dict())))
+
+        self.assertEqual(restored, state)
+        self.assertIsInstance(restored.positions['long'], SideState)
+        self.assertEqual(restored['buy_vol'], 2)
+
+    def test_dict_style_access(self):
+        state = SymbolState()
+        state['buy_cnt'] = 3
+        self.assertEqual(state.buy_cnt, 3)
+        self.assertIn('buy_cnt', state)
+        self.assertNotIn('unknown', state)
+        with self.assertRaises(KeyError):
+            state['unknown']
+
+    def test_slots_reject_unknown_attributes(self):
+        with self.assertRaises(AttributeError):
+            SideState().unknown = 1
+
+
+if __name__ == '__main__':
+    unittest.main()
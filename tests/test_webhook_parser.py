@@ -0,0 +1,67 @@
+import unittest
+
+from core.webhook_parser import parse_alert, parse_batch_body, parse_body
+from hedge_strategy_v1.app.schema import parse_webhook_payload
+
+
+class ParseAlertTests(unittest.TestCase):
+    def test_legacy_and_short_alerts(self):
+        alert = parse_alert('buy, BTCUSDT.P ,1,67250\n')
+        self.assertEqual((alert.action, alert.symbol, alert.size, alert.close), ('buy', 'BTCUSDT.P', 1.0, 67250.0))
+        self.assertEqual(alert.fields, {})
+
+        alert = parse_alert('sell,ETHUSDT.P')
+        self.assertEqual((alert.size, alert.close), (None, None))
+
+    def test_key_values_after_positional_tokens(self):
+        alert = parse_alert('sell,ETHUSDT.P,0.25,3120,,Regime=Bear, role = hedge ,note,hedge=0.25')
+        self.assertEqual(alert.fields, {'regime': 'Bear', 'role': 'hedge', 'hedge': '0.25'})
+
+    def test_action_is_lower_cased_for_every_format(self):
+        self.assertEqual(parse_alert('BUY,BTCUSDT.P').action, 'buy')
+        self.assertEqual(parse_body(b'{"action": " Sell ", "symbol": "ETHUSDT.P"}', 'application/json').action, 'sell')
+        alerts = parse_batch_body(b'[{"action": "BUY", "symbol": "BTCUSDT.P"}, "Sell,ETHUSDT.P"]', 'application/json')
+        self.assertEqual([alert.action for alert in alerts], ['buy', 'sell'])
+
+    def test_invalid_alerts(self):
+        for text in ('buy', 'buy,BTCUSDT.P,x,1', '', 'buy,BTCUSDT.P,,65000', 'buy,,1,65000', ',BTCUSDT.P'):
+            with self.assertRaises(ValueError):
+                parse_alert(text)
+        with self.assertRaises(ValueError):
+            parse_alert('buy,BTCUSDT.P', min_tokens=4)
+
+
+class ParseBatchBodyTests(unittest.TestCase):
+    def test_json_list_keeps_order_and_marks_bad_entries(self):
+        body = b'{"signals": [{"action": "buy", "symbol": "BTCUSDT.P", "size": 1}, "sell,ETHUSDT.P,2,3100", {"action": "buy"}, 5]}'
+        alerts = parse_batch_body(body, 'application/json')
+        self.assertEqual((alerts[0].symbol, alerts[0].size), ('BTCUSDT.P', 1.0))
+        self.assertEqual((alerts[1].action, alerts[1].close), ('sell', 3100.0))
+        self.assertIsInstance(alerts[2], ValueError)
+        self.assertIsInstance(alerts[3], ValueError)
+
+    def test_text_body_is_one_alert_per_line(self):
+        alerts = parse_batch_body(b'buy,BTCUSDT.P,1,67000\n\nsell,ETHUSDT.P\n', 'text/plain')
+        self.assertEqual([alert.symbol for alert in alerts], ['BTCUSDT.P', 'ETHUSDT.P'])
+
+    def test_body_that_is_not_a_list(self):
+        for body in (b'{"action": "buy"}', b'[1,'):
+            with self.assertRaises(ValueError):
+                parse_batch_body(body, 'application/json')
+
+
+class PayloadDedupeKeyTests(unittest.TestCase):
+    def test_key_is_computed_once_and_stable(self):
+        text = 'sell,BTCUSDT.P,0.25,66800,regime=bull,role=hedge,hedge=0.25,tf=15,timestamp=1700000000'
+        payload = parse_webhook_payload(text)
+        self.assertEqual(payload.dedupe_key, parse_webhook_payload(text).dedupe_key)
+        # 같은 분(minute) 안의 같은 신호는 같은 key
+        self.assertEqual(
+            payload.dedupe_key,
+            parse_webhook_payload(text.replace('1700000000', '1700000019')).dedupe_key,
+        )
+        self.assertNotEqual(payload.dedupe_key, parse_webhook_payload(text.replace('0.25,66800', '0.5,66800')).dedupe_key)
+
+
+if __name__ == '__main__':
+    unittest.main()
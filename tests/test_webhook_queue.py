@@ -0,0 +1,120 @@
+import asyncio
+import unittest
+
+from core.webhook_queue import QueueFull, WebhookQueue
+
+
+class WebhookQueueTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.events = []
+        self.release = asyncio.Event()
+
+    async def handler(self, item):
+        symbol, seq = item
+        self.events.append(("start", symbol, seq))
+        await self.release.wait()
+        self.events.append(("end", symbol, seq))
+
+    async def test_same_symbol_runs_in_order(self):
+        queue = WebhookQueue(self.handler, max_pending=10)
+        for seq in range(3):
+            queue.submit("BTC", ("BTC", seq))
+        await asyncio.sleep(0)
+        self.release.set()
+        await queue.join()
+        await queue.close()
+
+        starts = [seq for kind, _, seq in self.events if kind == "start"]
+        self.assertEqual(starts, [0, 1, 2])
+        self.assertEqual(self.events[0:2], [("start", "BTC", 0), ("end", "BTC", 0)])
+
+    async def test_symbols_run_in_parallel(self):
+        queue = WebhookQueue(self.handler, max_pending=10)
+        queue.submit("BTC", ("BTC", 0))
+        queue.submit("ETH", ("ETH", 0))
+        await asyncio.sleep(0.01)
+
+        started = {symbol for kind, symbol, _ in self.events if kind == "start"}
+        self.assertEqual(started, {"BTC", "ETH"})
+
+        self.release.set()
+        await queue.join()
+        await queue.close()
+        self.assertEqual(queue.metrics()["processed"], 2)
+
+    async def test_rejects_when_full(self):
+        queue = WebhookQueue(self.handler, max_pending=2)
+        queue.submit("BTC", ("BTC", 0))
+        queue.submit("ETH", ("ETH", 0))
+        with self.assertRaises(QueueFull):
+            queue.submit("BTC", ("BTC", 1))
+
+        metrics = queue.metrics()
+        self.assertEqual(metrics["pending"], 2)
+        self.assertEqual(metrics["rejected"], 1)
+
+        self.release.set()
+        await queue.join()
+        await queue.close()
+        self.assertEqual(queue.metrics()["pending"], 0)
+
+    async def test_coalesces_same_symbol_burst_within_window(self):
+        handled = []
+
+        async def handler(item):
+            handled.append(item)
+
+        queue = WebhookQueue(handler, max_pending=10, coalesce_window=0.05)
+        for seq in range(3):
+            queue.submit("BTC", ("BTC", seq))
+        queue.submit("ETH", ("ETH", 0))
+        await asyncio.sleep(0.1)
+        queue.submit("BTC", ("BTC", 3))
+        await queue.join()
+        await queue.close()
+
+        self.assertEqual(sorted(handled), [("BTC", 2), ("BTC", 3), ("ETH", 0)])
+        metrics = queue.metrics()
+        self.assertEqual((metrics["processed"], metrics["pending"]), (5, 0))
+        self.assertEqual(metrics["coalesce"], {"window_ms": 50.0, "windows": 1, "coalesced": 2})
+
+    async def test_signal_after_window_is_not_merged(self):
+        handled = []
+
+        async def handler(item):
+            handled.append(item)
+            await asyncio.sleep(0.08)
+
+        queue = WebhookQueue(handler, max_pending=10, coalesce_window=0.02, merge=lambda items: items[:1])
+        queue.submit("BTC", 0)
+        await asyncio.sleep(0.05)
+        # 첫 신호 처리 중 들어온 신호들: 둘째와 셋째만 같은 window
+        queue.submit("BTC", 1)
+        queue.submit("BTC", 2)
+        await asyncio.sleep(0.05)
+        queue.submit("BTC", 3)
+        await queue.join()
+        await queue.close()
+
+        self.assertEqual(handled, [0, 1, 3])
+        self.assertEqual(queue.metrics()["coalesce"]["coalesced"], 1)
+
+    async def test_reserved_batch_counts_against_pending(self):
+        queue = WebhookQueue(self.handler, max_pending=3)
+        queue.submit("BTC", ("BTC", 0))
+        self.assertEqual(queue.reserve(2), 3)
+        with self.assertRaises(QueueFull):
+            queue.submit("ETH", ("ETH", 0))
+        queue.release(2)
+        with self.assertRaises(QueueFull):
+            queue.reserve(3)
+        self.assertEqual(queue.metrics()["rejected"], 4)
+
+        self.release.set()
+        await queue.join()
+        await queue.close()
+        self.assertEqual(queue.metrics()["pending"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()